@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""Offline benchmark + regression corpus for every parser in the repo.
+
+Fixtures live in bench/fixtures/<parser>/: each page (<name>.html or
+<name>.xml) sits next to <name>.json holding the expected extraction.
+Drop newly captured pages in the same layout to grow the corpus.
+
+For each parser this reports pages/s, MB/s, peak traced memory for one
+pass, the blocks and bytes its results keep allocated, and accuracy
+(fixtures whose extraction matches). It exits 1 when a parser is less
+accurate than the baseline. Being slower than the baseline by more than
+--tolerance is only reported: throughput baselines are machine specific
+and swing with other load on the box, so re-run with --update-baseline
+(or --only the parser in question) before reading much into one. On a
+machine whose baseline it is, --fail-on-slowdown RATIO also fails the
+run when a parser drops below RATIO x its baseline pages/s.
+
+    python3 bench/bench_parsers.py
+    python3 bench/bench_parsers.py --only amazon_dp --min-time 3
+    python3 bench/bench_parsers.py --update-baseline
+    python3 bench/bench_parsers.py --fail-on-slowdown 0.5   # CI box with its own baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+BASELINE = os.path.join(ROOT, "bench", "baseline.json")
+
+DEFAULT_SELLERS = {"amazon.com", "amazon resale", "amazon warehouse deals"}
+
+sys.path.insert(0, ROOT)
+from script_loader import load_module  # noqa: E402
+
+
+# ---------- Loading parsers from the per-directory scripts ----------
+
+def _price_matches(got: Optional[float], want: Optional[float]) -> bool:
+    if got is None or want is None:
+        return got is want
+    return abs(got - want) < 0.005
+
+
+@dataclass
+class ParserCase:
+    name: str
+    load: Callable[[], Callable[[bytes], object]]
+    check: Callable[[object, dict], bool]
+    fixtures: str = ""  # fixture directory, when not the same as name
+
+
+def _amazon_tracker():
+    mod = load_module(
+        os.path.join(ROOT, "price_tracker", "amazon_price_tracker.py"), "bench_apt"
+    )
+    logging.getLogger("AmazonTracker").setLevel(logging.WARNING)
+    return mod
+
+
+def _check_name_price(result, expected: dict) -> bool:
+    name, price = result
+    if "name" in expected and name != expected["name"]:
+        return False
+    return _price_matches(price, expected["price"])
+
+
+def _load_amazon_dp(embedded: bool = True):
+    def load():
+        mod = _amazon_tracker()
+        return lambda body: mod.get_price_name_amazon(body, DEFAULT_SELLERS, None, embedded)
+    return load
+
+
+def _load_amazon_dp_hinted():
+    # Hostile ranking: the lowest tiers preferred, as if the buybox or a
+    # fallback selector had won everything so far. Deal prices must still win.
+    mod = _amazon_tracker()
+    prefer = tuple(sel for sel, _ in reversed(mod.PRICE_SELECTORS))
+    return lambda body: mod.get_price_name_amazon_ranked(
+        body, DEFAULT_SELLERS, None, False, prefer
+    )[:2]
+
+
+def _load_amazon_offers():
+    mod = _amazon_tracker()
+    return lambda body: mod.get_price_name_offers(body, DEFAULT_SELLERS)
+
+
+def _load_amazon_aod():
+    mod = _amazon_tracker()
+    return lambda body: mod.get_price_name_aod(body, DEFAULT_SELLERS)
+
+
+def _load_amazon_listing():
+    mod = _amazon_tracker()
+    return lambda body: mod.get_prices_listing(body)
+
+
+def _check_listing(listed, expected: dict) -> bool:
+    want = expected["prices"]
+    if set(listed) != set(want):
+        return False
+    return all(_price_matches(listed[asin][0], price) for asin, price in want.items())
+
+
+def _load_camel():
+    mod = load_module(os.path.join(ROOT, "camel3", "camel_curl_poller.py"), "bench_camel")
+    return lambda body: mod.parse_deals(body.decode(errors="ignore"), enrich=False)
+
+
+def _check_camel(deals, expected: dict) -> bool:
+    want = expected["deals"]
+    if [d.asin for d in deals] != [d["asin"] for d in want]:
+        return False
+    return all(_price_matches(got.new_price, d["new_price"]) for got, d in zip(deals, want))
+
+
+def _load_slickdeals():
+    mod = load_module(os.path.join(ROOT, "slickdeals", "sd_curl_poller.py"), "bench_sd")
+    return lambda body: mod.parse_items(body.decode(), source="bench")
+
+
+def _check_slickdeals(items, expected: dict) -> bool:
+    return [it.link for it in items] == expected["links"]
+
+
+def _load_archive(fn_name: str):
+    def load():
+        mod = load_module(os.path.join(ROOT, "archive", "price_tracker.py"), "bench_archive")
+        fn = getattr(mod, fn_name)
+        return lambda body: fn(body.decode())
+    return load
+
+
+def _check_price(price, expected: dict) -> bool:
+    return _price_matches(price, expected["price"])
+
+
+PARSERS: List[ParserCase] = [
+    ParserCase("amazon_dp", _load_amazon_dp(), _check_name_price),
+    ParserCase("amazon_dp_dom", _load_amazon_dp(embedded=False), _check_name_price, "amazon_dp"),
+    ParserCase("amazon_dp_hinted", _load_amazon_dp_hinted, _check_name_price, "amazon_dp"),
+    ParserCase("amazon_offers", _load_amazon_offers, _check_name_price),
+    ParserCase("amazon_aod", _load_amazon_aod, _check_name_price),
+    ParserCase("amazon_listing", _load_amazon_listing, _check_listing),
+    ParserCase("camel_top_drops", _load_camel, _check_camel),
+    ParserCase("slickdeals_rss", _load_slickdeals, _check_slickdeals),
+    ParserCase("archive_bestbuy", _load_archive("get_price_bestbuy"), _check_price),
+    ParserCase("archive_walmart", _load_archive("get_price_walmart"), _check_price),
+    ParserCase("archive_metro", _load_archive("get_price_metro"), _check_price),
+    ParserCase("archive_straighttalk", _load_archive("get_price_straighttalk"), _check_price),
+]
+
+
+# ---------- Running ----------
+
+def load_fixtures(parser: str) -> List[tuple]:
+    directory = os.path.join(FIXTURES, parser)
+    if not os.path.isdir(directory):
+        return []
+    fixtures = []
+    for fname in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(fname)
+        if ext == ".json":
+            continue
+        with open(os.path.join(directory, fname), "rb") as f:
+            body = f.read()
+        with open(os.path.join(directory, stem + ".json")) as f:
+            expected = json.load(f)
+        fixtures.append((stem, body, expected))
+    return fixtures
+
+
+def bench_parser(
+    case: ParserCase, min_time: float, rounds: int, verbose: bool
+) -> Optional[Dict]:
+    fixtures = load_fixtures(case.fixtures or case.name)
+    if not fixtures:
+        return None
+    parse = case.load()
+    quiet = io.StringIO()
+
+    # Correctness + peak memory on a single pass
+    correct = 0
+    tracemalloc.start()
+    with contextlib.redirect_stdout(quiet):
+        for stem, body, expected in fixtures:
+            ok = case.check(parse(body), expected)
+            correct += ok
+            if verbose and not ok:
+                print(f"  ✗ {case.name}/{stem}", file=sys.stderr)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # What the results keep alive: blocks and bytes still allocated after a
+    # warm pass, with the results held (regex caches etc. are already filled)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tracemalloc.start()
+        held = [parse(body) for _, body, _ in fixtures]
+        stats = tracemalloc.take_snapshot().statistics("filename")
+        tracemalloc.stop()
+    del held
+    kept_blocks = sum(s.count for s in stats)
+    kept_bytes = sum(s.size for s in stats)
+
+    # Throughput: full passes for at least min_time, best of `rounds`
+    # (the best round is the least disturbed by other load on the box)
+    total_bytes = sum(len(body) for _, body, _ in fixtures)
+    best = 0.0
+    with contextlib.redirect_stdout(quiet):
+        for _ in range(rounds):
+            passes = 0
+            start = time.perf_counter()
+            while True:
+                for _, body, _ in fixtures:
+                    parse(body)
+                passes += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            best = max(best, passes / elapsed)
+
+    return {
+        "pages": len(fixtures),
+        "pages_per_s": round(len(fixtures) * best, 2),
+        "mb_per_s": round(total_bytes * best / 1e6, 3),
+        "peak_mb": round(peak / 1e6, 3),
+        "kept_blocks": kept_blocks,
+        "kept_kb": round(kept_bytes / 1e3, 1),
+        "accuracy": round(correct / len(fixtures), 4),
+    }
+
+
+def compare(
+    results: Dict, baseline: Dict, tolerance: float, fail_below: Optional[float] = None
+) -> tuple[List[str], List[str]]:
+    """(regressions, which fail the run; advisory slowdowns).
+
+    Regressions are accuracy drops, plus throughput under `fail_below` x
+    the baseline when that gate is asked for.
+    """
+    failures, slower = [], []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if fail_below and res["pages_per_s"] < base["pages_per_s"] * fail_below:
+            failures.append(
+                f"{name}: {res['pages_per_s']} pages/s < {fail_below:.0%} of baseline "
+                f"{base['pages_per_s']}"
+            )
+        elif res["pages_per_s"] < base["pages_per_s"] * (1 - tolerance):
+            slower.append(
+                f"{name}: {res['pages_per_s']} pages/s < baseline "
+                f"{base['pages_per_s']} -{tolerance:.0%}"
+            )
+        if res["accuracy"] < base["accuracy"]:
+            failures.append(
+                f"{name}: accuracy {res['accuracy']:.0%} < baseline {base['accuracy']:.0%}"
+            )
+    return failures, slower
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Offline parser benchmarks")
+    ap.add_argument("--only", nargs="*", help="parser names to run")
+    ap.add_argument("--min-time", type=float, default=1.0, help="seconds per round")
+    ap.add_argument("--rounds", type=int, default=3, help="timed rounds, best counts")
+    ap.add_argument("--tolerance", type=float, default=0.3, help="slowdown to report")
+    ap.add_argument(
+        "--fail-on-slowdown", type=float, metavar="RATIO",
+        help="also fail when pages/s drops below RATIO x baseline (same machine only)",
+    )
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("-v", "--verbose", action="store_true", help="list failing fixtures")
+    args = ap.parse_args()
+
+    results = {}
+    print(
+        f"{'parser':<22}{'pages':>6}{'pages/s':>10}{'MB/s':>8}{'peak MB':>9}"
+        f"{'kept blk':>9}{'kept KB':>9}{'accuracy':>10}"
+    )
+    for case in PARSERS:
+        if args.only and case.name not in args.only:
+            continue
+        res = bench_parser(case, args.min_time, args.rounds, args.verbose)
+        if res is None:
+            continue
+        results[case.name] = res
+        print(
+            f"{case.name:<22}{res['pages']:>6}{res['pages_per_s']:>10.1f}"
+            f"{res['mb_per_s']:>8.2f}{res['peak_mb']:>9.2f}"
+            f"{res['kept_blocks']:>9}{res['kept_kb']:>9.1f}{res['accuracy']:>10.0%}"
+        )
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE):
+            with open(BASELINE) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE}")
+        return 0
+
+    if not os.path.exists(BASELINE):
+        print("No baseline yet; run with --update-baseline")
+        return 0
+    with open(BASELINE) as f:
+        failures, slower = compare(
+            results, json.load(f), args.tolerance, args.fail_on_slowdown
+        )
+    for line in slower:
+        print(f"slower (advisory) {line}")
+    for line in failures:
+        print(f"REGRESSION {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
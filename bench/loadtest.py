@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Drive a real poller end to end against price_tracker/fake_origin.py.
+
+The poller's module is loaded as-is; only its upstream URLs, Telegram
+host and pacing constants are rewritten, with every interval divided by
+--rate so a laptop can run it at 10x-100x production load. Each run
+gets a scratch working directory (state, seen files, logs) and is
+stopped after --duration seconds; the report compares how many polls or
+checks the poller managed against what the rate asked for, and lists
+what the fake origin served per route.
+
+    python3 bench/loadtest.py camel --rate 10 100 --duration 30
+    python3 bench/loadtest.py slickdeals --rate 100 --latency 0.3 --p503 0.05
+    python3 bench/loadtest.py amazon --items 300 --rate 50 --pcaptcha 0.1
+"""
+
+import _thread
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from bench_parsers import ROOT
+from script_loader import load_module
+
+sys.path.insert(0, os.path.join(ROOT, "price_tracker"))
+import fake_origin  # noqa: E402
+
+
+# ---------- Per-poller wiring ----------
+# Each setup patches the freshly loaded module and returns
+# (run, main route in the fake origin's stats, requests/s the rate asks for).
+
+def setup_camel(mod, base: str, rate: float, args) -> Tuple[Callable, str, float]:
+    const = mod.const
+    const.URL = f"{base}/top_drops"
+    const.PRODUCT_URL_BASE = f"{base}/product"
+    const.TELEGRAM_API_BASE = base
+    const.POLL_INTERVAL = const.POLL_INTERVAL / rate
+    const.METRICS_PORT = 0
+    return mod.main, "camel", 1 / const.POLL_INTERVAL
+
+
+def setup_slickdeals(mod, base: str, rate: float, args) -> Tuple[Callable, str, float]:
+    const = mod.const
+    const.SD_RSS_URLS = [
+        f"{base}/newsearch.php?{url.split('?', 1)[1]}" for url in const.SD_RSS_URLS
+    ]
+    const.TELEGRAM_API_BASE = base
+    const.POLLINTERVAL = const.POLLINTERVAL / rate
+    const.METRICS_PORT = 0
+    # send_sd_alerts iterates SD_CHATIDS, which constants.py does not define yet
+    if not hasattr(const, "SD_CHATIDS"):
+        const.SD_CHATIDS = [const.SD_CHATID]
+    return mod.main, "slickdeals", len(const.SD_RSS_URLS) / const.POLLINTERVAL
+
+
+def setup_amazon(mod, base: str, rate: float, args) -> Tuple[Callable, str, float]:
+    with open(mod.WATCHLIST_FILE, "w") as f:
+        for n in range(args.items):
+            f.write(fake_origin.fake_asin(n) + "\n")
+    mod.AMAZON_BASE = base
+    mod.TELEGRAM_API_BASE = base
+    mod.POLL_INTERVAL /= rate
+    mod.MIN_CHECK_INTERVAL /= rate
+    mod.SUMMARY_INTERVAL /= rate
+    mod.WORKER_MIN_GAP /= rate
+    mod.CHECK_DELAY = tuple(d / rate for d in mod.CHECK_DELAY)
+    mod.set_fetch_proxy(None, rate=mod.EGRESS_RATE * rate)
+    mod.METRICS_PORT = 0
+    mod.BATCH_SOURCES = [f"{base}/s?k=fake&page={p}" for p in range(1, args.batch_pages + 1)]
+    mod.BATCH_SOURCE_INTERVAL /= rate
+    mod.BATCH_MAX_STALE /= rate
+    mod.TIERED_CHECKS = args.tiered
+    mod.CAMEL_PRODUCT_BASE = f"{base}/product"
+    mod.TIER_MAX_STALE /= rate
+    mod.OFFERS_SOURCE = args.offers_source or mod.OFFERS_SOURCE
+    gap = max(mod.WORKER_MIN_GAP / len(mod.EGRESS), mod.POLL_INTERVAL / args.items)
+    # Two requests per check: offers page + product page (plus any all-offers
+    # pages past the first)
+    return lambda: asyncio.run(mod.main()), "amazon", 2 / gap
+
+
+POLLERS: Dict[str, Tuple[str, Callable]] = {
+    "camel": (os.path.join("camel3", "camel_curl_poller.py"), setup_camel),
+    "slickdeals": (os.path.join("slickdeals", "sd_curl_poller.py"), setup_slickdeals),
+    "amazon": (os.path.join("price_tracker", "amazon_price_tracker.py"), setup_amazon),
+}
+
+
+# ---------- Running ----------
+
+def run_once(poller: str, rate: float, server, args) -> None:
+    path, setup = POLLERS[poller]
+    base = fake_origin.base_url(server)
+    workdir = tempfile.mkdtemp(prefix=f"load_{poller}_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        mod = load_module(os.path.join(ROOT, path), f"load_{poller}")
+        # The amazon parse pool pickles parser functions by module name
+        sys.modules[mod.__name__] = mod
+        run, route, wanted = setup(mod, base, rate, args)
+
+        before = server.snapshot()
+        timer = threading.Timer(args.duration, _thread.interrupt_main)
+        start = time.perf_counter()
+        timer.start()
+        try:
+            with open("poller.out", "w") as out, contextlib.redirect_stdout(out):
+                run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            timer.cancel()
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+
+    after = server.snapshot()
+    served = {k: v - before.get(k, 0) for k, v in after.items() if v != before.get(k, 0)}
+    got = sum(v for k, v in served.items() if k.startswith(route + " "))
+    if poller == "amazon":
+        got += sum(v for k, v in served.items() if k.startswith(("injected_", "amazon_list ")))
+    print(
+        f"\n{poller} x{rate:g}: {got / elapsed:7.2f} {route} req/s "
+        f"(asked {wanted:.2f}/s, {got / elapsed / wanted:.0%}) over {elapsed:.1f}s"
+    )
+    for key in sorted(served):
+        print(f"  {key:<28}{served[key]:>7}{served[key] / elapsed:>9.2f}/s")
+    if poller == "amazon" and (args.family_size or args.batch_pages or args.tiered):
+        checked = sum(mod.ITEMS_CHECKED._values.values())
+        from_family = mod.FAMILY_VARIANTS._values.get(("priced",), 0)
+        from_lists = mod.BATCH_ITEMS._values.get(("refreshed",), 0)
+        from_camel = mod.TIER_CHECKS._values.get(("unchanged",), 0)
+        print(
+            f"  {checked} checks: {from_family} priced from a sibling's page, "
+            f"{from_lists} from search pages, {from_camel} from camelcamelcamel "
+            f"({got / checked if checked else 0:.2f} Amazon requests/check)"
+        )
+    if poller == "amazon" and mod.OFFERS_SOURCE == "aod":
+        _, pages, fetches = mod.AOD_PAGES._values.get((), (None, 0, 0))
+        rows = sum(mod.AOD_OFFERS._values.values())
+        print(
+            f"  all-offers: {fetches} checks read {pages:g} pages, "
+            f"{pages / fetches if fetches else 0:.2f} pages and "
+            f"{rows / fetches if fetches else 0:.1f} offers per check"
+        )
+    print(f"  output and state in {workdir}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="End-to-end poller load test")
+    ap.add_argument("poller", choices=sorted(POLLERS))
+    ap.add_argument("--rate", type=float, nargs="+", default=[10], help="x production rate")
+    ap.add_argument("--duration", type=float, default=30, help="seconds per rate")
+    ap.add_argument("--items", type=int, default=200, help="amazon watchlist size")
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--jitter", type=float, default=0.05)
+    ap.add_argument("--p503", type=float, default=0.0)
+    ap.add_argument("--pcaptcha", type=float, default=0.0)
+    ap.add_argument("--cassettes", help="serve these recordings before generated pages")
+    ap.add_argument("--family-size", type=int, default=0,
+                    help="amazon: variation families of this size (fewer requests wanted)")
+    ap.add_argument("--batch-pages", type=int, default=0,
+                    help="amazon: refresh prices from this many search result pages")
+    ap.add_argument("--tiered", action="store_true",
+                    help="amazon: check camelcamelcamel first (TIERED_CHECKS)")
+    ap.add_argument("--offers-source", choices=["aod", "offer-listing"],
+                    help="amazon: override OFFERS_SOURCE")
+    args = ap.parse_args()
+
+    server = fake_origin.serve(
+        latency=args.latency, jitter=args.jitter, p503=args.p503,
+        pcaptcha=args.pcaptcha, cassette_dir=args.cassettes,
+        family_size=args.family_size,
+    )
+    print(f"Fake origin on {fake_origin.base_url(server)}")
+    try:
+        for rate in args.rate:
+            run_once(args.poller, rate, server, args)
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,16 +3,77 @@ import re
 import time
 import os
 import subprocess
-import json
+import sys
+from dataclasses import dataclass
+from typing import Optional
 from datetime import datetime, timedelta
 from collections import OrderedDict
 
+# metrics.py and profiler.py are shared by the pollers and live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import constants as const
 import requests
 from bs4 import BeautifulSoup
+from metrics import counter, histogram, start_metrics_server
+from poll_trace import PollTrace, SlowPolls, maybe_span
+from price_state import PriceState
+from profiler import install_profiling_hooks
 
 TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+FETCH_SECONDS = histogram("camel_fetch_seconds", "HTTP fetch latency", ["host"])
+HTTP_RESPONSES = counter(
+    "camel_http_responses_total", "HTTP responses by status code", ["host", "code"]
+)
+FETCH_ERRORS = counter("camel_fetch_errors_total", "Failed fetches", ["host"])
+SHORT_PAGES = counter(
+    "camel_short_html_total", "top_drops responses too short to parse (blocks)"
+)
+PARSE_SECONDS = histogram(
+    "camel_parse_seconds", "parse_deals duration incl. product-page enrichment"
+)
+DEALS = counter("camel_deals_total", "Deals parsed / new", ["kind"])
+ALERTS = counter("camel_alerts_total", "Telegram messages", ["result"])
+STAGE_SECONDS = histogram("camel_stage_seconds", "Main-loop stage duration", ["stage"])
+POLL_SECONDS = histogram("camel_poll_seconds", "Whole poll duration (excl. sleep)")
+SLOW_POLLS = counter("camel_slow_polls_total", "Polls that overran POLL_INTERVAL")
+
+
+# ---------- Deal records ----------
+
+@dataclass(slots=True)
+class Deal:
+    """One top_drops entry with its prices already numeric."""
+
+    asin: str
+    name: str
+    old_price: Optional[float]
+    new_price: Optional[float]
+    pct: float  # size of the drop in percent, 0 when the page had none
+    pct_text: str  # as shown on the page, "?" when missing
+
+    @property
+    def amazon_url(self) -> str:
+        return f"https://www.amazon.com/dp/{self.asin}"
+
+    @property
+    def pricechange(self) -> str:
+        return f"{format_price(self.old_price)} → {format_price(self.new_price)} ({self.pct_text})"
+
+
+def to_price(text: Optional[str]) -> Optional[float]:
+    """"1,234.56" -> 1234.56; None stays None."""
+    return float(text.replace(",", "")) if text else None
+
+
+def format_price(price: Optional[float]) -> str:
+    return f"{price:,.2f}" if price is not None else "?"
+
+
+def pct_value(text: str) -> float:
+    m = re.search(r"(\d+(?:\.\d+)?)", text.replace("%", ""))
+    return float(m.group(1)) if m else 0.0
+
 
 def is_valid_asin(asin: str) -> bool:
     return bool(re.fullmatch(r'[A-Z][A-Z0-9]{9}', asin))
@@ -29,14 +90,20 @@ def get_html() -> str:
         const.URL,
     ]
     try:
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
+        with FETCH_SECONDS.time(host="camelcamelcamel.com"):
+            result = subprocess.run(cmd, capture_output=True, timeout=30)
         return result.stdout.decode(errors="ignore")
     except Exception:
+        FETCH_ERRORS.inc(host="camelcamelcamel.com")
         return ""
 
 
-def parse_deals(html: str):
-    """Parse ALL deals from the top_drops page, with improved name/price parsing."""
+def parse_deals(html: str, trace: Optional[PollTrace] = None, enrich: bool = True) -> list[Deal]:
+    """Parse ALL deals from the top_drops page, with improved name/price parsing.
+
+    enrich=False skips the per-ASIN camelcamelcamel product-page fetch
+    (offline benchmarks, replays).
+    """
     deals = []
     unique_asins = OrderedDict()
 
@@ -77,56 +144,50 @@ def parse_deals(html: str):
         new_match = re.search(
             r"(?:now|current|lowest)[:\s]*\$?([0-9,]+\.\d{2})", snippet
         )
-        old_price = old_match.group(1) if old_match else "?"
-        new_price = new_match.group(1) if new_match else "?"
+        old_price = to_price(old_match.group(1)) if old_match else None
+        new_price = to_price(new_match.group(1)) if new_match else None
 
         pct = pcts[idx] if idx < len(pcts) and pcts[idx] else "?"
-        price_change = f"{old_price} → {new_price} ({pct})"
 
         # Best-effort enhancement from camelcamelcamel product page
-        try:
-            prod_url = f"https://camelcamelcamel.com/product/{asin}"
-            r = requests.get(
-                prod_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10
-            )
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            title_tag = soup.find("h1") or soup.find("title")
-            if title_tag:
-                cleaned = title_tag.get_text().strip()
-                # Often titles are "Name – CamelCamelCamel" etc.
-                name = cleaned.split(" - ")[0].split(" – ")[0][:120]
-
-            page_text = soup.get_text()
-            page_prices = re.findall(r"[0-9,]+\.\d{2}", page_text)[:2]
-            if len(page_prices) == 2:
-                price_change = f"{page_prices[0]} → {page_prices[1]} ({pct})"
-        except Exception:
-            pass
-
-        amazon_url = f"https://www.amazon.com/dp/{asin}"
-        deals.append(
-            {
-                "asin": asin,
-                "name": name,
-                "pct": pct,
-                "pricechange": price_change,
-                "amazon_url": amazon_url,
-            }
-        )
+        if enrich:
+            try:
+                prod_url = f"{const.PRODUCT_URL_BASE}/{asin}"
+                try:
+                    with FETCH_SECONDS.time(host="camelcamelcamel.com/product"), \
+                            maybe_span(trace, "enrich_fetch", asin):
+                        r = requests.get(
+                            prod_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10
+                        )
+                except Exception:
+                    FETCH_ERRORS.inc(host="camelcamelcamel.com/product")
+                    raise
+                HTTP_RESPONSES.inc(host="camelcamelcamel.com/product", code=str(r.status_code))
+                with maybe_span(trace, "enrich_parse"):
+                    soup = BeautifulSoup(r.text, "html.parser")
+
+                    title_tag = soup.find("h1") or soup.find("title")
+                    if title_tag:
+                        cleaned = title_tag.get_text().strip()
+                        # Often titles are "Name – CamelCamelCamel" etc.
+                        name = cleaned.split(" - ")[0].split(" – ")[0][:120]
+
+                    page_text = soup.get_text()
+                    page_prices = re.findall(r"[0-9,]+\.\d{2}", page_text)[:2]
+                    if len(page_prices) == 2:
+                        old_price, new_price = map(to_price, page_prices)
+            except Exception:
+                pass
+
+        deals.append(Deal(asin, name, old_price, new_price, pct_value(pct), pct))
 
     print(f"Parsed {len(deals)} deals")
     return deals
 
-def is_critical(deal):
-    pct_str = deal['pct']
-    # pct_match = re.search(r'(\d+)', pct_str)
-    # pct = float(pct_match.group(1)) if pct_match else 0
-    pct_match = re.search(r'(\d+(?:\.\d+)?)', pct_str.replace('%', ''))
-    pct = float(pct_match.group(1)) if pct_match else 0
-    name_lower = deal['name'].lower()
-    # return pct >= const.MIN_DROP_PCT and any(kw.lower() in name_lower for kw in const.KEYWORDS)
-    has_drop = pct >= const.MIN_DROP_PCT
+def is_critical(deal: Deal):
+    name_lower = deal.name.lower()
+    # return deal.pct >= const.MIN_DROP_PCT and any(kw.lower() in name_lower for kw in const.KEYWORDS)
+    has_drop = deal.pct >= const.MIN_DROP_PCT
     has_keyword = any(kw.lower() in name_lower for kw in const.KEYWORDS)
     return has_drop or has_keyword
 
@@ -197,9 +258,9 @@ def append_new_records(newdeals):
         for deal in newdeals:
             timestamp = datetime.now().strftime(TIME_FORMAT)
             details = (
-                f"{deal['name']} | {deal['pricechange']} | {deal['pct']} | {timestamp}"
+                f"{deal.name} | {deal.pricechange} | {deal.pct_text} | {timestamp}"
             )
-            f.write(f"{deal['amazon_url']}\n")
+            f.write(f"{deal.amazon_url}\n")
             f.write(details + "\n")
             f.write("---\n")
 
@@ -211,43 +272,28 @@ def save_all_deals(deals):
     with open(const.TOP_FILE, "w") as f:
         for d in deals:
             f.write(
-                f"{d['amazon_url']} | {d['name']} | {d['pricechange']} | {d['pct']}\n"
+                f"{d.amazon_url} | {d.name} | {d.pricechange} | {d.pct_text}\n"
             )
     print(f"Saved {len(deals)} deals to {const.TOP_FILE}")
 
 
-def load_price_state():
-    if os.path.exists(const.STATE_FILE):
-        try:
-            with open(const.STATE_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
-
-
-def save_price_state(state: dict):
-    with open(const.STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
-
-
 def new_deals(seen, deals):
     """Return only deals whose URL is not in the seen set."""
-    return [d for d in deals if d["amazon_url"] not in seen]
+    return [d for d in deals if d.amazon_url not in seen]
 
 
 def print_deals(deals, newdeals_list):
-    new_urls = {nd["amazon_url"] for nd in newdeals_list}
+    new_urls = {nd.amazon_url for nd in newdeals_list}
     print("=== TOP DROPS ===")
     for i, d in enumerate(deals, 1):
-        marker = "🔥 CRITICAL!" if is_critical(d) else ("NEW!" if d['amazon_url'] in new_urls else " ")
-        print(f"{i:2d}. {d['name'][:60]:<60} {d['pricechange']:>25} {marker}")
-        print(f"     🔗 {d['amazon_url']}")
+        marker = "🔥 CRITICAL!" if is_critical(d) else ("NEW!" if d.amazon_url in new_urls else " ")
+        print(f"{i:2d}. {d.name[:60]:<60} {d.pricechange:>25} {marker}")
+        print(f"     🔗 {d.amazon_url}")
     if newdeals_list:
         print(f"\n🚨 {len(newdeals_list)} NEW DEALS!")
 
 def notify_new(newdeals):
-    api_url = f"https://api.telegram.org/bot{const.CC_BOT_TOKEN}/sendMessage"
+    api_url = f"{const.TELEGRAM_API_BASE}/bot{const.CC_BOT_TOKEN}/sendMessage"
     critical = [d for d in newdeals if is_critical(d)]
     regular = [d for d in newdeals if not is_critical(d)]
     
@@ -255,8 +301,7 @@ def notify_new(newdeals):
         drop_pct = const.MIN_DROP_PCT
         text = "*🔥 CRITICAL DEALS (>{drop_pct} percent drop OR keywords):*\n\n"
         for d in critical:
-            text += f"*{d['name']}*\n{d['pricechange']} ({d['pct']})\n{d['amazon_url']}\n\n"
-            # text += f"*{d['name']}*\n{d['pricechange']} ({d['pct']})\n{d['amazon_url']}\n\n"
+            text += f"*{d.name}*\n{d.pricechange} ({d.pct_text})\n{d.amazon_url}\n\n"
             # Add: text = text.replace('\\', '\\\\').replace('_', '\\_') before requests.post
 
         try:
@@ -267,13 +312,15 @@ def notify_new(newdeals):
                 'parse_mode': 'Markdown', 
                 'disable_web_page_preview': True
             }, timeout=10)
+            ALERTS.inc(result="sent")
             print(f"Sent {len(critical)} CRITICAL alerts")
         except Exception as e:
+            ALERTS.inc(result="failed")
             print(f"Telegram CRITICAL fail: {e}")
     
     if regular:
         for deal in regular:
-            text = f"{deal['name']}\n{deal['pricechange']} ({deal['pct']})\n{deal['amazon_url']}"
+            text = f"{deal.name}\n{deal.pricechange} ({deal.pct_text})\n{deal.amazon_url}"
             try:
                 text = text.replace('_', '\\_').replace('[', '\\[')[:4000]
                 requests.post(api_url, data={
@@ -282,55 +329,90 @@ def notify_new(newdeals):
                     'parse_mode': 'Markdown', 
                     'disable_web_page_preview': True
                 }, timeout=10)
+                ALERTS.inc(result="sent")
                 time.sleep(0.5)
             except Exception as e:
+                ALERTS.inc(result="failed")
                 print(f"Telegram regular fail: {e}")
 
 
 
+def report_poll(trace: PollTrace, slow: SlowPolls) -> None:
+    total = trace.finish()
+    POLL_SECONDS.observe(total)
+    for stage, secs in trace.stages.items():
+        STAGE_SECONDS.observe(secs, stage=stage)
+    slow.add(trace)
+    if total > const.POLL_INTERVAL:
+        SLOW_POLLS.inc()
+        print(
+            f"⚠️ Slow poll {total:.1f}s > POLL_INTERVAL {const.POLL_INTERVAL}s: "
+            f"{trace.breakdown()}"
+        )
+
+
 def main():
     print("=== CamelCamelCamel Top Drops Tracker (ALL deals + daily purge) ===")
 
     # Load & purge seen URLs older than 24h
     seen = load_seen_urls(max_age_hours=24)
+    start_metrics_server(const.METRICS_PORT)
+    install_profiling_hooks(const.PROFILE_DIR, const.PROFILE_SECONDS)
+    slow = SlowPolls(size=const.SLOW_POLLS_KEPT, path=const.SLOW_POLLS_FILE)
+    state = PriceState(
+        const.STATE_FILE,
+        flush_interval=const.STATE_FLUSH_INTERVAL,
+        flush_dirty=const.STATE_FLUSH_DIRTY,
+        retention_days=const.STATE_RETENTION_DAYS,
+        max_entries=const.STATE_MAX_ENTRIES,
+    ).start()
+    print(f"Loaded price state for {len(state)} ASINs")
+    try:
+        poll_loop(seen, slow, state)
+    finally:
+        state.close()
 
+
+def poll_loop(seen, slow: SlowPolls, state: PriceState):
     while True:
-        html = get_html()
+        trace = PollTrace()
+        with trace.span("get_html"):
+            html = get_html()
         if len(html) < 5000:
+            SHORT_PAGES.inc()
             print("Short HTML, retrying...")
             time.sleep(const.POLL_INTERVAL)
             continue
 
-        deals = parse_deals(html)
-        newdeals_list = new_deals(seen, deals)
-        print_deals(deals, newdeals_list)
-
-        # Update price state for all parsed deals
-        state = load_price_state()
-        for d in deals:
-            asin = d["asin"]
-            new_p_match = re.search(
-                r"→\s*\$?([0-9,]+\.\d{2})", d["pricechange"]
-            )
-            if new_p_match:
-                new_p = float(new_p_match.group(1).replace(",", ""))
-                state[asin] = {
-                    "name": d["name"],
-                    "last_price": new_p,
-                    "last_seen": datetime.now().isoformat(),
-                }
-        save_price_state(state)
+        with PARSE_SECONDS.time(), trace.span("parse_deals"):
+            deals = parse_deals(html, trace)
+        with trace.span("new_deals"):
+            newdeals_list = new_deals(seen, deals)
+        DEALS.inc(len(deals), kind="parsed")
+        DEALS.inc(len(newdeals_list), kind="new")
+        with trace.span("print_deals"):
+            print_deals(deals, newdeals_list)
+
+        # Update price state for all parsed deals (flushed in the background)
+        with trace.span("state_update"):
+            for d in deals:
+                if d.new_price is not None:
+                    state.update(d.asin, d.name, d.new_price)
 
         if newdeals_list:
             print("🚨 SENDING ALERTS!")
-            notify_new(newdeals_list)
-            append_new_records(newdeals_list)
+            with trace.span("notify_new"):
+                notify_new(newdeals_list)
+            with trace.span("append_new_records"):
+                append_new_records(newdeals_list)
             for deal in newdeals_list:
-                seen.add(deal["amazon_url"])
+                seen.add(deal.amazon_url)
         else:
             print("No new deals.")
 
-        save_all_deals(deals)
+        with trace.span("save_all_deals"):
+            save_all_deals(deals)
+        report_poll(trace, slow)
         print(
             f"Next poll in {const.POLL_INTERVAL}s... "
             f"{datetime.now().strftime('%H:%M:%S')}"
@@ -12,3 +12,14 @@ WATCHLIST_FILE = "pt_watchlist.txt"
 STATE_FILE = "pt_prices.json"
 MIN_DROP_PCT = 30.0
 KEYWORDS = ['laptop', 'ssd', 'apple', 'monitor', 'tablet', 'phone', 'pixel']
+METRICS_PORT = 9120  # 0 disables
+SLOW_POLLS_FILE = "slow_polls.json"
+SLOW_POLLS_KEPT = 10
+PROFILE_DIR = "profiles"
+PROFILE_SECONDS = 30
+PRODUCT_URL_BASE = "https://camelcamelcamel.com/product"
+TELEGRAM_API_BASE = "https://api.telegram.org"  # fake_origin.py serves a stub for load tests
+STATE_FLUSH_INTERVAL = 60  # seconds between write-behind flushes of STATE_FILE
+STATE_FLUSH_DIRTY = 500  # flush early once this many ASINs changed
+STATE_RETENTION_DAYS = 30  # drop ASINs not seen on top_drops for this long
+STATE_MAX_ENTRIES = 5000  # ...and the least recently seen beyond this many
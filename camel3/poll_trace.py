@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import heapq
+import itertools
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple
+
+
+class PollTrace:
+    """Wall-clock spans for one poll of the main loop.
+
+    Stage spans (get_html, parse_deals, ...) are summed by name; embedded
+    enrichment fetches are also kept individually so a slow poll can be
+    pinned to the ASIN whose product page dragged.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.fetches: List[Tuple[str, float]] = []
+        self.total: Optional[float] = None
+
+    @contextmanager
+    def span(self, name: str, asin: Optional[str] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            if asin is not None:
+                self.fetches.append((asin, elapsed))
+
+    def finish(self) -> float:
+        self.total = time.perf_counter() - self._t0
+        return self.total
+
+    def breakdown(self) -> str:
+        parts = [f"{name} {secs:.1f}s" for name, secs in self.stages.items()]
+        if self.fetches:
+            asin, slowest = max(self.fetches, key=lambda f: f[1])
+            parts.append(
+                f"({len(self.fetches)} enrich fetches, slowest {asin} {slowest:.1f}s)"
+            )
+        return ", ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "total": round(self.total or 0.0, 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            "slowest_fetches": [
+                [asin, round(secs, 3)]
+                for asin, secs in sorted(self.fetches, key=lambda f: -f[1])[:5]
+            ],
+        }
+
+
+class SlowPolls:
+    """Keep the `size` slowest polls seen so far (min-heap on total time)."""
+
+    def __init__(self, size: int = 10, path: Optional[str] = None):
+        self.size = size
+        self.path = path
+        self._heap: List[Tuple[float, int, PollTrace]] = []
+        self._seq = itertools.count()
+
+    def add(self, trace: PollTrace) -> bool:
+        """Record a finished poll; return True if it made the slowest list."""
+        entry = (trace.total or 0.0, next(self._seq), trace)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+        else:
+            return False
+        if self.path:
+            self.dump(self.path)
+        return True
+
+    def slowest(self) -> List[PollTrace]:
+        return [t for _, _, t in sorted(self._heap, key=lambda e: -e[0])]
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump([t.to_dict() for t in self.slowest()], f, indent=2)
+
+
+def maybe_span(trace: Optional[PollTrace], name: str, asin: Optional[str] = None):
+    """trace.span(...) when tracing, a no-op context otherwise."""
+    return trace.span(name, asin) if trace is not None else nullcontext()
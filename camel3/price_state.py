@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Write-behind price state for the top_drops poller (pt_prices.json).
+
+The poller updates entries in memory; a background thread writes them
+out. A flush appends only the entries changed since the last one to a
+journal (<state>.journal, one JSON object per line), so its cost follows
+the poll, not the size of the state. Once the journal outgrows the
+snapshot it is compacted: the whole state goes to <state> via a temp
+file and os.replace, then the journal is truncated. Loading reads the
+snapshot and replays the journal; a torn last line from a crash is
+skipped. A crash mid-compaction can leave the old journal next to the
+new snapshot, so replay never lets a record older than what it already
+has win: an entry applies only if its last_seen is not older, and a
+deletion (which carries the last_seen of the entry it dropped) only
+removes an entry seen no later than that.
+
+Entries are kept in last_seen order: an update moves its ASIN to the
+end, and the front is evicted once there are more than `max_entries` or
+it is older than `retention_days`. Each update costs O(1), and memory,
+snapshot size and flush size stay bounded however long the poller runs.
+
+    python3 price_state.py [pt_prices.json]   # size/memory report
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+# metrics.py and profiler.py are shared by the pollers and live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics import counter, gauge, histogram
+
+FLUSH_SECONDS = histogram("camel_state_flush_seconds", "Price state flush latency", ["kind"])
+EVICTED = counter("camel_state_evicted_total", "ASINs dropped from the price state", ["reason"])
+ENTRIES = gauge("camel_state_entries", "ASINs in the price state")
+
+MIN_COMPACT_LINES = 1000  # don't compact tiny journals
+
+
+class PriceState:
+    """ASIN -> {"name", "last_price", "last_seen"} with background flushing.
+
+    flush_interval: seconds between flushes while there are changes.
+    flush_dirty: flush early once this many entries are waiting.
+    max_entries / retention_days: LRU bounds on the ASINs kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 60,
+        flush_dirty: int = 500,
+        retention_days: float = 30,
+        max_entries: int = 5000,
+    ) -> None:
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.flush_interval = flush_interval
+        self.flush_dirty = flush_dirty
+        self.retention = timedelta(days=retention_days)
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._dirty: Dict[str, dict] = {}  # ASIN -> journal record
+        self._journal_lines = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+        ENTRIES.set(len(self.entries))
+
+    # ---------- Loading ----------
+
+    def _load(self) -> None:
+        entries: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    entries = json.load(f)
+            except Exception as e:
+                print(f"State snapshot unreadable, starting empty: {e}")
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # torn write at the tail
+                    self._journal_lines += 1
+                    seen = entries.get(rec["asin"], {}).get("last_seen", "")
+                    if rec.get("deleted"):
+                        # Records from before deletions carried last_seen drop unconditionally
+                        if rec["asin"] in entries and seen <= rec.get("last_seen", seen):
+                            del entries[rec["asin"]]
+                    elif rec["entry"].get("last_seen", "") >= seen:
+                        entries[rec["asin"]] = rec["entry"]
+        # Snapshots are written in LRU order already; sorting also covers
+        # old unbounded files and the journal's interleaving
+        self.entries = OrderedDict(
+            sorted(entries.items(), key=lambda kv: kv[1].get("last_seen", ""))
+        )
+        self._evict()
+
+    # ---------- Updating ----------
+
+    def update(self, asin: str, name: str, price: float) -> None:
+        entry = {
+            "name": name,
+            "last_price": price,
+            "last_seen": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self.entries[asin] = entry
+            self.entries.move_to_end(asin)
+            self._dirty[asin] = {"entry": entry}
+            self._evict()
+            ENTRIES.set(len(self.entries))
+            pending = len(self._dirty)
+        if pending >= self.flush_dirty:
+            self._wake.set()
+
+    def get(self, asin: str) -> Optional[dict]:
+        return self.entries.get(asin)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _evict(self) -> None:
+        """Drop least recently seen ASINs past the size or age bound (lock held).
+
+        Only the front of the LRU order is looked at, so this is O(1) per
+        entry evicted and per call.
+        """
+        cutoff = (datetime.now() - self.retention).isoformat()
+        while self.entries:
+            asin, entry = next(iter(self.entries.items()))
+            if len(self.entries) > self.max_entries:
+                EVICTED.inc(reason="size")
+            elif entry.get("last_seen", "") < cutoff:
+                EVICTED.inc(reason="age")
+            else:
+                break
+            self.entries.popitem(last=False)
+            self._dirty[asin] = {"deleted": True, "last_seen": entry.get("last_seen", "")}
+
+    def report(self) -> dict:
+        """Entry count, age span, on-disk bytes and approximate memory."""
+        with self._lock:
+            entries = list(self.entries.items())
+        memory = sys.getsizeof(self.entries) + sum(
+            sys.getsizeof(asin) + sys.getsizeof(e) + sum(sys.getsizeof(v) for v in e.values())
+            for asin, e in entries
+        )
+
+        def size(path: str) -> int:
+            return os.path.getsize(path) if os.path.exists(path) else 0
+
+        return {
+            "entries": len(entries),
+            "max_entries": self.max_entries,
+            "oldest": entries[0][1].get("last_seen") if entries else None,
+            "newest": entries[-1][1].get("last_seen") if entries else None,
+            "snapshot_bytes": size(self.path),
+            "journal_bytes": size(self.journal_path),
+            "memory_bytes": memory,
+        }
+
+    # ---------- Flushing ----------
+
+    def flush(self, compact: bool = False) -> int:
+        """Append pending changes to the journal, compacting when it has grown
+        past the snapshot (or `compact`); returns entries written.
+
+        Only the swap of the pending set and the serialisation hold the lock
+        update() takes; file I/O happens outside it.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._evict()
+                ENTRIES.set(len(self.entries))
+                dirty, self._dirty = self._dirty, {}
+                lines = "".join(
+                    json.dumps({"asin": a, **rec}) + "\n" for a, rec in dirty.items()
+                )
+                snapshot = None
+                if compact or self._journal_lines + len(dirty) > max(
+                    MIN_COMPACT_LINES, len(self.entries)
+                ):
+                    snapshot = json.dumps(self.entries, indent=2)
+            try:
+                if snapshot is not None:
+                    self._write_snapshot(snapshot)
+                elif lines:
+                    with FLUSH_SECONDS.time(kind="journal"):
+                        with open(self.journal_path, "a") as f:
+                            f.write(lines)
+                    self._journal_lines += len(dirty)
+            except OSError:
+                with self._lock:
+                    for asin, rec in dirty.items():
+                        self._dirty.setdefault(asin, rec)
+                raise
+        return len(dirty)
+
+    def _write_snapshot(self, data: str) -> None:
+        """Replace the snapshot atomically, then empty the journal."""
+        with FLUSH_SECONDS.time(kind="compact"):
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            open(self.journal_path, "w").close()
+        self._journal_lines = 0
+
+    def start(self) -> "PriceState":
+        """Flush in a daemon thread every flush_interval (or when flush_dirty is hit)."""
+        self._thread = threading.Thread(target=self._run, name="price-state", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"State flush failed: {e}")
+
+    def close(self) -> None:
+        """Stop the flusher and leave a compacted snapshot behind."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush(compact=True)
+
+
+if __name__ == "__main__":
+    import constants as const
+
+    state = PriceState(
+        sys.argv[1] if len(sys.argv) > 1 else const.STATE_FILE,
+        retention_days=const.STATE_RETENTION_DAYS,
+        max_entries=const.STATE_MAX_ENTRIES,
+    )
+    r = state.report()
+    print(f"{r['entries']} ASINs (max {r['max_entries']}), last seen {r['oldest']} .. {r['newest']}")
+    print(
+        f"snapshot {r['snapshot_bytes'] / 1024:.0f} KiB, journal {r['journal_bytes'] / 1024:.0f} KiB, "
+        f"~{r['memory_bytes'] / 1024:.0f} KiB in memory"
+    )
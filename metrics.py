@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Minimal Prometheus-style metrics: counters, gauges, histograms and a
+text endpoint on a local port. Stdlib only, safe to call from threads.
+
+    from metrics import counter, histogram, start_metrics_server
+    FETCHES = counter("fetch_total", "Fetches", ["host", "code"])
+    FETCHES.inc(host="www.amazon.com", code="200")
+    start_metrics_server(9108)   # curl localhost:9108/metrics
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+INF_LABEL = 'le="+Inf"'
+
+_lock = threading.Lock()
+_registry: Dict[str, "Metric"] = {}
+
+
+def _label_str(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# ---------- Metric types ----------
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn: Optional[Callable[[], float]] = None) -> None:
+        super().__init__(name, help, labels)
+        self._fn = fn
+
+    def set(self, value: float, **labels: str) -> None:
+        with _lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        if self._fn is not None:
+            try:
+                self.set(self._fn())
+            except Exception:
+                pass
+        return super().render()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with _lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            idx = bisect.bisect_left(self.buckets, value)
+            if idx < len(self.buckets):
+                entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            values = [(k, (list(v[0]), v[1], v[2])) for k, v in sorted(self._values.items())]
+        for key, (counts, total, n) in values:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                le = _label_str(self.labels, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, INF_LABEL)} {n}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {n}")
+        return lines
+
+
+# ---------- Registry ----------
+
+def _register(metric: Metric) -> Metric:
+    with _lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels: Sequence[str] = (), fn=None) -> Gauge:
+    return _register(Gauge(name, help, labels, fn))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labels, buckets))
+
+
+def render() -> str:
+    with _lock:
+        metrics = list(_registry.values())
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- HTTP endpoint ----------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics on a daemon thread; port 0 or None disables it."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
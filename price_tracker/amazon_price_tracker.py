@@ -2,29 +2,79 @@
 
 import random
 import asyncio
+import codecs
+import html as html_lib
 import json
+import math
 import os
 import re
+import signal
+import sys
 import time
+from collections import Counter
 from dataclasses import dataclass
-from typing import Optional, Dict, List
+from urllib.parse import urlsplit
+from typing import Optional, Dict, List, Set, Union
 from datetime import datetime, timedelta
 
 import requests
 from bs4 import BeautifulSoup
 from telegram import Bot
 
+# metrics.py and profiler.py are shared by the pollers and live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import (
     TELEGRAM_TOKEN,
     TELEGRAM_CHAT_ID,
     WATCHLIST_FILE,
     STATE_FILE,
+    STATE_FLUSH_INTERVAL,
     POLL_INTERVAL,
     VALID_SELLERS_FILE,
+    MIN_CHECK_INTERVAL,
+    MAX_CHECK_INTERVAL,
+    SUMMARY_INTERVAL,
+    RELOAD_CHECK_INTERVAL,
+    PARSE_MODE,
+    PARSE_WORKERS,
+    AMAZON_BASE,
+    CHECK_DELAY,
+    METRICS_PORT,
+    PROFILE_DIR,
+    PROFILE_SECONDS,
+    TELEGRAM_API_BASE,
+    WORKER_MIN_GAP,
+    LOG_FORMAT,
+    LOG_SAMPLE,
+    EGRESS_IDENTITIES,
+    PROXIES,
+    EGRESS_RATE,
+    EGRESS_BURST,
+    EGRESS_WAIT,
+    COOKIE_DIR,
+    SESSION_WARMUP,
+    PAGE_STORE_DIR,
+    PAGE_STORE_MAX_MB,
+    FAMILY_BATCHING,
+    BATCH_SOURCES,
+    BATCH_SOURCE_INTERVAL,
+    BATCH_MAX_STALE,
+    TIERED_CHECKS,
+    CAMEL_PRODUCT_BASE,
+    TIER_MAX_STALE,
+    OFFERS_SOURCE,
+    AOD_MAX_PAGES,
 )
+from scheduler import ItemScheduler, RollingWindow
+from reloader import FileWatcher
+from parse_pool import ParseStage
+from metrics import counter, gauge, histogram, start_metrics_server
+from profiler import install_profiling_hooks
+import http_replay
 
-import logging
-from logging.handlers import RotatingFileHandler
+from log_setup import setup_logging
+from egress import Identity, build_pool, identity_name
+from page_store import open_store
 
 # ---------- Data structures ----------
 
@@ -34,20 +84,110 @@ class WatchItem:
     url: str
 
 
+@dataclass
+class Page:
+    """A fetched page as the server sent it, with the charset to decode it by."""
+
+    body: bytes
+    encoding: str
+
+
+@dataclass
+class Offer:
+    """One row of the all-offers list; seller_id is None when not shown."""
+
+    seller: str
+    seller_id: Optional[str]
+    price: float
+    condition: str
+
+
 # ---------- Logging setup ----------
 
-log_handler = RotatingFileHandler(
-    "amazon_tracker.log",
-    maxBytes=10 * 1024 * 1024,
-    backupCount=5,
-    encoding="utf-8",
+logger = setup_logging("amazon_tracker.log", fmt=LOG_FORMAT, sample=LOG_SAMPLE)
+
+
+# ---------- Metrics ----------
+
+FETCH_SECONDS = histogram("tracker_fetch_seconds", "HTTP fetch latency", ["host"])
+HTTP_RESPONSES = counter(
+    "tracker_http_responses_total", "HTTP responses by status code", ["host", "code"]
 )
-log_handler.setFormatter(
-    logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+FETCH_ERRORS = counter(
+    "tracker_fetch_errors_total", "Fetches that raised (timeouts, resets)", ["host"]
+)
+CAPTCHAS = counter("tracker_captcha_total", "CAPTCHA/robot pages served", ["host"])
+ITEMS_CHECKED = counter(
+    "tracker_items_checked_total", "Completed item checks", ["outcome"]
+)
+ALERTS = counter("tracker_alerts_total", "Telegram messages", ["result"])
+EMBEDDED_PAGES = counter(
+    "tracker_embedded_pages_total",
+    "Product pages priced from embedded data (hit) or left to the DOM parser (miss)",
+    ["result"],
+)
+DP_PARSE_SECONDS = histogram(
+    "tracker_dp_parse_seconds", "Product page extraction time by path", ["path"]
+)
+EMBEDDED_SAVED = counter(
+    "tracker_embedded_saved_seconds_total",
+    "DOM parse time avoided by embedded-data hits (running DOM mean minus hit time)",
+)
+SELECTOR_WINS = counter(
+    "tracker_selector_wins_total",
+    "Accepted product page prices by CSS selector (0 = never wins)",
+    ["selector"],
+)
+SELECTOR_EVALUATIONS = histogram(
+    "tracker_selector_evaluations",
+    "Price selectors evaluated per product page DOM parse",
+    buckets=(1, 2, 3, 4, 6, 8, 11),
+)
+SELECTOR_HINTS = counter(
+    "tracker_selector_hints_total",
+    "Whether the URL's remembered winning selector won again",
+    ["result"],
+)
+FAMILY_VARIANTS = counter(
+    "tracker_family_variants_total",
+    "Watchlist variants found on a sibling's product page: priced from it "
+    "(no fetch of their own), or left to their own check",
+    ["result"],
+)
+BATCH_FETCHES = counter(
+    "tracker_batch_source_fetches_total", "Search/list page fetches", ["result"]
+)
+BATCH_ITEMS = counter(
+    "tracker_batch_source_items_total",
+    "Watchlist items seen on search/list pages: refreshed without a fetch, "
+    "made due to confirm a change or because Amazon wasn't checked for too long, "
+    "or left alone",
+    ["result"],
+)
+TIER_CHECKS = counter(
+    "tracker_tier_checks_total",
+    "Tiered checks by camelcamelcamel outcome (unchanged = Amazon not fetched)",
+    ["result"],
+)
+AOD_PAGES = histogram(
+    "tracker_aod_pages", "All-offers pages fetched per check", buckets=(1, 2, 3, 4, 5)
+)
+AOD_OFFERS = counter(
+    "tracker_aod_offers_total", "All-offers rows read, by whether the seller is valid", ["seller"]
+)
+SCHEDULER_ITEMS = gauge("tracker_scheduler_items", "Items in the scheduler")
+SCHEDULER_OVERDUE = gauge("tracker_scheduler_overdue", "Items past their next-due time")
+CHECKS_PER_MINUTE = gauge(
+    "tracker_items_checked_per_minute", "Checks per minute over the rolling summary window"
+)
+STATE_SAVE_SECONDS = histogram(
+    "tracker_state_save_seconds", "State file write latency"
+)
+STATE_FLUSH_CHANGES = histogram(
+    "tracker_state_flush_changes",
+    "Item checks and batch sources written by one state file write",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000),
 )
-
-logging.basicConfig(level=logging.INFO, handlers=[log_handler], force=True)
-logger = logging.getLogger("AmazonTracker")
 
 
 # ---------- Helpers: watchlist / state / sellers ----------
@@ -55,7 +195,7 @@ logger = logging.getLogger("AmazonTracker")
 def load_watchlist(path: str) -> List[WatchItem]:
     items: List[WatchItem] = []
     if not os.path.exists(path):
-        logger.info(f"{path} not found")
+        logger.info("%s not found", path, extra={"event": "watchlist_missing"})
         return items
 
     with open(path) as f:
@@ -69,13 +209,19 @@ def load_watchlist(path: str) -> List[WatchItem]:
             else:
                 asin = line
                 if not (asin.startswith("B") and len(asin) == 10):
-                    logger.info(f"Invalid ASIN on line {linenum}: {line}")
+                    logger.info(
+                        "Invalid ASIN on line %d: %s", linenum, line,
+                        extra={"event": "watchlist_invalid"},
+                    )
                     continue
-                url = f"https://www.amazon.com/dp/{asin}"
+                url = f"{AMAZON_BASE}/dp/{asin}"
 
             items.append(WatchItem(site="amazon", url=url))
 
-    logger.info(f"Loaded {len(items)} Amazon items")
+    logger.info(
+        "Loaded %d Amazon items", len(items),
+        extra={"event": "watchlist_loaded", "items": len(items)},
+    )
     return items
 
 
@@ -85,22 +231,65 @@ def load_state(path: str) -> Dict[str, float]:
             with open(path) as f:
                 return json.load(f)
         except Exception as e:
-            logger.info(f"Failed to load state {path}: {e}")
+            logger.info(
+                "Failed to load state %s: %s", path, e, extra={"event": "state_load_failed"}
+            )
     return {}
 
 
 def save_state(path: str, state: Dict[str, float]) -> None:
-    tmp = path + ".tmp"
-    with open(tmp, "w") as f:
-        json.dump(state, f, indent=2)
-    os.replace(tmp, path)
+    with STATE_SAVE_SECONDS.time():
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+
+
+class StateWriter:
+    """Write-behind for the state file.
+
+    Checks (and batch sources) mark their URL once they have changed the
+    state; the file is rewritten at most every `interval` seconds while
+    anything is marked, and once more by close() on the way out. A crash
+    loses at most `interval` seconds of results, which only costs those
+    items an early recheck.
+    """
+
+    def __init__(self, path: str, state: Dict[str, float], interval: float) -> None:
+        self.path = path
+        self.state = state
+        self.interval = interval
+        self._dirty: Set[str] = set()
+        self._next = time.time() + interval
+
+    def mark(self, url: str) -> None:
+        self._dirty.add(url)
+
+    def maybe_flush(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        if self._dirty and now >= self._next:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        if self._dirty:
+            save_state(self.path, self.state)
+            STATE_FLUSH_CHANGES.observe(len(self._dirty))
+            self._dirty.clear()
+        self._next = (time.time() if now is None else now) + self.interval
+
+    close = flush
 
 
 async def send_telegram(msg: str) -> None:
-    bot = Bot(token=TELEGRAM_TOKEN)
-    await bot.send_message(
-        chat_id=TELEGRAM_CHAT_ID, text=msg, parse_mode="Markdown"
-    )
+    bot = Bot(token=TELEGRAM_TOKEN, base_url=f"{TELEGRAM_API_BASE}/bot")
+    try:
+        await bot.send_message(
+            chat_id=TELEGRAM_CHAT_ID, text=msg, parse_mode="Markdown"
+        )
+    except Exception:
+        ALERTS.inc(result="failed")
+        raise
+    ALERTS.inc(result="sent")
 
 
 def parse_price_text(text: str) -> Optional[float]:
@@ -116,7 +305,10 @@ def parse_price_text(text: str) -> Optional[float]:
 
 def load_valid_sellers(sellers_file: str) -> set[str]:
     if not os.path.exists(sellers_file):
-        logger.warning(f"{sellers_file} not found, using defaults")
+        logger.warning(
+            "%s not found, using defaults", sellers_file,
+            extra={"event": "sellers_missing"},
+        )
         return {"amazon.com", "amazon resale", "amazon warehouse deals"}
 
     sellers: set[str] = set()
@@ -126,104 +318,270 @@ def load_valid_sellers(sellers_file: str) -> set[str]:
             if seller:
                 sellers.add(seller.lower())
 
-    logger.info(f"Loaded {len(sellers)} valid sellers")
+    logger.info(
+        "Loaded %d valid sellers", len(sellers),
+        extra={"event": "sellers_loaded", "sellers": len(sellers)},
+    )
     return sellers
 
 
+# ---------- Raw page helpers ----------
+# Pages stay bytes until BeautifulSoup decodes them once, with a known
+# charset: resp.text would run charset detection over the whole body when
+# the header has none, and .lower() on it would make another full copy.
+
+MARKER_CHUNK = 256 * 1024
+
+
+def has_marker(phrases: tuple, html: Union[str, bytes]) -> bool:
+    """Case-insensitive search for any of the (lowercase, bytes) phrases.
+
+    Lowercases one window at a time, so there is never a lowercased copy
+    of the whole page; `bytes.lower` + `in` is also ~10x faster than an
+    re.IGNORECASE alternation over the same buffer.
+    """
+    if isinstance(html, str):
+        phrases = tuple(p.decode() for p in phrases)
+    overlap = max(len(p) for p in phrases) - 1
+    for start in range(0, len(html), MARKER_CHUNK):
+        window = html[start:start + MARKER_CHUNK + overlap].lower()
+        if any(p in window for p in phrases):
+            return True
+    return False
+
+
+CAPTCHA_MARKERS = (
+    b"captcha",
+    b"enter the characters you see below",
+    b"type the characters you see in this image",
+    b"robot check",
+)
+# Stricter set for the parser: "captcha" alone also shows up in product page scripts
+CAPTCHA_PAGE_MARKERS = (
+    b"enter the characters you see below",
+    b"type the characters you see in this image",
+)
+
+_HEADER_CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+_META_CHARSET = re.compile(rb"<meta[^>]{0,200}?charset=[\"']?([\w.:-]+)", re.I)
+
+
+def page_encoding(body: bytes, content_type: str = "") -> str:
+    """Charset from the Content-Type header, else the page's <meta>, else UTF-8."""
+    m = _HEADER_CHARSET.search(content_type)
+    name = m.group(1) if m else None
+    if name is None:
+        m = _META_CHARSET.search(body, 0, 4096)
+        name = m.group(1).decode("ascii") if m else "utf-8"
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return "utf-8"
+
+
+def make_soup(html: Union[str, bytes], encoding: Optional[str] = None) -> BeautifulSoup:
+    if isinstance(html, str):
+        return BeautifulSoup(html, "html.parser")
+    return BeautifulSoup(
+        html, "html.parser", from_encoding=encoding or page_encoding(html)
+    )
+
+
 # ---------- HTTP fetching with backoff & basic bot detection ----------
 
-def fetch_html(url: str, retry_count: int = 0) -> Optional[str]:
+# Egress identities (proxies / source addresses) fetches are spread over
+EGRESS = build_pool(
+    EGRESS_IDENTITIES or [{"proxy": p} for p in PROXIES],
+    EGRESS_RATE,
+    EGRESS_BURST,
+    COOKIE_DIR,
+)
+
+# Every fetched body, for offline re-parsing (None unless PAGE_STORE_DIR is set)
+PAGE_STORE = open_store(PAGE_STORE_DIR, PAGE_STORE_MAX_MB)
+
+
+def set_fetch_proxy(
+    proxy: Optional[str], rate: float = EGRESS_RATE, suffix: Optional[str] = None
+) -> None:
+    """Use a single identity (sharded workers: one each, `suffix` keeping
+    the names and cookie jars of workers on the same proxy apart)."""
+    global EGRESS
+    spec = {"proxy": proxy} if proxy else {}
+    if suffix:
+        spec["name"] = f"{identity_name(spec, 0)}-{suffix}"
+    EGRESS = build_pool([spec], rate, EGRESS_BURST, COOKIE_DIR)
+
+
+def warm_up(ident: Identity, url: str) -> None:
+    """Visit the site's home page so the first real fetch carries cookies."""
+    parts = urlsplit(url)
+    home = f"{parts.scheme}://{parts.netloc}/"
+    ident.warmup_tried_at = time.monotonic()
+    try:
+        http_replay.get(home, session=ident.session, headers=ident.headers, timeout=25)
+    except requests.exceptions.RequestException as e:
+        logger.info(
+            "Warm-up of %s failed: %.120s", ident.name, e,
+            extra={"event": "warmup_failed", "identity": ident.name},
+        )
+        return
+    logger.info(
+        "Warmed up %s (%d cookies)", ident.name, len(ident.session.cookies),
+        extra={"event": "warmup", "identity": ident.name},
+    )
+
+
+def fetch_html(url: str, retry_count: int = 0) -> Optional[Page]:
     if retry_count > 0:
         delay = 2 ** retry_count + random.uniform(1, 3)
-        logger.info(f"Backoff {retry_count}/3: {delay:.1f}s")
+        logger.info(
+            "Backoff %d/3: %.1fs", retry_count, delay,
+            extra={"event": "backoff", "url": url, "retry": retry_count},
+        )
         time.sleep(delay)
 
-    user_agents = [
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    ]
-
-    headers = {
-        "User-Agent": random.choice(user_agents),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate, br",
-        "DNT": "1",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Sec-Fetch-Dest": "document",
-        "Sec-Fetch-Mode": "navigate",
-        "Sec-Fetch-Site": "none",
-        "Cache-Control": "max-age=0",
-    }
+    ident = EGRESS.acquire(timeout=EGRESS_WAIT)
+    if ident is None:
+        logger.warning(
+            "No egress identity free within %ss for %s", EGRESS_WAIT, url,
+            extra={"event": "egress_exhausted", "url": url},
+        )
+        return None
+    if SESSION_WARMUP and ident.needs_warmup():
+        warm_up(ident, url)
+    warm = ident.warm
 
+    host = urlsplit(url).netloc
+    start = time.perf_counter()
     try:
-        resp = requests.get(
-            url,
-            headers=headers,
-            timeout=25,
-            allow_redirects=True,
-        )
+        with FETCH_SECONDS.time(host=host):
+            resp = http_replay.get(
+                url,
+                session=ident.session,
+                headers=ident.headers,
+                timeout=25,
+                allow_redirects=True,
+            )
+        elapsed = time.perf_counter() - start
+        HTTP_RESPONSES.inc(host=host, code=str(resp.status_code))
 
         # CloudFront / IP block 503
         if resp.status_code == 503:
-            logger.warning(f"503 from Amazon/CloudFront for {url}")
+            logger.warning(
+                "503 from Amazon/CloudFront for %s", url,
+                extra={"event": "http_503", "url": url, "identity": ident.name},
+            )
+            EGRESS.report(ident, "blocked", elapsed, warm)
             if retry_count < 3:
                 return fetch_html(url, retry_count + 1)
             return None
 
         resp.raise_for_status()
+        if PAGE_STORE is not None:
+            # CAPTCHA pages too: they are what a parse failure needs to explain
+            PAGE_STORE.put(url, resp.content, resp.status_code)
 
-        text_lower = resp.text.lower()
-        if (
-            "captcha" in text_lower
-            or "enter the characters you see below" in text_lower
-            or "type the characters you see in this image" in text_lower
-            or "robot check" in text_lower
-        ):
-            logger.warning(f"CAPTCHA/robot page detected: {url}")
+        body = resp.content
+        if has_marker(CAPTCHA_MARKERS, body):
+            logger.warning(
+                "CAPTCHA/robot page detected: %s", url,
+                extra={"event": "captcha", "url": url, "identity": ident.name},
+            )
+            CAPTCHAS.inc(host=host)
+            EGRESS.report(ident, "captcha", elapsed, warm)
             if retry_count < 3:
                 return fetch_html(url, retry_count + 1)
             return None
 
-        return resp.text
+        EGRESS.report(ident, "ok", elapsed, warm)
+        return Page(body, page_encoding(body, resp.headers.get("Content-Type", "")))
 
     except requests.exceptions.RequestException as e:
+        FETCH_ERRORS.inc(host=host)
+        status = getattr(e.response, "status_code", None)
+        # 403/429 are the site pushing back on this identity; a 404 is not its fault
+        outcome = "blocked" if status in (403, 429) else ("ok" if status else "error")
+        EGRESS.report(ident, outcome, time.perf_counter() - start, warm)
         logger.warning(
-            f"Fetch fail {retry_count+1}/3 {url}: {str(e)[:120]}"
+            "Fetch fail %d/3 %s: %.120s", retry_count + 1, url, e,
+            extra={"event": "fetch_failed", "url": url, "retry": retry_count},
         )
         if retry_count < 3:
             return fetch_html(url, retry_count + 1)
-        logger.error(f"Max retries exceeded: {url}")
+        logger.error(
+            "Max retries exceeded: %s", url,
+            extra={"event": "fetch_gave_up", "url": url},
+        )
         return None
 
 
 # ---------- HTML parsing ----------
 
+# Product page price selectors with their tier, in priority order. Tiers are
+# always tried in this order (a deal price beats the buybox); check_item may
+# only reorder selectors within a tier, trying a URL's or site's usual winner
+# there first.
+PRICE_SELECTORS: List[tuple[str, str]] = [
+    # Priority selectors
+    ("#priceblock_dealprice", "deal"),
+    ("#priceblock_dealprice span.a-offscreen", "deal"),
+    ("#priceblock_ourprice", "deal"),
+    ("#priceblock_ourprice span.a-offscreen", "deal"),
+    (".a-price.a-text-price.a-size-medium span.a-offscreen", "deal"),
+    ("#apexOfferPriceBlock span.a-offscreen", "deal"),
+    # Buybox
+    ("#price_inside_buybox span.a-offscreen", "buybox"),
+    (".buybox-price span.a-offscreen", "buybox"),
+    ("#corePrice_feature_div span.a-offscreen", "buybox"),
+    # Fallback
+    ("#priceblock span.a-offscreen", "fallback"),
+    ("#priceblock_shippingmessage", "fallback"),
+]
+SELECTOR_TIER = dict(PRICE_SELECTORS)
+
+
 def get_price_name_amazon(
-    html: str, valid_sellers: set[str]
+    html: Union[str, bytes],
+    valid_sellers: set[str],
+    encoding: Optional[str] = None,
+    embedded: bool = True,
 ) -> tuple[str, Optional[float]]:
-    """Return (product_name, price_from_buybox_valid_seller_or_None)."""
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text(" ", strip=True)
-
+    """Return (product_name, price_from_buybox_valid_seller_or_None).
+
+    Tries the page's embedded offer data first unless `embedded` is False
+    (check_item runs that step itself, before handing the page to a worker).
+    """
+    return get_price_name_amazon_ranked(html, valid_sellers, encoding, embedded)[:2]
+
+
+def get_price_name_amazon_ranked(
+    html: Union[str, bytes],
+    valid_sellers: set[str],
+    encoding: Optional[str] = None,
+    embedded: bool = True,
+    prefer: tuple[str, ...] = (),
+) -> tuple[str, Optional[float], Optional[str], int]:
+    """get_price_name_amazon plus the winning selector and how many price
+    selectors were evaluated. Selectors in `prefer` go first within their
+    tier; a hint never jumps a higher tier, so it can't change the price."""
     # CAPTCHA check (defensive; usually caught in fetch_html)
-    if (
-        "enter the characters you see below" in text
-        or "type the characters you see in this image" in text
-    ):
-        return "Amazon CAPTCHA/robot page", None
+    if has_marker(CAPTCHA_PAGE_MARKERS, html):
+        return "Amazon CAPTCHA/robot page", None, None, 0
+
+    if embedded:
+        fast = embedded_price(html, encoding)
+        if fast:
+            return fast[0], fast[1], "embedded", 0
+
+    soup = make_soup(html, encoding)
 
     # Product title
     title_el = soup.select_one("#productTitle") or soup.find("title")
     name = title_el.get_text(strip=True)[:80] if title_el else "Amazon Product"
 
     if name == "Amazon.com" or (len(name) < 20 and "Amazon" in name):
-        return name, None
+        return name, None, None, 0
 
     # Find seller FIRST
     buybox_seller_selectors = [
@@ -248,63 +606,46 @@ def get_price_name_amazon(
 
     if seller_match:
         logger.debug(
-            f"Seller '{seller_match}' found in: {seller_text[:100]}"
+            "Seller '%s' found in: %.100s", seller_match, seller_text,
+            extra={"event": "seller_found"},
         )
 
-    # Priority selectors
-    priority_prices = [
-        "#priceblock_dealprice",
-        "#priceblock_dealprice span.a-offscreen",
-        "#priceblock_ourprice",
-        "#priceblock_ourprice span.a-offscreen",
-        ".a-price.a-text-price.a-size-medium span.a-offscreen",
-        "#apexOfferPriceBlock span.a-offscreen",
-    ]
-
-    buybox_prices = [
-        "#price_inside_buybox span.a-offscreen",
-        ".buybox-price span.a-offscreen",
-        "#corePrice_feature_div span.a-offscreen",
-    ]
-
-    fallback_prices = [
-        "#priceblock span.a-offscreen",
-        "#priceblock_shippingmessage",
-    ]
-
-    for selector_list, priority in [
-        (priority_prices, "deal"),
-        (buybox_prices, "buybox"),
-        (fallback_prices, "fallback"),
-    ]:
-        for sel in selector_list:
-            el = soup.select_one(sel)
-            if not el:
-                continue
-            price_text = el.get_text()
-            price = parse_price_text(price_text)
-            if price and 0.01 <= price <= 5000:
-                logger.info(
-                    f"Buybox match ${price:.2f} from {seller_match} "
-                    f"for {name} [SEL:{sel}] [{priority}]"
-                )
-                return name, price
-            else:
-                logger.debug(
-                    f"Price rejected from {sel}: '{price_text[:50]}' -> {price}"
-                )
+    # Tier by tier; within a tier the preferred selectors go first
+    order = []
+    for tier in dict.fromkeys(SELECTOR_TIER.values()):
+        order += [sel for sel in prefer if SELECTOR_TIER.get(sel) == tier and sel not in order]
+        order += [sel for sel, t in PRICE_SELECTORS if t == tier and sel not in order]
+    for evaluated, sel in enumerate(order, 1):
+        el = soup.select_one(sel)
+        if not el:
+            continue
+        price_text = el.get_text()
+        price = parse_price_text(price_text)
+        if price and 0.01 <= price <= 5000:
+            logger.info(
+                "Buybox match $%.2f from %s for %s [SEL:%s] [%s]",
+                price, seller_match, name, sel, SELECTOR_TIER[sel],
+                extra={"event": "buybox_match", "selector": sel},
+            )
+            return name, price, sel, evaluated
+        else:
+            logger.debug(
+                "Price rejected from %s: '%.50s' -> %s", sel, price_text, price,
+                extra={"event": "price_rejected"},
+            )
 
     logger.debug(
-        f"No valid buybox price for {name} (seller: {seller_match})"
+        "No valid buybox price for %s (seller: %s)", name, seller_match,
+        extra={"event": "buybox_none"},
     )
-    return name, None
+    return name, None, None, len(order)
 
 
 def get_price_name_offers(
-    html: str, valid_sellers: set[str]
+    html: Union[str, bytes], valid_sellers: set[str], encoding: Optional[str] = None
 ) -> tuple[str, Optional[float]]:
     """Scan Amazon OFFICIAL offers page - ALL sellers for main product only."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html, encoding)
 
     best_price = float("inf")
     best_seller = None
@@ -346,49 +687,586 @@ def get_price_name_offers(
 
     if best_price != float("inf"):
         logger.info(
-            f"Offers: Lowest ${best_price:.2f} from {best_seller}"
+            "Offers: Lowest $%.2f from %s", best_price, best_seller,
+            extra={"event": "offers_lowest"},
         )
         return "Main product (offers)", best_price
 
-    logger.debug("No valid offers found")
+    logger.debug("No valid offers found", extra={"event": "offers_none"})
     return "Main product (no offers)", None
 
 
+# ---------- Embedded-data fast path ----------
+# Product pages carry the buy-box offer as data for their own scripts: the
+# twister buying-options JSON ("priceAmount") and the add-to-cart form's
+# hidden inputs. A few byte scans read those without building a DOM;
+# pages without them go through the selector chain above.
+
+_TITLE_RE = re.compile(rb'id="productTitle"[^>]*>\s*([^<]{1,500}?)\s*<')
+_TWISTER_RE = re.compile(
+    rb'class="twister-plus-buying-options-price-data"[^>]*>\s*([\[{].*?[\]}])\s*</div>', re.S
+)
+_HIDDEN_INPUT_RE = re.compile(
+    rb'<input\b[^>]*\bname="(items\[0\.base\]\[customerVisiblePrice\]\[amount\]|merchantID)"[^>]*>'
+)
+_VALUE_RE = re.compile(rb'\bvalue="([^"]*)"')
+AMAZON_MERCHANT_ID = "ATVPDKIKX0DER"
+
+
+def _twister_price(blob: bytes) -> Optional[float]:
+    try:
+        data = json.loads(blob)
+    except ValueError:
+        return None
+    groups = data.values() if isinstance(data, dict) else [data]
+    offers = [o for g in groups if isinstance(g, list) for o in g if isinstance(o, dict)]
+    offers.sort(key=lambda o: o.get("buyingOptionType") != "NEW")
+    for offer in offers:
+        if isinstance(offer.get("priceAmount"), (int, float)):
+            return float(offer["priceAmount"])
+    return None
+
+
+def extract_embedded(
+    html: bytes, encoding: Optional[str] = None
+) -> Optional[tuple[str, float, Optional[str]]]:
+    """(title, price, merchant id) from a product page's embedded data, or None."""
+    if not isinstance(html, bytes):
+        return None
+    title_m = _TITLE_RE.search(html)
+    if not title_m:
+        return None
+    price = None
+    twister = _TWISTER_RE.search(html)
+    if twister:
+        price = _twister_price(twister.group(1))
+    merchant = None
+    for m in _HIDDEN_INPUT_RE.finditer(html):
+        value_m = _VALUE_RE.search(m.group(0))
+        if not value_m:
+            continue
+        if m.group(1) == b"merchantID":
+            merchant = value_m.group(1).decode("ascii", "replace") or None
+        elif price is None:
+            price = parse_price_text(value_m.group(1).decode("ascii", "replace"))
+    if price is None or not 0.01 <= price <= 5000:
+        return None
+    raw_title = title_m.group(1).decode(encoding or page_encoding(html), "replace")
+    return html_lib.unescape(raw_title).strip()[:80], price, merchant
+
+
+def embedded_price(
+    html: Union[str, bytes], encoding: Optional[str] = None
+) -> Optional[tuple[str, float]]:
+    """get_price_name_amazon's answer from embedded data, or None to parse the DOM."""
+    with DP_PARSE_SECONDS.time(path="embedded"):
+        found = extract_embedded(html, encoding)
+    # Placeholder titles get the DOM path's (name, None) treatment
+    if found and (found[0] == "Amazon.com" or (len(found[0]) < 20 and "Amazon" in found[0])):
+        found = None
+    EMBEDDED_PAGES.inc(result="hit" if found else "miss")
+    if not found:
+        return None
+    name, price, merchant = found
+    logger.info(
+        "Buybox match $%.2f from %s for %s [SEL:embedded]",
+        price, "amazon.com" if merchant == AMAZON_MERCHANT_ID else merchant, name,
+        extra={"event": "buybox_match", "selector": "embedded"},
+    )
+    return name, price
+
+
+class FastPathStats:
+    """Credit embedded-data hits with the DOM parse time they avoided."""
+
+    def __init__(self, alpha: float = 0.1) -> None:
+        self.alpha = alpha
+        self.dom_mean: Optional[float] = None
+
+    def dom(self, seconds: float) -> None:
+        DP_PARSE_SECONDS.observe(seconds, path="dom")
+        if self.dom_mean is None:
+            self.dom_mean = seconds
+        else:
+            self.dom_mean += self.alpha * (seconds - self.dom_mean)
+
+    def hit(self, seconds: float) -> None:
+        if self.dom_mean is not None:
+            EMBEDDED_SAVED.inc(max(0.0, self.dom_mean - seconds))
+
+
+FAST_PATH = FastPathStats()
+
+
+# ---------- Selector ranking ----------
+
+class SelectorStats:
+    """Which price selector wins, per site, to order the chain for the next page.
+
+    A URL's own last winner is kept in the state file (url:selector) and
+    is preferred; the site's winners by count follow. The parser applies
+    the preference within each tier only, so ranking speeds up the chain
+    without changing which price wins.
+    """
+
+    def __init__(self) -> None:
+        self.wins: Dict[str, Dict[str, int]] = {}
+        for sel, _ in PRICE_SELECTORS:
+            SELECTOR_WINS.inc(0, selector=sel)  # dead selectors show up as 0
+
+    def seed(self, state: Dict[str, float]) -> None:
+        """Count the winners remembered in a loaded state file."""
+        for key, sel in state.items():
+            if key.endswith(":selector") and sel in SELECTOR_TIER:
+                site = urlsplit(key[: -len(":selector")]).netloc
+                site_wins = self.wins.setdefault(site, {})
+                site_wins[sel] = site_wins.get(sel, 0) + 1
+
+    def order(self, site: str, hint: Optional[str] = None) -> tuple[str, ...]:
+        site_wins = self.wins.get(site, {})
+        ranked = sorted(site_wins, key=site_wins.get, reverse=True)
+        if hint in SELECTOR_TIER:
+            ranked = [hint] + [sel for sel in ranked if sel != hint]
+        return tuple(ranked)
+
+    def record(
+        self, site: str, selector: Optional[str], evaluations: int, hint: Optional[str]
+    ) -> None:
+        SELECTOR_EVALUATIONS.observe(evaluations)
+        if hint in SELECTOR_TIER:
+            SELECTOR_HINTS.inc(result="hit" if selector == hint else "miss")
+        if selector in SELECTOR_TIER:
+            SELECTOR_WINS.inc(selector=selector)
+            site_wins = self.wins.setdefault(site, {})
+            site_wins[selector] = site_wins.get(selector, 0) + 1
+
+
+SELECTOR_STATS = SelectorStats()
+
+
+# ---------- Variation families ----------
+# A product page's twister (the variation picker) lists every sibling
+# variant as an <li data-defaultasin="..."> swatch, usually with that
+# variant's price, so one product page fetch can price the watchlist's
+# other variants of the same product.
+
+_SWATCH_RE = re.compile(rb'<li\b[^>]*?\bdata-defaultasin="([A-Z0-9]{10})"[^>]*>(.*?)</li>', re.S)
+_SWATCH_PRICE_RE = re.compile(rb'(?:twisterSwatchPrice|a-offscreen)[^>]*>\s*([^<]{1,40}?)\s*<')
+_SWATCH_LABEL_RE = re.compile(rb'\btitle="Click to select ([^"]{1,100})"')
+
+
+def variation_prices(
+    html: bytes, encoding: Optional[str] = None
+) -> Dict[str, tuple[Optional[float], str]]:
+    """ASIN -> (swatch price or None, variant label) for every swatch on a product page."""
+    if not isinstance(html, bytes):
+        return {}
+    variants = {}
+    for m in _SWATCH_RE.finditer(html):
+        price = None
+        price_m = _SWATCH_PRICE_RE.search(m.group(2))
+        if price_m:
+            price = parse_price_text(price_m.group(1).decode("ascii", "replace"))
+            if price is not None and not 0.01 <= price <= 5000:
+                price = None
+        label_m = _SWATCH_LABEL_RE.search(m.group(0))
+        label = ""
+        if label_m:
+            raw = label_m.group(1).decode(encoding or page_encoding(html), "replace")
+            label = html_lib.unescape(raw).strip()
+        variants[m.group(1).decode()] = (price, label)
+    return variants
+
+
+# ---------- Batch sources: search results and public lists ----------
+# A search results page or a public list (wishlist) shows current prices
+# for dozens of ASINs. Each result card / list item is found by its
+# opening tag and read with byte scans up to its closing tag.
+
+_SEARCH_CARD_RE = re.compile(rb'<div\b[^>]*\bdata-component-type="s-search-result"[^>]*>')
+_LIST_ITEM_RE = re.compile(rb'<li\b[^>]*\bdata-price="[^"]*"[^>]*>')
+_DATA_ASIN_RE = re.compile(rb'\bdata-asin="([A-Z0-9]{10})"')
+_EXTERNAL_ASIN_RE = re.compile(rb'ASIN:([A-Z0-9]{10})')
+_DATA_PRICE_RE = re.compile(rb'\bdata-price="([^"]*)"')
+# First non-struck-through price; "a-price a-text-price" is the list price
+_CARD_PRICE_RE = re.compile(
+    rb'<span class="a-price"(?![^>]*data-a-strike)[^>]*>\s*<span class="a-offscreen">([^<]{1,40})<'
+)
+_CARD_TITLE_RE = re.compile(rb'<h2\b.*?<span\b[^>]*>\s*([^<]{1,500}?)\s*</span>', re.S)
+_ITEM_NAME_RE = re.compile(rb'<a\b[^>]*\bid="itemName_[^"]*"[^>]*>')
+_TITLE_ATTR_RE = re.compile(rb'\btitle="([^"]{1,500})"')
+_NESTING_RE = {b"div": re.compile(rb"<(/?)div\b"), b"li": re.compile(rb"<(/?)li\b")}
+LISTING_BLOCK_MAX = 30000  # bytes scanned for one card's closing tag
+
+
+def _element_end(html: bytes, start: int, end: int) -> int:
+    """Where the element opened at `start` closes, looking no further than `end`."""
+    nesting = _NESTING_RE[b"div" if html.startswith(b"<div", start) else b"li"]
+    depth = 0
+    for m in nesting.finditer(html, start, end):
+        depth += -1 if m.group(1) else 1
+        if depth == 0:
+            return m.end()
+    return end
+
+
+def get_prices_listing(
+    html: bytes, encoding: Optional[str] = None
+) -> Dict[str, tuple[Optional[float], str]]:
+    """ASIN -> (price or None, title) from a search results or public list page."""
+    if not isinstance(html, bytes):
+        return {}
+    encoding = encoding or page_encoding(html)
+    tags = sorted(
+        [*_SEARCH_CARD_RE.finditer(html), *_LIST_ITEM_RE.finditer(html)],
+        key=lambda m: m.start(),
+    )
+    listed: Dict[str, tuple[Optional[float], str]] = {}
+    for i, tag in enumerate(tags):
+        end = tags[i + 1].start() if i + 1 < len(tags) else len(html)
+        end = _element_end(html, tag.start(), min(end, tag.start() + LISTING_BLOCK_MAX))
+        block = html[tag.start():end]
+        asin_m = _DATA_ASIN_RE.search(tag.group(0)) or _EXTERNAL_ASIN_RE.search(tag.group(0))
+        if not asin_m:
+            continue
+        price = None
+        data_price = _DATA_PRICE_RE.search(tag.group(0))
+        if data_price:
+            # List items carry a bare number; "-Infinity" when unavailable
+            try:
+                price = float(data_price.group(1))
+            except ValueError:
+                pass
+            title_tag = _ITEM_NAME_RE.search(block)
+            title_m = _TITLE_ATTR_RE.search(title_tag.group(0)) if title_tag else None
+        else:
+            price_m = _CARD_PRICE_RE.search(block)
+            if price_m:
+                price = parse_price_text(price_m.group(1).decode("ascii", "replace"))
+            title_m = _CARD_TITLE_RE.search(block)
+        if price is not None and not (math.isfinite(price) and 0.01 <= price <= 5000):
+            price = None
+        title = ""
+        if title_m:
+            title = html_lib.unescape(title_m.group(1).decode(encoding, "replace")).strip()[:80]
+        listed[asin_m.group(1).decode()] = (price, title)
+    return listed
+
+
+async def fetch_listing(url: str) -> Dict[str, tuple[Optional[float], str]]:
+    """Fetch one batch source page and read its prices ({} on failure)."""
+    page = await asyncio.to_thread(fetch_html, url)
+    if not page:
+        BATCH_FETCHES.inc(result="failed")
+        return {}
+    listed = get_prices_listing(page.body, page.encoding)
+    BATCH_FETCHES.inc(result="ok" if listed else "empty")
+    return listed
+
+
+# ---------- Tiered checks: camelcamelcamel first ----------
+# camelcamelcamel's product page shows the last Amazon price it saw and is
+# far cheaper (and friendlier) to fetch. With TIERED_CHECKS, an item whose
+# camel price hasn't moved counts as a stable check without any Amazon
+# request; a camel change, no camel price, or an Amazon check older than
+# TIER_MAX_STALE goes on to the offers and product pages.
+
+_CAMEL_CURRENT_RE = re.compile(rb">\s*Current\b.{0,300}?\$\s*([0-9,]+\.\d{2})", re.S | re.I)
+_CAMEL_TITLE_RE = re.compile(
+    rb'<meta\s+property="og:title"\s+content="([^"]{1,300})"|<title>([^<]{1,300})</title>', re.I
+)
+_CAMEL_TITLE_SUFFIX_RE = re.compile(r"\s*[-|]\s*camelcamelcamel\s*$", re.I)
+CAMEL_SESSION = requests.Session()
+
+
+def get_price_camel(html: bytes) -> Optional[float]:
+    """The "Current" Amazon price on a camelcamelcamel product page."""
+    m = _CAMEL_CURRENT_RE.search(html)
+    price = parse_price_text(m.group(1).decode()) if m else None
+    return price if price and 0.01 <= price <= 5000 else None
+
+
+def get_camel_title(html: bytes) -> Optional[str]:
+    """The product name from a camelcamelcamel product page's title."""
+    m = _CAMEL_TITLE_RE.search(html)
+    if not m:
+        return None
+    raw = html_lib.unescape((m.group(1) or m.group(2)).decode("utf-8", "replace"))
+    return _CAMEL_TITLE_SUFFIX_RE.sub("", " ".join(raw.split()))[:80] or None
+
+
+def fetch_camel_price(asin: str) -> Optional[tuple[float, Optional[str]]]:
+    """(price, product name) from camelcamelcamel, or None without a price."""
+    url = f"{CAMEL_PRODUCT_BASE}/{asin}"
+    host = urlsplit(url).netloc
+    try:
+        with FETCH_SECONDS.time(host=host):
+            resp = http_replay.get(
+                url, session=CAMEL_SESSION, headers={"User-Agent": "Mozilla/5.0"}, timeout=10
+            )
+        HTTP_RESPONSES.inc(host=host, code=str(resp.status_code))
+        resp.raise_for_status()
+    except requests.exceptions.RequestException:
+        FETCH_ERRORS.inc(host=host)
+        return None
+    price = get_price_camel(resp.content)
+    return (price, get_camel_title(resp.content)) if price is not None else None
+
+
+async def camel_tier(
+    item: WatchItem, asin: str, state: Dict[str, float]
+) -> tuple[str, Optional[float], Optional[str]]:
+    """("unchanged", price, name) when Amazon needn't be fetched, else why not.
+
+    The camel price is compared with the one seen at the last Amazon check
+    (url:camel), or with the tracked price the first time; check_item
+    stores it only once Amazon has confirmed, so a failed escalation is
+    retried next time.
+    """
+    last = state.get(item.url)
+    if last is None:
+        return "initial", None, None
+    amazon_at = state.get(f"{item.url}:amazon_at")
+    if not amazon_at or time.time() - amazon_at > TIER_MAX_STALE:
+        return "stale", None, None
+    found = await asyncio.to_thread(fetch_camel_price, asin)
+    if found is None:
+        return "no_signal", None, None
+    price, name = found
+    reference = state.get(f"{item.url}:camel", last)
+    return ("unchanged" if abs(price - reference) < 0.005 else "changed"), price, name
+
+
+# ---------- All-offers display (AOD) ----------
+# The product page's "other sellers" panel loads its offers from an ajax
+# fragment: the pinned buy-box offer, then ten rows per page, cheapest
+# first, and a hidden input with the total. It is a fraction of the size of
+# the legacy /gp/offer-listing/ page and is read with byte scans, one
+# #aod-offer block per row. Further pages are fetched only while no valid
+# seller has shown up: rows come in price order, so a valid offer on an
+# earlier page beats anything after it.
+
+_AOD_OFFER_RE = re.compile(rb'<div\b[^>]*\bid="aod-(?:pinned-)?offer"[^>]*>')
+_AOD_TOTAL_RE = re.compile(rb'\bid="aod-total-offer-count"[^>]*\bvalue="(\d+)"')
+_AOD_PRICE_RE = re.compile(
+    rb'\bid="aod-offer-price".*?<span class="a-offscreen">\s*([^<]{1,40}?)\s*<', re.S
+)
+_AOD_HEADING_RE = re.compile(
+    rb'\bid="aod-offer-heading".*?<span\b[^>]*>\s*([^<]{1,80}?)\s*</span>', re.S
+)
+_AOD_SOLD_BY_RE = re.compile(rb'<div\b[^>]*\bid="aod-offer-soldBy"')
+_AOD_SELLER_LINK_RE = re.compile(
+    rb'<a\b[^>]*\bhref="[^"]*\bseller=([A-Z0-9]+)[^"]*"[^>]*>\s*([^<]{1,120}?)\s*</a>'
+)
+# Amazon itself is named in plain text, without a seller link
+_AOD_SELLER_TEXT_RE = re.compile(
+    rb'<span class="a-size-small a-color-base"[^>]*>\s*([^<]{1,120}?)\s*</span>'
+)
+
+
+def aod_url(base: str, asin: str, page: int = 1) -> str:
+    url = f"{base}/gp/product/ajax/aodAjaxMain/?asin={asin}&pc=dp"
+    # Later pages: only the offer list, without the pinned offer and filters
+    return url if page == 1 else f"{url}&isonlyrenderofferlist=true&pageno={page}"
+
+
+def _aod_text(raw: bytes, encoding: str) -> str:
+    return " ".join(html_lib.unescape(raw.decode(encoding, "replace")).split())
+
+
+def parse_aod(
+    html: Union[str, bytes], encoding: Optional[str] = None
+) -> tuple[List[Offer], Optional[int]]:
+    """Offer rows (pinned offer first) and the total offer count of one AOD page."""
+    if not isinstance(html, bytes):
+        html, encoding = html.encode("utf-8"), "utf-8"
+    encoding = encoding or page_encoding(html)
+    tags = list(_AOD_OFFER_RE.finditer(html))
+    offers: List[Offer] = []
+    for i, tag in enumerate(tags):
+        end = tags[i + 1].start() if i + 1 < len(tags) else len(html)
+        end = _element_end(html, tag.start(), min(end, tag.start() + LISTING_BLOCK_MAX))
+        block = html[tag.start():end]
+        price_m = _AOD_PRICE_RE.search(block)
+        price = parse_price_text(price_m.group(1).decode("ascii", "replace")) if price_m else None
+        sold_by = _AOD_SOLD_BY_RE.search(block)
+        if not (price and 0.01 <= price <= 5000 and sold_by):
+            continue
+        sold_by = block[sold_by.start():_element_end(block, sold_by.start(), len(block))]
+        link = _AOD_SELLER_LINK_RE.search(sold_by)
+        if link:
+            seller, seller_id = _aod_text(link.group(2), encoding), link.group(1).decode()
+        else:
+            text = _AOD_SELLER_TEXT_RE.search(sold_by)
+            if not text:
+                continue
+            seller = _aod_text(text.group(1), encoding)
+            seller_id = AMAZON_MERCHANT_ID if seller.lower() == "amazon.com" else None
+        heading = _AOD_HEADING_RE.search(block)
+        condition = _aod_text(heading.group(1), encoding) if heading else ""
+        offers.append(Offer(seller, seller_id, price, condition))
+    total = _AOD_TOTAL_RE.search(html)
+    return offers, int(total.group(1)) if total else None
+
+
+def valid_seller(seller: str, valid_sellers: set[str]) -> Optional[str]:
+    """The valid_sellers entry found in a seller name, if any."""
+    seller = seller.lower()
+    return next((valid for valid in valid_sellers if valid in seller), None)
+
+
+def lowest_offer(offers: List[Offer], valid_sellers: set[str]) -> tuple[str, Optional[float]]:
+    """(name, price) of the cheapest valid-seller offer, like get_price_name_offers."""
+    best = None
+    for offer in offers:
+        if valid_seller(offer.seller, valid_sellers) and (best is None or offer.price < best.price):
+            best = offer
+    if best:
+        logger.info(
+            "Offers: Lowest $%.2f from %s (%s)", best.price, best.seller, best.condition or "?",
+            extra={"event": "offers_lowest"},
+        )
+        return "Main product (offers)", best.price
+
+    logger.debug("No valid offers found", extra={"event": "offers_none"})
+    return "Main product (no offers)", None
+
+
+def get_price_name_aod(
+    html: Union[str, bytes], valid_sellers: set[str], encoding: Optional[str] = None
+) -> tuple[str, Optional[float]]:
+    """Lowest valid-seller price on one AOD page."""
+    return lowest_offer(parse_aod(html, encoding)[0], valid_sellers)
+
+
+async def fetch_aod_offers(
+    base: str, asin: str, valid_sellers: set[str]
+) -> Optional[List[Offer]]:
+    """All-offers rows for `asin`, paging on while no valid seller has shown up.
+
+    None when not even the first page could be fetched.
+    """
+    offers: List[Offer] = []
+    pages, total = 0, None
+    while pages < AOD_MAX_PAGES:
+        page = await asyncio.to_thread(fetch_html, aod_url(base, asin, pages + 1))
+        if not page:
+            break
+        pages += 1
+        rows, count = parse_aod(page.body, page.encoding)
+        total = total or count  # only the first page has the count
+        offers.extend(rows)
+        valid = sum(1 for offer in rows if valid_seller(offer.seller, valid_sellers))
+        AOD_OFFERS.inc(valid, seller="valid")
+        AOD_OFFERS.inc(len(rows) - valid, seller="other")
+        if valid or not rows or len(offers) >= (total or 0):
+            break
+    if not pages:
+        return None
+    AOD_PAGES.observe(pages)
+    return offers
+
+
 # ---------- Core check logic ----------
 
+INLINE_PARSER = ParseStage("inline")
+
+
 async def check_item(
-    item: WatchItem, state: Dict[str, float], valid_sellers: set[str]
-) -> None:
+    item: WatchItem,
+    state: Dict[str, float],
+    valid_sellers: set[str],
+    parser: ParseStage = INLINE_PARSER,
+    family: Optional[Dict[str, tuple]] = None,
+) -> str:
+    """Check one item; return "changed", "stable", "initial", "failed" or "cooldown".
+
+    With `family`, the other variants priced on the product page are added
+    to it as ASIN -> (price or None, name) for price_siblings().
+    """
     cooldown_key = f"{item.url}:cooldown_until"
     cooldown_until = state.get(cooldown_key)
     if cooldown_until and datetime.now().timestamp() < cooldown_until:
-        logger.info(f"Cooldown: {item.url}")
-        return
+        logger.info(
+            "Cooldown: %s", item.url, extra={"event": "cooldown", "url": item.url}
+        )
+        return "cooldown"
 
-    logger.info(f"Checking {item.url}")
-    await asyncio.sleep(random.uniform(2, 6))
+    logger.info(
+        "Checking %s", item.url, extra={"event": "check_start", "url": item.url}
+    )
+    await asyncio.sleep(random.uniform(*CHECK_DELAY))
 
     # Extract ASIN from URL
     asin_match = re.search(r"/dp/([A-Z0-9]{10})", item.url)
     if not asin_match:
-        logger.warning(f"Cannot extract ASIN from {item.url}")
-        return
+        logger.warning(
+            "Cannot extract ASIN from %s", item.url,
+            extra={"event": "bad_url", "url": item.url},
+        )
+        return "failed"
 
     asin = asin_match.group(1)
 
-    # OFFERS PAGE FIRST
-    offers_url = f"https://www.amazon.com/gp/offer-listing/{asin}"
-    offers_html = fetch_html(offers_url)
+    camel_price = None
+    if TIERED_CHECKS:
+        tier, camel_price, camel_name = await camel_tier(item, asin, state)
+        TIER_CHECKS.inc(result=tier)
+        if tier == "unchanged":
+            return await apply_price(
+                item, state, state[item.url], camel_name or item.url, "camel"
+            )
+
+    # OFFERS FIRST
+    origin = urlsplit(item.url)
+    base = f"{origin.scheme}://{origin.netloc}"
     name, offers_price = None, None
-    if offers_html:
-        logger.debug(f"Checking offers page for {asin}")
-        name, offers_price = get_price_name_offers(offers_html, valid_sellers)
+    if OFFERS_SOURCE == "aod":
+        # Byte scans over a small fragment: parsed in-process, no pool handoff
+        offers = await fetch_aod_offers(base, asin, valid_sellers)
+        offers_fetched = offers is not None
+        if offers:
+            name, offers_price = lowest_offer(offers, valid_sellers)
+    else:
+        offers_page = await asyncio.to_thread(fetch_html, f"{base}/gp/offer-listing/{asin}")
+        offers_fetched = offers_page is not None
+        if offers_page:
+            logger.debug(
+                "Checking offers page for %s", asin, extra={"event": "offers_parse"}
+            )
+            name, offers_price = await parser.run(
+                get_price_name_offers, offers_page.body, valid_sellers, offers_page.encoding
+            )
 
     # BUYBOX AS BACKUP
     buybox_price = None
-    html = fetch_html(item.url)
-    if html:
-        _, buybox_price = get_price_name_amazon(html, valid_sellers)
+    page = await asyncio.to_thread(fetch_html, item.url)
+    if page:
+        # Embedded data first, in-process: a hit skips the worker handoff too
+        start = time.perf_counter()
+        fast = None
+        if not has_marker(CAPTCHA_PAGE_MARKERS, page.body):
+            fast = embedded_price(page.body, page.encoding)
+        if fast:
+            dp_name, buybox_price = fast
+            FAST_PATH.hit(time.perf_counter() - start)
+        else:
+            # Last time's winning selector for this URL, then the site's
+            selector_key = f"{item.url}:selector"
+            hint = state.get(selector_key)
+            dp_name, buybox_price, selector, evaluations = await parser.run(
+                get_price_name_amazon_ranked, page.body, valid_sellers, page.encoding,
+                False, SELECTOR_STATS.order(origin.netloc, hint),
+            )
+            FAST_PATH.dom(time.perf_counter() - start)
+            SELECTOR_STATS.record(origin.netloc, selector, evaluations, hint)
+            if selector:
+                state[selector_key] = selector
+        name = name or dp_name
+        if family is not None:
+            for sib, (sib_price, label) in variation_prices(page.body, page.encoding).items():
+                if sib != asin:
+                    family[sib] = (sib_price, f"{dp_name[:60]} ({label})" if label else dp_name)
 
     # ALWAYS use LOWEST price from valid sellers (offers page usually wins)
     price = None
@@ -403,12 +1281,12 @@ async def check_item(
         price_source = "buybox"
 
     # NEW: do not mark URL as bad when we never got HTML
-    if price is None and not offers_html and not html:
+    if price is None and not offers_fetched and not page:
         logger.warning(
-            f"Transient fetch failure (no HTML) for {item.url}; "
-            f"not counting as URL issue"
+            "Transient fetch failure (no HTML) for %s; not counting as URL issue",
+            item.url, extra={"event": "check_no_html", "url": item.url},
         )
-        return
+        return "failed"
 
     if price is None:
         fails_key = f"{item.url}:fails"
@@ -417,17 +1295,36 @@ async def check_item(
         if fails >= 6:
             msg = f"🚨 URL ISSUE: {item.url} ({fails} polls/404)"
             await send_telegram(msg)
-            logger.error(f"ISSUE: {item.url} ({fails})")
+            logger.error(
+                "ISSUE: %s (%d)", item.url, fails,
+                extra={"event": "url_issue", "url": item.url, "fails": fails},
+            )
             state[cooldown_key] = (
                 datetime.now().timestamp()
                 + timedelta(hours=24).total_seconds()
             )
         else:
             logger.warning(
-                f"Fail {fails}/6 (HTML but no valid price): {item.url}"
+                "Fail %d/6 (HTML but no valid price): %s", fails, item.url,
+                extra={"event": "no_price", "url": item.url, "fails": fails},
             )
-        return
-
+        return "failed"
+
+    state[f"{item.url}:amazon_at"] = time.time()
+    if camel_price is not None:
+        state[f"{item.url}:camel"] = camel_price
+    # A listed change this check was made due for is now confirmed (or not):
+    # either way it is the reference for the next listing
+    listed_pending = state.pop(f"{item.url}:listed_pending", None)
+    if listed_pending is not None:
+        state[f"{item.url}:listed"] = listed_pending
+    return await apply_price(item, state, price, name, price_source)
+
+
+async def apply_price(
+    item: WatchItem, state: Dict[str, float], price: float, name: str, price_source: str
+) -> str:
+    """Record a found price for `item`, alerting on a change; returns the outcome."""
     # Reset fail counter on success
     fails_key = f"{item.url}:fails"
     if fails_key in state:
@@ -436,77 +1333,467 @@ async def check_item(
     key = item.url
     last = state.get(key)
 
+    # Detection latency: the change happened at some point since the
+    # previous successful check, so that gap is its upper bound.
+    checked_key = f"{item.url}:checked_at"
+    prev_checked = state.get(checked_key)
+    state[checked_key] = time.time()
+
     if last is None:
         state[key] = price
         logger.info(
-            f"Initial price ${price:.2f} ({price_source}) - {name[:60]}"
+            "Initial price $%.2f (%s) - %.60s", price, price_source, name,
+            extra={"event": "initial", "url": item.url, "price": price},
         )
-        return
+        return "initial"
 
+    outcome = "stable"
     if abs(price - last) >= 0.01:
+        outcome = "changed"
         direction = "🟢 DROPPED" if price < last else "🔴 INCREASED"
         diff = abs(last - price)
         pct = diff / last * 100 if last != 0 else 0.0
+        latency_min = (
+            (state[checked_key] - prev_checked) / 60 if prev_checked else None
+        )
+        latency_txt = (
+            f"\n⏱ within {latency_min:.0f}min" if latency_min is not None else ""
+        )
         msg = (
             f"{direction}\n"
             f"{name[:80]}\n"
             f"{item.url}\n"
             f"*Old:* ${last:.2f} → *New:* ${price:.2f}\n"
             f"*{diff:.2f}* ({pct:.1f}%)"
+            f"{latency_txt}"
         )
         await send_telegram(msg)
         logger.info(
-            f"{direction} ${last:.2f}→${price:.2f} "
-            f"({price_source}) {name[:40]}"
+            "%s $%.2f→$%.2f (%s) %.40s%s",
+            direction, last, price, price_source, name, latency_txt.strip(),
+            extra={"event": "changed", "url": item.url, "old": last, "price": price},
         )
     else:
         logger.info(
-            f"Stable price ${price:.2f} ({price_source}) {name[:40]}"
+            "Stable price $%.2f (%s) %.40s", price, price_source, name,
+            extra={"event": "stable", "url": item.url, "price": price},
         )
 
     state[key] = price
+    return outcome
+
 
+# ---------- Main loop: rolling per-item scheduling ----------
+
+ITEM_STATE_SUFFIXES = (
+    "", ":fails", ":cooldown_until", ":interval", ":checked_at", ":selector", ":listed",
+    ":listed_pending", ":amazon_at", ":camel",
+)
+
+
+def item_state(state: Dict[str, float], url: str) -> Dict[str, float]:
+    """The slice of `state` that belongs to one watch item."""
+    keys = (url + suffix for suffix in ITEM_STATE_SUFFIXES)
+    return {k: state[k] for k in keys if k in state}
+
+
+def merge_item_state(
+    state: Dict[str, float], url: str, updated: Dict[str, float]
+) -> None:
+    for suffix in ITEM_STATE_SUFFIXES:
+        state.pop(url + suffix, None)
+    state.update(updated)
+
+
+def record_outcome(
+    scheduler: ItemScheduler,
+    window: RollingWindow,
+    state: Dict[str, float],
+    url: str,
+    outcome: str,
+    prev_checked: Optional[float],
+) -> None:
+    """Reschedule `url` after a check and add it to the rolling summary."""
+    ITEMS_CHECKED.inc(outcome=outcome)
+    delay = scheduler.record(url, outcome)
+    if delay is not None:
+        state[f"{url}:interval"] = scheduler.get(url).interval
+
+    latency = None
+    if outcome == "changed" and prev_checked:
+        latency = state[f"{url}:checked_at"] - prev_checked
+    window.add(url, outcome, latency)
+    if delay is None:
+        logger.info(
+            "Removed from watchlist: %s [%s]", url, outcome,
+            extra={"event": "unscheduled", "url": url},
+        )
+    else:
+        logger.info(
+            "Scheduled %s [%s] next in %.0fmin", url, outcome, delay / 60,
+            extra={"event": "scheduled", "url": url, "outcome": outcome, "delay": delay},
+        )
+
+
+async def price_siblings(
+    scheduler: ItemScheduler,
+    window: RollingWindow,
+    state: Dict[str, float],
+    item: WatchItem,
+    family: Dict[str, tuple],
+) -> int:
+    """Check `item`'s watchlist siblings with the prices from its product page.
+
+    A swatch shows the buybox price, and a check records the lower of the
+    offers and buybox prices, so a swatch price only stands in for a check
+    when it is at or below the sibling's last price (stable, or a drop).
+    New, raised, unpriced and in-flight siblings keep their own schedule.
+    Returns how many siblings were priced.
+    """
+    site = urlsplit(item.url).netloc
+    priced = 0
+    for entry in scheduler.entries():
+        sib = entry.item
+        m = re.search(r"/dp/([A-Z0-9]{10})", sib.url)
+        if not m or m.group(1) not in family or sib.url == item.url:
+            continue
+        if urlsplit(sib.url).netloc != site:
+            continue
+        price, name = family[m.group(1)]
+        last = state.get(sib.url)
+        if price is None:
+            FAMILY_VARIANTS.inc(result="no_price")
+            continue
+        if last is None or price > last + 0.005:
+            FAMILY_VARIANTS.inc(result="deferred")
+            continue
+        cooldown_until = state.get(f"{sib.url}:cooldown_until")
+        if entry.next_due == float("inf") or (cooldown_until and time.time() < cooldown_until):
+            FAMILY_VARIANTS.inc(result="busy")
+            continue
+        prev_checked = state.get(f"{sib.url}:checked_at")
+        outcome = await apply_price(sib, state, price, name, "family")
+        record_outcome(scheduler, window, state, sib.url, outcome, prev_checked)
+        FAMILY_VARIANTS.inc(result="priced")
+        priced += 1
+    return priced
+
+
+async def apply_batch_prices(
+    scheduler: ItemScheduler,
+    window: RollingWindow,
+    state: Dict[str, float],
+    listed: Dict[str, tuple],
+    site: str,
+) -> Counter:
+    """Refresh watchlist items from a batch source's prices; returns result counts.
+
+    An item whose listed price is the same as at its last confirmed listing
+    (or, the first time, as its tracked price) counts as a stable check
+    without a fetch. A listed change instead makes the item's own check due
+    now, to confirm it from the offers and product pages with the seller
+    check; the new listed price becomes the reference only once that check
+    succeeds (url:listed_pending until then), so a failed confirmation is
+    asked for again next time rather than forgotten. An item whose last
+    Amazon check is older than BATCH_MAX_STALE is made due as well, so
+    offers the listing doesn't show still get seen. Items not checked yet,
+    already due or being checked are left to that check.
+    """
+    results: Counter = Counter()
+    now = time.time()
+    for entry in scheduler.entries():
+        item = entry.item
+        m = re.search(r"/dp/([A-Z0-9]{10})", item.url)
+        if not m or m.group(1) not in listed or urlsplit(item.url).netloc != site:
+            continue
+        price, name = listed[m.group(1)]
+        if price is None:
+            results["no_price"] += 1
+            continue
+        listed_key = f"{item.url}:listed"
+        pending_key = f"{item.url}:listed_pending"
+        last = state.get(item.url)
+        reference = state.get(listed_key, last)
+        amazon_at = state.get(f"{item.url}:amazon_at")
+        cooldown_until = state.get(f"{item.url}:cooldown_until")
+        if last is None:
+            results["unchecked"] += 1
+        elif not now < entry.next_due < float("inf") or (cooldown_until and now < cooldown_until):
+            # Being checked, or due (perhaps a confirmation asked for below)
+            results["busy"] += 1
+        elif abs(price - reference) >= 0.005:
+            state[pending_key] = price
+            scheduler.reschedule(item.url, now)
+            results["confirm"] += 1
+        elif not amazon_at or now - amazon_at > BATCH_MAX_STALE:
+            state.pop(pending_key, None)
+            scheduler.reschedule(item.url, now)
+            results["stale"] += 1
+        else:
+            state.pop(pending_key, None)
+            state[listed_key] = price
+            prev_checked = state.get(f"{item.url}:checked_at")
+            outcome = await apply_price(item, state, last, name, "listing")
+            record_outcome(scheduler, window, state, item.url, outcome, prev_checked)
+            results["refreshed"] += 1
+    for result, n in results.items():
+        BATCH_ITEMS.inc(n, result=result)
+    return results
+
+
+def build_scheduler(
+    items: List[WatchItem], state: Dict[str, float]
+) -> ItemScheduler:
+    """Seed the scheduler with first checks spread evenly over POLL_INTERVAL."""
+    scheduler = ItemScheduler(
+        base_interval=POLL_INTERVAL,
+        min_interval=MIN_CHECK_INTERVAL,
+        max_interval=MAX_CHECK_INTERVAL,
+    )
+    shuffled_items = items.copy()
+    random.shuffle(shuffled_items)
+    now = time.time()
+    slot = POLL_INTERVAL / max(1, len(shuffled_items))
+    for i, item in enumerate(shuffled_items):
+        scheduler.add(
+            item,
+            interval=state.get(f"{item.url}:interval"),
+            due=now + i * slot,
+        )
+    return scheduler
+
+
+def check_gap(n_items: int) -> float:
+    """Seconds between check starts for a steady POLL_INTERVAL-wide rate.
+
+    The floor is WORKER_MIN_GAP per egress identity; each identity's own
+    rate bucket keeps it from being used faster than that.
+    """
+    gap = POLL_INTERVAL / max(1, n_items)
+    return max(WORKER_MIN_GAP / len(EGRESS), gap * random.uniform(0.9, 1.1))
+
+
+def format_summary(summary: Dict[str, object], n_items: int) -> str:
+    outcomes = summary["outcomes"]
+    window_min = SUMMARY_INTERVAL / 60
+    msg = (
+        f"✅ Last {window_min:.0f}min: {summary['checks']} checks, "
+        f"{summary['items']}/{n_items} items, "
+        f"{outcomes.get('changed', 0)} changed, "
+        f"{outcomes.get('failed', 0)} failed"
+    )
+    if summary["latency_max"] is not None:
+        msg += (
+            f"\n⏱ detection p50 {summary['latency_p50'] / 60:.0f}min, "
+            f"max {summary['latency_max'] / 60:.0f}min"
+        )
+    return msg
+
+
+def reload_watchlist(scheduler: ItemScheduler, state: Dict[str, float]) -> None:
+    """Apply watchlist edits to the live scheduler.
+
+    New items are queued for a check right away, with any interval the
+    state remembers for them (an item removed and re-added keeps what it
+    learned). Removed ones are dropped: an in-flight check just won't be
+    rescheduled, unless the item comes back before it finishes, when it
+    carries on as if never removed. Untouched items keep their schedule.
+    A broken or emptied file leaves everything as is.
+    """
+    try:
+        new_items = load_watchlist(WATCHLIST_FILE)
+    except Exception as e:
+        logger.error(
+            "Watchlist reload failed, keeping current list: %s", e,
+            extra={"event": "reload_failed"},
+        )
+        return
+    if not new_items:
+        logger.warning(
+            "Reloaded watchlist is empty, keeping current list",
+            extra={"event": "reload_empty"},
+        )
+        return
+
+    new_urls = {item.url: item for item in new_items}
+    old_urls = {entry.item.url for entry in scheduler.entries()}
+    added = [url for url in new_urls if url not in old_urls]
+    removed = [url for url in old_urls if url not in new_urls]
+
+    now = time.time()
+    for url in added:
+        scheduler.add(new_urls[url], interval=state.get(f"{url}:interval"), due=now)
+    for url in removed:
+        scheduler.remove(url)
+    logger.info(
+        "♻️ Watchlist reloaded: +%d -%d (%d items)", len(added), len(removed), len(scheduler),
+        extra={"event": "watchlist_reloaded"},
+    )
+
+
+def reload_valid_sellers(
+    scheduler: ItemScheduler, state: Dict[str, float], current: set[str]
+) -> set[str]:
+    """Re-read valid sellers; bring failing items forward if the set changed.
+
+    Items currently failing with "no valid price" are the ones a newly
+    listed seller can fix, so only those are re-prioritized.
+    """
+    try:
+        sellers = load_valid_sellers(VALID_SELLERS_FILE)
+    except Exception as e:
+        logger.error(
+            "Valid sellers reload failed, keeping current set: %s", e,
+            extra={"event": "reload_failed"},
+        )
+        return current
+    if not sellers or sellers == current:
+        return current
+
+    now = time.time()
+    bumped = 0
+    for entry in scheduler.entries():
+        if state.get(f"{entry.item.url}:fails"):
+            scheduler.reschedule(entry.item.url, now)
+            bumped += 1
+    logger.info(
+        "♻️ Valid sellers reloaded: %d sellers, %d failing items re-prioritized",
+        len(sellers), bumped, extra={"event": "sellers_reloaded"},
+    )
+    return sellers
+
+
+def publish_loop_gauges(scheduler: ItemScheduler, window: RollingWindow) -> None:
+    """Set the loop gauges from the loop itself.
+
+    The scheduler and window belong to the event loop; a metrics scrape on
+    the HTTP thread only reads the values published here.
+    """
+    SCHEDULER_ITEMS.set(len(scheduler))
+    SCHEDULER_OVERDUE.set(scheduler.overdue())
+    CHECKS_PER_MINUTE.set(window.checks() / (window.window / 60))
 
-# ---------- Main loop: 1x/day polling ----------
 
 async def main() -> None:
     items = load_watchlist(WATCHLIST_FILE)
     if not items:
-        logger.info("No Amazon items in watchlist.")
+        logger.info("No Amazon items in watchlist.", extra={"event": "watchlist_empty"})
         return
 
     valid_sellers = load_valid_sellers(VALID_SELLERS_FILE)
     state = load_state(STATE_FILE)
+    SELECTOR_STATS.seed(state)
+    scheduler = build_scheduler(items, state)
+    window = RollingWindow(SUMMARY_INTERVAL)
+    parser = ParseStage(PARSE_MODE, PARSE_WORKERS)
+    writer = StateWriter(STATE_FILE, state, STATE_FLUSH_INTERVAL)
+    publish_loop_gauges(scheduler, window)
+    start_metrics_server(METRICS_PORT)
+    install_profiling_hooks(PROFILE_DIR, PROFILE_SECONDS)
+    watchlist_watcher = FileWatcher(WATCHLIST_FILE)
+    sellers_watcher = FileWatcher(VALID_SELLERS_FILE)
+
+    logger.info(
+        "🚀 Amazon Tracker - rolling %.0fs/check, adaptive %ss..%ss per item "
+        "(POLL_INTERVAL=%ss) STARTED!",
+        check_gap(len(items)), MIN_CHECK_INTERVAL, MAX_CHECK_INTERVAL, POLL_INTERVAL,
+        extra={"event": "started", "items": len(items)},
+    )
+
+    async def run_check(item: WatchItem, sellers: set[str]) -> None:
+        prev_checked = state.get(f"{item.url}:checked_at")
+        family: Optional[Dict[str, tuple]] = {} if FAMILY_BATCHING else None
+        try:
+            outcome = await check_item(item, state, sellers, parser, family)
+        except Exception as e:
+            logger.error(
+                "Check failed for %s: %s", item.url, e,
+                extra={"event": "check_error", "url": item.url},
+            )
+            outcome = "failed"
+        record_outcome(scheduler, window, state, item.url, outcome, prev_checked)
+        if family:
+            await price_siblings(scheduler, window, state, item, family)
+        writer.mark(item.url)
+
+    async def run_batch(url: str) -> None:
+        try:
+            listed = await fetch_listing(url)
+            results = await apply_batch_prices(
+                scheduler, window, state, listed, urlsplit(url).netloc
+            )
+        except Exception as e:
+            logger.error(
+                "Batch source failed for %s: %s", url, e,
+                extra={"event": "batch_source_error", "url": url},
+            )
+            return
+        logger.info(
+            "Batch source %s: %d listed, %d refreshed, %d to confirm",
+            url, len(listed), results["refreshed"], results["confirm"],
+            extra={"event": "batch_source", "url": url, **results},
+        )
+        writer.mark(url)
+
+    # One check (or batch source fetch) in flight per egress identity
+    in_flight: set[asyncio.Task] = set()
+    next_slot = time.time()
+    next_summary = time.time() + SUMMARY_INTERVAL
+    batch_due = {url: time.time() for url in BATCH_SOURCES}
+
+    # SIGTERM (service stop) unwinds like Ctrl-C, so the state gets written
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        while True:
+            now = time.time()
+            wait = scheduler.seconds_until_due(now)
+            if wait is None:
+                wait = RELOAD_CHECK_INTERVAL
+            if batch_due:
+                wait = min(wait, max(0.0, min(batch_due.values()) - now))
+            wait = max(wait, next_slot - now)
+            if len(in_flight) >= len(EGRESS):
+                wait = max(wait, RELOAD_CHECK_INTERVAL)
+            if wait > 0:
+                timeout = min(wait, RELOAD_CHECK_INTERVAL, max(1.0, next_summary - now))
+                if in_flight:
+                    # Wake early when a check finishes and frees its slot
+                    await asyncio.wait(
+                        in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    await asyncio.sleep(timeout)
+
+            publish_loop_gauges(scheduler, window)
+            if watchlist_watcher.changed():
+                reload_watchlist(scheduler, state)
+            if sellers_watcher.changed():
+                valid_sellers = reload_valid_sellers(scheduler, state, valid_sellers)
+
+            task = None
+            if time.time() >= next_slot and len(in_flight) < len(EGRESS):
+                # Due batch sources go first: each one can spare many item checks
+                source = next((u for u, due in batch_due.items() if due <= time.time()), None)
+                if source is not None:
+                    batch_due[source] = time.time() + BATCH_SOURCE_INTERVAL
+                    task = asyncio.create_task(run_batch(source))
+                else:
+                    item = scheduler.pop_due()
+                    if item is not None:
+                        task = asyncio.create_task(run_check(item, valid_sellers))
+            if task is not None:
+                next_slot = time.time() + check_gap(len(scheduler))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            if time.time() >= next_summary:
+                await send_telegram(format_summary(window.summary(), len(scheduler)))
+                next_summary = time.time() + SUMMARY_INTERVAL
+
+            writer.maybe_flush()
+    finally:
+        writer.close()
 
-    from config import POLL_INTERVAL
-    interval_hours = POLL_INTERVAL / 3600
-    logger.info(f"🚀 Amazon Tracker - Every {interval_hours:.0f}hr (POLL_INTERVAL={POLL_INTERVAL}s) STARTED!")
-
-    while True:
-        # Run full cycle immediately
-        logger.info(f"🕐 POLLING NOW {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {len(items)} items")
-
-        shuffled_items = items.copy()
-        random.shuffle(shuffled_items)
-
-        for i, item in enumerate(shuffled_items):
-            logger.info(f"Progress: {(i+1)/len(items)*100:.0f}%")
-            await check_item(item, state, valid_sellers)
-            if i < len(items) - 1:
-                await asyncio.sleep(random.uniform(4, 10))
-
-        active_items = len([k for k in state if not k.endswith((":fails", ":cooldown"))])
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        summary_msg = f"✅ Every {interval_hours:.0f}hr: {active_items}/{len(items)} @ {timestamp}"
-        await send_telegram(summary_msg)
-        save_state(STATE_FILE, state)
-
-        # Sleep for configured interval with ±10% jitter
-        jitter_seconds = random.uniform(-POLL_INTERVAL * 0.1, POLL_INTERVAL * 0.1)
-        sleep_seconds = POLL_INTERVAL + jitter_seconds
-        hours_until = sleep_seconds / 3600
-        logger.info(f"⏰ Next poll in {hours_until:.1f}hr (POLL_INTERVAL={POLL_INTERVAL}s + jitter)")
-        await asyncio.sleep(max(0, sleep_seconds))
 
 if __name__ == "__main__":
     asyncio.run(main())
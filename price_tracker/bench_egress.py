@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Throughput and health routing of the egress pool against local proxies.
+
+Each identity gets its own fake_origin instance as its HTTP proxy (the
+fake origin answers absolute-URI requests itself), so the per-proxy
+request counts show how fetches were spread. With --bad N the first N
+proxies answer mostly CAPTCHAs; the pool should rest them and move the
+load to the healthy ones.
+
+--sessions compares cookie handling on one pool size with the proxies
+acting like Amazon toward cookieless visitors (302 hop + more CAPTCHAs):
+a fresh visitor per request (the old behaviour), persistent sessions
+with warm-up, and a restart that reloads the jars from disk.
+
+    python3 bench_egress.py --identities 1 2 4 8 --rate 4 --items 80
+    python3 bench_egress.py --identities 4 --bad 1 --items 80
+    python3 bench_egress.py --identities 2 --sessions --pcaptcha-cold 0.3
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import amazon_price_tracker as apt
+import fake_origin
+import egress
+import http_replay
+from egress import build_pool
+
+
+async def drain(urls: list, concurrency: int) -> dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    outcomes: dict = {}
+    sellers = {"amazon.com"}
+
+    async def worker() -> None:
+        while not queue.empty():
+            url = queue.get_nowait()
+            outcome = await apt.check_item(apt.WatchItem("amazon", url), {}, sellers)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return outcomes
+
+
+def run_once(n: int, bad: int, rate: float, items: int, latency: float,
+             cookie_dir=None, **origin) -> float:
+    proxies = [
+        fake_origin.serve(latency=latency, pcaptcha=0.8 if i < bad else 0.0, **origin)
+        for i in range(n)
+    ]
+    apt.EGRESS = build_pool(
+        [{"proxy": fake_origin.base_url(p), "name": f"proxy{i}"} for i, p in enumerate(proxies)],
+        rate=rate,
+        cookie_dir=cookie_dir,
+    )
+    # The URL host is never contacted directly: every request goes via a proxy
+    urls = [f"http://amazon.test/dp/{fake_origin.fake_asin(i)}" for i in range(items)]
+
+    start = time.perf_counter()
+    outcomes = asyncio.run(drain(urls, len(apt.EGRESS)))
+    elapsed = time.perf_counter() - start
+    print(f"identities={n:<3} {items} checks in {elapsed:6.2f}s = {items / elapsed:6.2f} checks/s  {outcomes}")
+    for p, snap in zip(proxies, apt.EGRESS.snapshot()):
+        served = p.snapshot()
+        extra = {k: v for k, v in served.items() if not k.startswith("amazon ")}
+        print(
+            f"    {snap['name']:<8} requests {sum(served.values()):>4}  health {snap['health']:.2f}"
+            f"  cooldown {snap['cooldown']:.0f}s" + (f"  {extra}" if extra else "")
+        )
+        p.shutdown()
+    apt.EGRESS.save_cookies()
+    return items / elapsed
+
+
+def compare_sessions(n: int, rate: float, items: int, latency: float, **origin) -> None:
+    """Fresh visitor per request vs persistent sessions vs restart from disk."""
+    real_get = http_replay.get
+    fetches = []  # (seconds, was a CAPTCHA)
+
+    def timed_get(url, session=None, fresh=False, **kwargs):
+        if fresh:
+            session.cookies.clear()
+        start = time.perf_counter()
+        resp = real_get(url, session=session, **kwargs)
+        fetches.append((time.perf_counter() - start, "Robot Check" in resp.text))
+        return resp
+
+    cookie_dir = tempfile.mkdtemp(prefix="bench_cookies_")
+    # Short rests so CAPTCHAs show up as a rate rather than stalling the run
+    egress.BLOCK_COOLDOWN = 0.2
+    for label, fresh, warmup in [
+        ("fresh visitor", True, False),
+        ("session+warmup", False, True),
+        ("restart (jars)", False, True),
+    ]:
+        print(f"\n--- {label}")
+        fetches.clear()
+        apt.SESSION_WARMUP = warmup
+        apt.http_replay.get = lambda url, session=None, **kw: timed_get(
+            url, session=session, fresh=fresh, **kw
+        )
+        try:
+            run_once(n, 0, rate, items, latency, cookie_dir=None if fresh else cookie_dir, **origin)
+        finally:
+            apt.http_replay.get = real_get
+        captchas = sum(c for _, c in fetches)
+        print(
+            f"    {len(fetches)} fetches, CAPTCHA rate {captchas / len(fetches):.1%}, "
+            f"latency mean {statistics.mean(s for s, _ in fetches) * 1000:.0f}ms "
+            f"p90 {statistics.quantiles([s for s, _ in fetches], n=10)[-1] * 1000:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Egress pool benchmark")
+    ap.add_argument("--identities", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--bad", type=int, default=0, help="proxies that mostly serve CAPTCHAs")
+    ap.add_argument("--rate", type=float, default=4.0, help="requests/s per identity")
+    ap.add_argument("--items", type=int, default=60)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--sessions", action="store_true", help="compare cookie handling")
+    ap.add_argument("--pcaptcha-cold", type=float, default=0.3)
+    args = ap.parse_args()
+
+    apt.CHECK_DELAY = (0, 0)
+    if args.sessions:
+        compare_sessions(
+            args.identities[0], args.rate, args.items, args.latency,
+            pcaptcha_cold=args.pcaptcha_cold, cold_redirect=True,
+        )
+        raise SystemExit(0)
+    rates = {n: run_once(n, args.bad, args.rate, args.items, args.latency) for n in args.identities}
+    first = args.identities[0]
+    for n, r in rates.items():
+        print(f"  {n} identities: {r / rates[first]:.2f}x vs {first}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Throughput of sharded mode against the local fake origin.
+
+Starts fake_origin with a fixed per-request latency, then for each
+worker count pushes the same batch of ASIN checks through the SQLite
+queue and reports checks/s. With latency-bound fetches the rate should
+grow close to linearly with workers.
+
+    python3 bench_shards.py --items 200 --workers 1 2 4 8 --latency 0.1
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import fake_origin
+from sharded_tracker import shard_key, start_workers
+from work_queue import WorkQueue
+
+
+def run_once(base: str, asins: list, workers: int, queue_path: str) -> float:
+    queue = WorkQueue(queue_path)
+    queue.clear()
+    ring, procs = start_workers(
+        workers, queue_path, min_gap=0, check_delay=(0, 0), metrics_port=0
+    )
+    try:
+        start = time.perf_counter()
+        for asin in asins:
+            url = f"{base}/dp/{asin}"
+            queue.put(ring.lookup(shard_key(url)), url, {"state": {}})
+        done = 0
+        outcomes = {}
+        while done < len(asins):
+            for res in queue.results():
+                done += 1
+                outcomes[res.outcome] = outcomes.get(res.outcome, 0) + 1
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+    finally:
+        for proc in procs:
+            proc.terminate()
+        queue.close()
+    print(
+        f"workers={workers:<3} {len(asins)} checks in {elapsed:6.2f}s "
+        f"= {len(asins) / elapsed:7.1f} checks/s  {outcomes}"
+    )
+    return len(asins) / elapsed
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sharded mode throughput benchmark")
+    ap.add_argument("--items", type=int, default=200)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--latency", type=float, default=0.1)
+    args = ap.parse_args()
+
+    server = fake_origin.serve(latency=args.latency)
+    base = fake_origin.base_url(server)
+    asins = [f"B{i:09d}" for i in range(args.items)]
+    queue_path = os.path.join(tempfile.mkdtemp(), "bench_queue.db")
+
+    rates = {n: run_once(base, asins, n, queue_path) for n in args.workers}
+    first = args.workers[0]
+    for n, rate in rates.items():
+        print(f"  {n} workers: {rate / rates[first]:.2f}x vs {first}")
+    server.shutdown()
@@ -2,5 +2,51 @@ TELEGRAM_TOKEN = "8586957591:AAHT0S-2ADC-Y_SvxqtMuxHkTEJmjFJIWIU"
 TELEGRAM_CHAT_ID = "7574355748"
 WATCHLIST_FILE = "amazon_watchlist.txt"
 STATE_FILE = "amazon_state.json"
+STATE_FLUSH_INTERVAL = 30  # write the state file at most this often while dirty, and on exit
 POLL_INTERVAL = 3600
 VALID_SELLERS_FILE = "valid_sellers.txt"
+MIN_CHECK_INTERVAL = 300
+MAX_CHECK_INTERVAL = 86400
+SUMMARY_INTERVAL = 3600
+RELOAD_CHECK_INTERVAL = 10
+PARSE_MODE = "process"  # process | thread | inline
+PARSE_WORKERS = 2
+AMAZON_BASE = "https://www.amazon.com"
+CHECK_DELAY = (2, 6)
+PROXIES = []  # e.g. ["http://10.0.0.2:3128"]; sharded workers take one each
+WORKER_MIN_GAP = 4
+QUEUE_FILE = "work_queue.db"
+METRICS_PORT = 9108  # 0 disables; sharded workers use 9109, 9110, ...
+PROFILE_DIR = "profiles"  # kill -USR1 (cProfile) / -USR2 (sampling) <pid>
+PROFILE_SECONDS = 30
+TELEGRAM_API_BASE = "https://api.telegram.org"  # fake_origin.py serves a stub for load tests
+LOG_FORMAT = "json"  # json | text
+LOG_SAMPLE = {  # keep 1 in N of these per-item INFO events (warnings always kept)
+    "check_start": 20,
+    "buybox_match": 20,
+    "offers_lowest": 20,
+    "stable": 20,
+    "scheduled": 20,
+}
+# Egress identities for the rolling tracker, e.g.
+#   [{"proxy": "http://10.0.0.2:3128"}, {"source_address": "192.0.2.10", "rate": 0.3}]
+# Empty = one identity per PROXIES entry, or a single direct one.
+EGRESS_IDENTITIES = []
+EGRESS_RATE = 0.5  # requests/s per identity (a check is two requests)
+EGRESS_BURST = 2
+EGRESS_WAIT = 30  # give up a fetch if no identity frees up within this many seconds
+COOKIE_DIR = "cookies"  # per-identity cookie jars; "" keeps them in memory only
+SESSION_WARMUP = True  # visit the home page once before a cookieless identity's first fetch
+PAGE_STORE_DIR = ""  # e.g. "pages": keep every fetched body for offline re-parsing
+PAGE_STORE_MAX_MB = 500  # least recently fetched bodies are evicted beyond this
+FAMILY_BATCHING = True  # price watchlist variants from a sibling's product page swatches
+# Search result or public list pages we maintain; one fetch refreshes every
+# watchlist ASIN listed on it, e.g. ["https://www.amazon.com/hz/wishlist/ls/XXXXXXXXXXXX"]
+BATCH_SOURCES = []
+BATCH_SOURCE_INTERVAL = 900
+BATCH_MAX_STALE = 6 * 3600  # a listed item still gets its own Amazon check at least this often
+TIERED_CHECKS = False  # ask camelcamelcamel first; fetch Amazon only on a change or when stale
+CAMEL_PRODUCT_BASE = "https://camelcamelcamel.com/product"
+TIER_MAX_STALE = 6 * 3600  # check Amazon itself at least this often per item
+OFFERS_SOURCE = "aod"  # "aod" (all-offers fragment, paged) or "offer-listing" (legacy page)
+AOD_MAX_PAGES = 5  # all-offers pages read per check while no valid seller has shown up
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Egress identities for Amazon fetches.
+
+An identity is one way out to the site: an HTTP proxy and/or a local
+source address, with its own requests.Session (cookie jar, connection
+pool), a fixed browser header profile, a token-bucket rate limit and a
+health score. `EgressPool.acquire()` hands out the healthiest identity
+that has a token, so throughput grows with the number of identities and
+a blocked one (CAPTCHAs, 503s) is rested until it recovers.
+
+With a cookie_dir each identity keeps its cookie jar on disk
+(<cookie_dir>/<name>.lwp), so after a restart it carries on as the same
+returning visitor instead of a fresh one. Outcomes and latency are
+labelled by whether the session had cookies ("warm") when it was sent.
+
+    pool = build_pool([{"proxy": "http://10.0.0.2:3128"}, {"source_address": "192.0.2.10"}])
+    ident = pool.acquire()
+    resp = ident.session.get(url, headers=ident.headers, timeout=25)
+    pool.report(ident, "ok")
+"""
+
+import atexit
+import os
+import re
+import threading
+import time
+from http.cookiejar import LoadError, LWPCookieJar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import counter, gauge, histogram
+
+EGRESS_REQUESTS = counter(
+    "tracker_egress_requests_total",
+    "Fetches by identity, outcome and session state",
+    ["identity", "outcome", "session"],
+)
+EGRESS_SECONDS = histogram(
+    "tracker_egress_fetch_seconds", "Fetch latency by session state", ["session"]
+)
+
+# Header sets that belong together (UA, client hints, language), one per identity
+HEADER_PROFILES: List[Dict[str, str]] = [
+    {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+        "Accept-Language": "en-US,en;q=0.9",
+    },
+    {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Sec-CH-UA": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+        "Sec-CH-UA-Platform": '"Windows"',
+    },
+    {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Sec-CH-UA": '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+        "Sec-CH-UA-Platform": '"Linux"',
+    },
+]
+
+COMMON_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "DNT": "1",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Cache-Control": "max-age=0",
+}
+
+HEALTH_ALPHA = 0.2  # weight of the newest outcome in the health EWMA
+BLOCK_COOLDOWN = 60.0  # first rest after a CAPTCHA/block, doubled per repeat
+MAX_COOLDOWN = 3600.0
+COOKIE_SAVE_INTERVAL = 60.0  # write a changed jar at most this often
+WARMUP_RETRY = 600.0  # seconds before a failed warm-up is tried again
+
+
+class SourceAddressAdapter(HTTPAdapter):
+    """Bind outgoing connections to one local address."""
+
+    def __init__(self, source_address: str, **kwargs) -> None:
+        self.source_address = (source_address, 0)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        kwargs["source_address"] = self.source_address
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **kwargs):
+        kwargs["source_address"] = self.source_address
+        return super().proxy_manager_for(proxy, **kwargs)
+
+
+@dataclass
+class Identity:
+    name: str
+    proxy: Optional[str] = None
+    source_address: Optional[str] = None
+    profile: int = 0
+    rate: float = 0.5  # requests/s sustained; 0 = no bucket, the caller paces
+    burst: float = 2.0
+    health: float = 1.0
+    tokens: float = 0.0
+    refilled_at: float = field(default_factory=time.monotonic)
+    cooldown_until: float = 0.0
+    blocks: int = 0  # consecutive CAPTCHA/blocked outcomes
+    cookie_path: Optional[str] = None
+    cookies_saved_at: float = 0.0
+    warmup_tried_at: Optional[float] = None
+    session: requests.Session = field(default_factory=requests.Session, repr=False)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.burst
+        if self.cookie_path:
+            jar = LWPCookieJar(self.cookie_path)
+            if os.path.exists(self.cookie_path):
+                try:
+                    jar.load(ignore_discard=True)
+                except (LoadError, OSError):
+                    pass  # corrupt jar: start cold
+            self.session.cookies = jar
+        if self.source_address:
+            adapter = SourceAddressAdapter(self.source_address)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+        if self.proxy:
+            self.session.proxies = {"http": self.proxy, "https": self.proxy}
+        # Proxies come from the identity only, never from the environment
+        self.session.trust_env = False
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {**COMMON_HEADERS, **HEADER_PROFILES[self.profile % len(HEADER_PROFILES)]}
+
+    @property
+    def warm(self) -> bool:
+        """The session has cookies, i.e. looks like a returning visitor."""
+        return len(self.session.cookies) > 0
+
+    def needs_warmup(self) -> bool:
+        if self.warm:
+            return False
+        tried = self.warmup_tried_at
+        return tried is None or time.monotonic() - tried > WARMUP_RETRY
+
+    def save_cookies(self, force: bool = False) -> None:
+        if not self.cookie_path:
+            return
+        now = time.monotonic()
+        if not force and now - self.cookies_saved_at < COOKIE_SAVE_INTERVAL:
+            return
+        self.cookies_saved_at = now
+        tmp = self.cookie_path + ".tmp"
+        try:
+            self.session.cookies.save(tmp, ignore_discard=True)
+        except RuntimeError:
+            return  # jar changed mid-save by a concurrent fetch; next report retries
+        os.replace(tmp, self.cookie_path)
+
+    def _refill(self, now: float) -> None:
+        if self.rate <= 0:
+            self.tokens = self.burst
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def ready_in(self, now: float) -> float:
+        """Seconds until this identity may send again (0 = now)."""
+        self._refill(now)
+        wait_token = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait_token, self.cooldown_until - now, 0.0)
+
+
+class EgressPool:
+    """Schedule fetches onto the healthiest identity with a free token."""
+
+    def __init__(self, identities: List[Identity]) -> None:
+        if not identities:
+            raise ValueError("EgressPool needs at least one identity")
+        self.identities = identities
+        self._lock = threading.Lock()
+        health = gauge("tracker_egress_health", "Identity health score 0..1", ["identity"])
+        for ident in identities:
+            health.set(ident.health, identity=ident.name)
+        self._health_gauge = health
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def try_acquire(self) -> tuple:
+        """(identity, 0) if one is free now, else (None, seconds to wait)."""
+        now = time.monotonic()
+        with self._lock:
+            ready = [i for i in self.identities if i.ready_in(now) == 0]
+            if ready:
+                ident = max(ready, key=lambda i: (i.health, i.tokens))
+                ident.tokens -= 1
+                return ident, 0.0
+            return None, min(i.ready_in(now) for i in self.identities)
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[Identity]:
+        """Block until an identity is free and take one of its tokens.
+
+        Returns None if none frees up within `timeout` seconds (e.g. every
+        identity is resting after CAPTCHAs).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ident, wait = self.try_acquire()
+            if ident is not None:
+                return ident
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return None
+            time.sleep(wait)
+
+    def report(
+        self,
+        ident: Identity,
+        outcome: str,
+        seconds: Optional[float] = None,
+        warm: Optional[bool] = None,
+    ) -> None:
+        """Feed back one fetch: "ok", "captcha", "blocked" (503/403/429) or "error".
+
+        `warm` is the session state when the request went out.
+        """
+        session = "warm" if (ident.warm if warm is None else warm) else "cold"
+        EGRESS_REQUESTS.inc(identity=ident.name, outcome=outcome, session=session)
+        if seconds is not None:
+            EGRESS_SECONDS.observe(seconds, session=session)
+        with self._lock:
+            ident.save_cookies()
+            ok = outcome == "ok"
+            ident.health = (1 - HEALTH_ALPHA) * ident.health + HEALTH_ALPHA * ok
+            if outcome in ("captcha", "blocked"):
+                ident.blocks += 1
+                rest = min(MAX_COOLDOWN, BLOCK_COOLDOWN * 2 ** (ident.blocks - 1))
+                ident.cooldown_until = time.monotonic() + rest
+            elif ok:
+                ident.blocks = 0
+        self._health_gauge.set(ident.health, identity=ident.name)
+
+    def save_cookies(self) -> None:
+        with self._lock:
+            for ident in self.identities:
+                ident.save_cookies(force=True)
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "name": i.name,
+                    "health": round(i.health, 3),
+                    "cooldown": round(max(0.0, i.cooldown_until - now), 1),
+                    "warm": i.warm,
+                }
+                for i in self.identities
+            ]
+
+
+def identity_name(spec: Dict[str, object], index: int) -> str:
+    """Name for an identity without one in its spec: the proxy's host:port
+    (never its user:pass@), else the source address, else direct<index>."""
+    if spec.get("name"):
+        return str(spec["name"])
+    if spec.get("proxy"):
+        parts = urlsplit(str(spec["proxy"]))
+        if parts.hostname:
+            return f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+        return f"proxy{index}"
+    if spec.get("source_address"):
+        return str(spec["source_address"])
+    return f"direct{index}" if index else "direct"
+
+
+def build_pool(
+    specs: List[Dict[str, object]],
+    rate: float = 0.5,
+    burst: float = 2.0,
+    cookie_dir: Optional[str] = None,
+) -> EgressPool:
+    """Pool from config dicts ({"proxy", "source_address", "rate", "name"});
+    no specs means a single direct identity."""
+    specs = specs or [{}]
+    if cookie_dir:
+        # Jars are saved at exit, possibly after the process changed directory
+        cookie_dir = os.path.abspath(cookie_dir)
+        os.makedirs(cookie_dir, exist_ok=True)
+    identities = []
+    for i, spec in enumerate(specs):
+        name = identity_name(spec, i)
+        if any(ident.name == name for ident in identities):
+            # e.g. one proxy gateway with a session per username
+            name = f"{name}-{i}"
+        cookie_path = None
+        if cookie_dir:
+            cookie_path = os.path.join(cookie_dir, re.sub(r"[^\w.-]", "_", name) + ".lwp")
+        identities.append(Identity(
+            name=name,
+            proxy=spec.get("proxy"),
+            source_address=spec.get("source_address"),
+            profile=i,
+            rate=float(spec.get("rate", rate)),
+            burst=float(spec.get("burst", burst)),
+            cookie_path=cookie_path,
+        ))
+    pool = EgressPool(identities)
+    if cookie_dir:
+        atexit.register(pool.save_cookies)
+    return pool
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""Local stand-in for every upstream the pollers talk to, for load tests.
+
+    /, /dp/<ASIN>, /gp/offer-listing/<ASIN>  amazon.com pages the parsers accept
+    /gp/product/ajax/aodAjaxMain/?asin=...   all-offers fragment, &pageno=N pages
+    /s?k=...&page=N                        search results: fake ASINs of page N
+    /top_drops, /product/<ASIN>            camelcamelcamel
+    /newsearch.php?...                     Slickdeals RSS
+    POST /bot<token>/<method>              Telegram Bot API stub (always ok)
+    /__stats                               request counts as JSON
+
+Amazon prices are deterministic per ASIN, and --family-size groups ASINs
+into variation families whose pages list each other's prices. Every
+fourth ASIN's Amazon.com offer only shows up on all-offers page 2. The camel
+and Slickdeals lists rotate a couple of entries per request so every
+poll has something new to alert on. Recordings made with TRACKER_HTTP_MODE=record (see
+http_replay.py) are served in preference to generated pages when
+--cassettes is given. Site routes can get latency (+ uniform jitter) and
+injected 503s / CAPTCHA pages; the Telegram stub and /__stats never do.
+Amazon routes hand out a session-id cookie. Like the real site, they can
+treat visitors without one worse: --cold-redirect costs them an extra
+302 hop, and --pcaptcha-cold gives them their own CAPTCHA rate.
+Accepts absolute-URI request lines too, so it also works as a plain HTTP
+proxy target.
+
+    python3 fake_origin.py --port 8099 --latency 0.2 --jitter 0.1 --p503 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from http_replay import load_recording
+
+
+PRODUCT_PAGE = """<html><head><title>{title}</title></head><body>
+<span id="productTitle">{title}</span>{embedded}{twister}
+<div id="merchant-info">Ships from and sold by <a href="#">Amazon.com</a></div>
+<div id="corePrice_feature_div"><span class="a-price">
+<span class="a-offscreen">${price:.2f}</span></span></div>
+</body></html>"""
+
+# Half the product pages (by ASIN) also carry the twister price JSON the
+# tracker's embedded-data fast path reads; the rest take the DOM path
+TWISTER_DATA = """
+<div class="twister-plus-buying-options-price-data">{{"desktop_buybox_group_1":[\
+{{"displayPrice":"${price:.2f}","priceAmount":{price:.2f},"buyingOptionType":"NEW"}}]}}</div>"""
+
+# With --family-size N, fake ASINs come in families of N consecutive numbers
+# whose product pages list each other as twister swatches (every fifth
+# one without a price, like a variant needing "See available options")
+TWISTER = """
+<div id="variation_color_name"><ul>{swatches}</ul></div>"""
+SWATCH = """<li id="color_name_{i}" class="swatchAvailable" data-defaultasin="{asin}" \
+data-dp-url="/dp/{asin}" title="Click to select Color {i}">\
+<p class="a-size-mini twisterSwatchPrice"> {price} </p></li>"""
+
+OFFERS_PAGE = """<html><head><title>Offers</title></head><body><div id="olpOfferList">
+<div class="a-row olpOffer">
+<span class="olpOfferPrice">${price:.2f}</span>
+<h3 class="olpSellerName"><a href="#">Amazon.com</a></h3>
+</div></div></body></html>"""
+
+# All-offers rows, ten per page after the pinned one; the first page also
+# carries the total count
+AOD_HEADER = """<div id="aod-container"><h5 id="aod-asin-title-text">{title}</h5>
+<input type="hidden" id="aod-total-offer-count" value="{total}"/>
+"""
+AOD_OFFER = """<div id="{id}" class="a-section a-padding-base aod-information-block" role="listitem">
+<div id="aod-offer-price"><span class="a-price"><span class="a-offscreen">${price:.2f}</span></span></div>
+<div id="aod-offer-heading"><h5><span class="a-text-bold"> {condition} </span></h5></div>
+<div id="aod-offer-soldBy"><span class="a-size-small a-color-tertiary"> Sold by </span>{seller}</div>
+</div>
+"""
+AOD_AMAZON = '<span class="a-size-small a-color-base"> Amazon.com </span>'
+AOD_SELLER = '<a class="a-size-small a-link-normal" href="/gp/aag/main?seller={id}">{name}</a>'
+AOD_PER_PAGE = 10
+
+SEARCH_CARD = """<div data-asin="{asin}" data-index="{i}" data-component-type="s-search-result" \
+class="s-result-item s-asin"><h2 class="a-size-mini"><a class="a-link-normal" href="/dp/{asin}">\
+<span class="a-size-medium a-color-base a-text-normal">{title}</span></a></h2>
+<span class="a-price" data-a-size="xl" data-a-color="base"><span class="a-offscreen">${price:.2f}</span>\
+<span aria-hidden="true">${price:.2f}</span></span>
+<span class="a-price a-text-price" data-a-strike="true"><span class="a-offscreen">${list_price:.2f}</span></span>
+<div class="s-filler">{filler}</div></div>
+"""
+
+CAPTCHA_PAGE = """<html><head><title>Robot Check</title></head><body>
+<h4>Enter the characters you see below</h4>
+<form action="/errors/validateCaptcha"><input name="field-keywords"></form>
+</body></html>"""
+
+CAMEL_CARD = """<div class="deal-card">
+<h3 class="deal-title">{title}</h3>
+<div class="deal-prices">Was: ${old:,.2f} Now: ${new:,.2f}</div>
+<div class="deal-pct">-{pct}%</div>
+<a href="/product/{asin}">View price history</a>
+<div class="deal-filler">{filler}</div>
+</div>
+"""
+
+CAMEL_PRODUCT_PAGE = """<html><head><title>{title} - camelcamelcamel</title></head><body>
+<h1>{title}</h1>
+<table><tr><td>Highest</td><td>${old:,.2f}</td></tr>
+<tr><td>Current</td><td>${new:,.2f}</td></tr></table>
+</body></html>"""
+
+RSS_ITEM = """<item><title>{title}</title><link>https://slickdeals.net/f/{thread}-{slug}</link>
+<description><![CDATA[<p>{title}</p>]]></description><slash:comments>{likes}</slash:comments></item>"""
+
+ASIN_RE = re.compile(r"/(?:dp|gp/offer-listing|product)/([A-Z0-9]{10})")
+BOT_RE = re.compile(r"^/bot[^/]+/(\w+)$")
+
+CAMEL_DEALS = 20
+SEARCH_RESULTS = 48
+RSS_ITEMS = 25
+ROTATE_PER_REQUEST = 2
+
+
+def fake_price(asin: str) -> float:
+    h = int.from_bytes(hashlib.md5(asin.encode()).digest()[:4], "big")
+    return 10 + (h % 49000) / 100
+
+
+def fake_title(asin: str) -> str:
+    return f"Fake Origin Test Product {asin} with a suitably long title"
+
+
+def fake_asin(n: int) -> str:
+    return f"B{n:09d}"
+
+
+# ---------- Generated pages ----------
+
+def twister(asin: str, family_size: int) -> str:
+    if family_size < 2 or not asin[1:].isdigit():
+        return ""
+    first = int(asin[1:]) // family_size * family_size
+    swatches = []
+    for i, n in enumerate(range(first, first + family_size)):
+        sib = fake_asin(n)
+        price = "See available options" if n % 5 == 4 else f"${fake_price(sib):.2f}"
+        swatches.append(SWATCH.format(i=i, asin=sib, price=price))
+    return TWISTER.format(swatches="".join(swatches))
+
+
+def aod_offers(asin: str, page: int) -> str:
+    h = int.from_bytes(hashlib.md5(asin.encode()).digest()[4:6], "big")
+    price = fake_price(asin)
+    # Marketplace sellers undercut Amazon.com by 1% steps, so the ones
+    # ranked before it are cheaper and the rest dearer
+    amazon_rank = AOD_PER_PAGE + 1 if asin[1:].isdigit() and int(asin[1:]) % 4 == 3 else 0
+    rows = []
+    for i in range(max(amazon_rank + 1, 3 + h % 20)):
+        if i == amazon_rank:
+            rows.append((price, "New", AOD_AMAZON))
+        else:
+            seller = AOD_SELLER.format(id=f"A{h:05d}{i:04d}", name=f"Marketplace Seller {i}")
+            rows.append((price * (0.99 - (amazon_rank - i) / 100) if i < amazon_rank
+                         else price * (1 + i / 100), "Used - Good" if i % 3 else "New", seller))
+    pinned, rest = rows[0], rows[1:]
+    first = (max(page, 1) - 1) * AOD_PER_PAGE
+    html = [AOD_HEADER.format(title=fake_title(asin), total=len(rows))] if page <= 1 else []
+    for n, (p, condition, seller) in enumerate(
+        ([pinned] if page <= 1 else []) + rest[first:first + AOD_PER_PAGE]
+    ):
+        pinned_row = page <= 1 and n == 0
+        html.append(AOD_OFFER.format(
+            id="aod-pinned-offer" if pinned_row else "aod-offer",
+            price=p, condition=condition, seller=seller,
+        ))
+    return "".join(html) + ("</div>" if page <= 1 else "")
+
+
+def search_results(page: int) -> str:
+    first = (max(page, 1) - 1) * SEARCH_RESULTS
+    cards = []
+    for i, n in enumerate(range(first, first + SEARCH_RESULTS)):
+        asin = fake_asin(n)
+        price = fake_price(asin)
+        cards.append(SEARCH_CARD.format(
+            asin=asin, i=i, title=fake_title(asin), price=price,
+            list_price=price * 1.25, filler="x" * 2000,
+        ))
+    return (
+        '<html><head><title>Amazon.com : fake</title></head><body><div class="s-main-slot">\n'
+        + "".join(cards) + "</div></body></html>"
+    )
+
+
+def camel_top_drops(offset: int) -> str:
+    cards = []
+    for n in range(offset, offset + CAMEL_DEALS):
+        asin = fake_asin(n)
+        new = fake_price(asin)
+        pct = 20 + n % 50
+        cards.append(CAMEL_CARD.format(
+            title=fake_title(asin), old=new * 100 / (100 - pct), new=new,
+            pct=pct, asin=asin, filler="x" * 200,
+        ))
+    return (
+        "<html><head><title>Top Price Drops | camelcamelcamel</title></head><body>\n"
+        + "".join(cards) + "</body></html>"
+    )
+
+
+def camel_product(asin: str) -> str:
+    new = fake_price(asin)
+    return CAMEL_PRODUCT_PAGE.format(title=fake_title(asin), old=new * 1.5, new=new)
+
+
+def slickdeals_rss(mode: str, offset: int) -> str:
+    items = []
+    for n in range(offset + RSS_ITEMS - 1, offset - 1, -1):
+        items.append(RSS_ITEM.format(
+            title=f"{mode.title()} deal {n} ${fake_price(fake_asin(n)):.2f} at Amazon",
+            thread=18_000_000 + n, slug=f"{mode}-deal-{n}", likes=n % 40,
+        ))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:slash="http://purl.org/rss/1.0/modules/slash/">'
+        f"<channel><title>Slickdeals {mode.title()}</title>{''.join(items)}</channel></rss>"
+    )
+
+
+# ---------- Server ----------
+
+class FakeOriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body, ctype: str = "text/html; charset=utf-8",
+              route: str = "other", headers: Optional[dict] = None,
+              set_cookie: bool = False) -> None:
+        data = body.encode() if isinstance(body, str) else body
+        self.server.count(route, status)
+        self.send_response(status)
+        for k, v in (headers or {"Content-Type": ctype}).items():
+            if k.lower() not in ("server", "date"):  # send_response adds its own
+                self.send_header(k, v)
+        if set_cookie:
+            self.send_header(
+                "Set-Cookie",
+                f"session-id={random.randrange(10**9):09d}; Path=/; Max-Age=31536000",
+            )
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _target(self) -> str:
+        if self.path.startswith("http"):
+            parts = urlsplit(self.path)
+            return parts.path + ("?" + parts.query if parts.query else "")
+        return self.path
+
+    def do_GET(self) -> None:
+        target = self._target()
+        path = urlsplit(target).path
+        if path == "/__stats":
+            self._send(200, json.dumps(self.server.snapshot()), "application/json")
+            return
+        if BOT_RE.match(path):
+            self._telegram(path)
+            return
+
+        srv = self.server
+        if srv.latency or srv.jitter:
+            time.sleep(srv.latency + random.uniform(0, srv.jitter))
+        if srv.p503 and random.random() < srv.p503:
+            self._send(503, "<html><title>Service Unavailable</title></html>", route="injected_503")
+            return
+
+        if srv.cassette_dir:
+            recording = load_recording(target, srv.cassette_dir)
+            if recording is not None:
+                status, headers, body = recording
+                self._send(status, body, headers=headers, route="cassette")
+                return
+
+        m = ASIN_RE.search(path)
+        aod = path.startswith("/gp/product/ajax/aodAjaxMain")
+        query = parse_qs(urlsplit(target).query)
+        if aod:
+            m = re.fullmatch(r"([A-Z0-9]{10})", query.get("asin", [""])[0])
+        cold = "session-id=" not in (self.headers.get("Cookie") or "")
+        if path == "/":
+            self._send(200, "<html><title>Amazon.com</title></html>", route="home",
+                       set_cookie=cold)
+        elif "/dp/" in path or "/offer-listing/" in path or aod:
+            if not m:
+                self._send(404, "<html><title>Not Found</title></html>")
+                return
+            pcaptcha = srv.pcaptcha_cold if cold and srv.pcaptcha_cold else srv.pcaptcha
+            if pcaptcha and random.random() < pcaptcha:
+                self._send(200, CAPTCHA_PAGE, route="injected_captcha", set_cookie=cold)
+                return
+            if cold and srv.cold_redirect:
+                self._send(302, b"", headers={"Location": target}, route="cold_redirect",
+                           set_cookie=True)
+                return
+            asin = m.group(1)
+            price = fake_price(asin)
+            if aod:
+                page = query.get("pageno", ["1"])[0]
+                body = aod_offers(asin, int(page) if page.isdigit() else 1)
+            elif "/offer-listing/" in path:
+                body = OFFERS_PAGE.format(price=price)
+            else:
+                embedded = TWISTER_DATA.format(price=price) if ord(asin[-1]) % 2 else ""
+                body = PRODUCT_PAGE.format(
+                    title=fake_title(asin), price=price, embedded=embedded,
+                    twister=twister(asin, srv.family_size),
+                )
+            self._send(200, body, route="amazon", set_cookie=cold)
+        elif path == "/s":
+            page = query.get("page", ["1"])[0]
+            self._send(200, search_results(int(page) if page.isdigit() else 1),
+                       route="amazon_list", set_cookie=cold)
+        elif path.endswith("/top_drops"):
+            self._send(200, camel_top_drops(srv.rotation("camel")), route="camel")
+        elif path.startswith("/product/") and m:
+            self._send(200, camel_product(m.group(1)), route="camel_product")
+        elif path == "/newsearch.php":
+            mode = query.get("mode", ["frontpage"])[0]
+            self._send(
+                200, slickdeals_rss(mode, srv.rotation(f"rss:{mode}")),
+                "application/rss+xml; charset=utf-8", route="slickdeals",
+            )
+        else:
+            self._send(404, "<html><title>Not Found</title></html>")
+
+    def do_POST(self) -> None:
+        path = urlsplit(self._target()).path
+        if BOT_RE.match(path):
+            self._telegram(path)
+        else:
+            self._send(404, "<html><title>Not Found</title></html>")
+
+    def _telegram(self, path: str) -> None:
+        method = BOT_RE.match(path).group(1)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if "json" in (self.headers.get("Content-Type") or ""):
+            params = json.loads(raw or b"{}")
+        else:
+            params = {k: v[0] for k, v in parse_qs(raw.decode()).items()}
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "fake", "username": "fake_bot"}
+        else:
+            chat_id = params.get("chat_id", 0)
+            result = {
+                "message_id": self.server.next_message_id(),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id) if str(chat_id).lstrip("-").isdigit() else 0,
+                         "type": "private"},
+                "text": params.get("text", ""),
+            }
+        self._send(200, json.dumps({"ok": True, "result": result}), "application/json",
+                   route=f"telegram:{method}")
+
+
+class FakeOriginServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, p503=0.0, pcaptcha=0.0,
+                 cassette_dir=None, pcaptcha_cold=0.0, cold_redirect=False, family_size=0):
+        super().__init__(address, FakeOriginHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.p503 = p503
+        self.pcaptcha = pcaptcha
+        self.cassette_dir = cassette_dir
+        self.pcaptcha_cold = pcaptcha_cold
+        self.cold_redirect = cold_redirect
+        self.family_size = family_size
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._rotations: Counter = Counter()
+        self._message_id = 0
+
+    def count(self, route: str, status: int) -> None:
+        with self._lock:
+            self._counts[f"{route} {status}"] += 1
+
+    def rotation(self, feed: str) -> int:
+        """Offset into the generated list; advances on every request."""
+        with self._lock:
+            offset = self._rotations[feed] * ROTATE_PER_REQUEST
+            self._rotations[feed] += 1
+        return offset
+
+    def next_message_id(self) -> int:
+        with self._lock:
+            self._message_id += 1
+            return self._message_id
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+          jitter: float = 0.0, p503: float = 0.0, pcaptcha: float = 0.0,
+          cassette_dir: Optional[str] = None, pcaptcha_cold: float = 0.0,
+          cold_redirect: bool = False, family_size: int = 0) -> FakeOriginServer:
+    """Start the fake origin on a daemon thread and return the server."""
+    server = FakeOriginServer(
+        (host, port), latency, jitter, p503, pcaptcha, cassette_dir,
+        pcaptcha_cold, cold_redirect, family_size,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds per site request")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra uniform 0..N seconds")
+    ap.add_argument("--p503", type=float, default=0.0, help="fraction of 503 responses")
+    ap.add_argument("--pcaptcha", type=float, default=0.0, help="fraction of Amazon CAPTCHAs")
+    ap.add_argument("--pcaptcha-cold", type=float, default=0.0,
+                    help="CAPTCHA fraction for requests without a session cookie")
+    ap.add_argument("--cold-redirect", action="store_true",
+                    help="302 cookieless Amazon requests once to set the cookie")
+    ap.add_argument("--cassettes", help="serve recordings from this directory first")
+    ap.add_argument("--family-size", type=int, default=0,
+                    help="group fake ASINs into variation families of this size")
+    args = ap.parse_args()
+    srv = serve(args.host, args.port, args.latency, args.jitter,
+                args.p503, args.pcaptcha, args.cassettes,
+                args.pcaptcha_cold, args.cold_redirect, args.family_size)
+    print(
+        f"Fake origin on {base_url(srv)} (latency {args.latency}s +{args.jitter}s, "
+        f"503 {args.p503:.0%}, captcha {args.pcaptcha:.0%})"
+    )
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Record/replay layer under fetch_html.
+
+    TRACKER_HTTP_MODE=live     (default) plain requests.get
+    TRACKER_HTTP_MODE=record   fetch live and save every response
+    TRACKER_HTTP_MODE=replay   answer from recordings only, no network
+
+Recordings go to TRACKER_CASSETTE_DIR (default "cassettes"), one
+<key>.json (url, status, headers) plus <key>.body per request, keyed
+by path+query so fake_origin.py can serve the same files whatever host
+it runs on.
+"""
+
+import hashlib
+import json
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+MODE = os.environ.get("TRACKER_HTTP_MODE", "live")
+CASSETTE_DIR = os.environ.get("TRACKER_CASSETTE_DIR", "cassettes")
+
+# The stored body is already decoded, so these would no longer be true
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+def cassette_key(url: str) -> str:
+    parts = urlsplit(url)
+    target = parts.path + ("?" + parts.query if parts.query else "")
+    return hashlib.sha1(target.encode()).hexdigest()
+
+
+def save_response(url: str, resp: requests.Response, directory: str = CASSETTE_DIR) -> None:
+    os.makedirs(directory, exist_ok=True)
+    key = cassette_key(url)
+    with open(os.path.join(directory, key + ".body"), "wb") as f:
+        f.write(resp.content)
+    meta = {
+        "url": url,
+        "status": resp.status_code,
+        "headers": {
+            k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS
+        },
+    }
+    tmp = os.path.join(directory, key + ".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(directory, key + ".json"))
+
+
+def load_recording(url: str, directory: str = CASSETTE_DIR) -> Optional[tuple]:
+    """Return (status, headers, body) for a recorded URL, or None."""
+    key = cassette_key(url)
+    meta_path = os.path.join(directory, key + ".json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    with open(os.path.join(directory, key + ".body"), "rb") as f:
+        body = f.read()
+    return meta["status"], meta["headers"], body
+
+
+def load_response(url: str, directory: str = CASSETTE_DIR) -> Optional[requests.Response]:
+    recording = load_recording(url, directory)
+    if recording is None:
+        return None
+    status, headers, body = recording
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers = CaseInsensitiveDict(headers)
+    resp._content = body
+    resp.url = url
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    return resp
+
+
+def get(url: str, session: Optional[requests.Session] = None, **kwargs) -> requests.Response:
+    """requests.get (or session.get) with the TRACKER_HTTP_MODE behaviour above."""
+    if MODE == "replay":
+        resp = load_response(url)
+        if resp is None:
+            raise requests.exceptions.ConnectionError(f"No recording for {url}")
+        return resp
+    resp = (session or requests).get(url, **kwargs)
+    if MODE == "record":
+        save_response(url, resp)
+    return resp
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Structured, sampled, non-blocking logging for the tracker.
+
+    logger = setup_logging("amazon_tracker.log", sample={"check_start": 20})
+    logger.info("Checking %s", url, extra={"event": "check_start", "url": url})
+
+- Messages use %-style args, so nothing is formatted for records that
+  are filtered by level or dropped by sampling.
+- `extra={"event": ...}` names the event; any other extra keys become
+  JSON fields. Records without an event use the calling function name.
+- Events listed in `sample` keep 1 record in N, decided before the
+  record is even built; kept records carry "sample": N so counts can
+  be scaled back up.
+- The hot loop only enqueues the record. Formatting and file I/O happen
+  on a listener thread, and if the queue fills up, records are dropped
+  (and counted) rather than blocking.
+- Forked children (parse pool, sharded workers) send their records to
+  the parent over a multiprocessing queue, so one process writes and
+  rotates the file.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+from metrics import counter
+
+LOG_DROPPED = counter("tracker_log_dropped_total", "Log records dropped (queue full)")
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "event", "sample"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, event, msg and extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": getattr(record, "event", record.funcName),
+            "msg": record.getMessage(),
+        }
+        sample = getattr(record, "sample", None)
+        if sample:
+            out["sample"] = sample
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:  # formatted in the child that logged it
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class Sampler(logging.Filter):
+    """Keep every Nth record of the events in `rates` (WARNING+ always kept)."""
+
+    def __init__(self, rates: Dict[str, int]) -> None:
+        super().__init__()
+        self.rates = {event: n for event, n in rates.items() if n > 1}
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def keep(self, event: Optional[str], level: int) -> Optional[int]:
+        """0 = drop, N = keep as a 1-in-N sample, None = not sampled."""
+        n = self.rates.get(event)
+        if n is None or level >= logging.WARNING:
+            return None
+        with self._lock:
+            seen = self._seen.get(event, 0)
+            self._seen[event] = seen + 1
+        return 0 if seen % n else n
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        n = self.keep(getattr(record, "event", None), record.levelno)
+        if n:
+            record.sample = n
+        return n != 0
+
+
+class SampledLogger(logging.Logger):
+    """Logger that drops sampled-out calls before a LogRecord is built.
+
+    Building the record (caller lookup included) is most of the cost of
+    a log call, so a Filter, which only sees finished records, saves
+    little on the events worth sampling.
+    """
+
+    sampler: Optional[Sampler] = None
+
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False,
+             stacklevel=1):
+        if self.sampler is not None and extra:
+            n = self.sampler.keep(extra.get("event"), level)
+            if n == 0:
+                return
+            if n:
+                extra = {**extra, "sample": n}
+        super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel + 1)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() renders the message in the caller's thread so the
+    record can be pickled; an in-process queue doesn't need that. Once a
+    forked child switches to the parent's queue (`to_parent`), only the
+    message and traceback are rendered, and extra fields stay fields.
+    """
+
+    to_parent = False
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not self.to_parent:
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+def setup_logging(
+    path: str,
+    name: str = "AmazonTracker",
+    level: int = logging.INFO,
+    fmt: str = "json",
+    sample: Optional[Dict[str, int]] = None,
+    max_queue: int = 10000,
+) -> logging.Logger:
+    """Route the root logger through a queue to a rotating file; return `name`."""
+    file_handler = RotatingFileHandler(
+        path, maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+    )
+    if fmt == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        )
+
+    queue_handler = _DeferredQueueHandler(queue.Queue(max_queue))
+    children = multiprocessing.Queue(max_queue)
+    listeners = [
+        QueueListener(queue_handler.queue, file_handler),
+        QueueListener(children, file_handler),
+    ]
+    for listener in listeners:
+        listener.start()
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    parent = os.getpid()
+
+    def to_parent_in_child() -> None:
+        # No listener threads here; a handler of our own would rotate the
+        # parent's file under it
+        queue_handler.queue = children
+        queue_handler.to_parent = True
+
+    def stop() -> None:
+        if os.getpid() == parent:
+            for listener in listeners:
+                listener.stop()
+
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=to_parent_in_child)
+    atexit.register(stop)
+
+    logging.setLoggerClass(SampledLogger)
+    try:
+        logger = logging.getLogger(name)
+    finally:
+        logging.setLoggerClass(logging.Logger)
+    if sample:
+        sampler = Sampler(sample)
+        if isinstance(logger, SampledLogger):
+            logger.sampler = sampler
+        else:  # created before setup_logging ran
+            logger.addFilter(sampler)
+    return logger
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""On-disk store of fetched pages for offline re-parsing.
+
+Bodies are zlib-compressed and stored once per sha256 of the raw bytes
+(<dir>/objects/ab/abcd...), so an offers page that hasn't changed since
+the last check costs an index row, not another copy. A SQLite index
+records every fetch (url, hash, time, status) and answers "latest body
+for this URL". When the blobs outgrow `max_bytes`, the least recently
+fetched ones are dropped together with the fetches that point at them.
+
+    store = PageStore("pages", max_bytes=500 * 1024 * 1024)
+    store.put(url, resp.content, resp.status_code)
+    body = store.latest_body(url)
+    for fetch in store.fetches(since=time.time() - 86400):
+        html = store.get(fetch.hash)
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+# metrics.py and profiler.py are shared by the pollers and live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics import counter, gauge
+
+PAGES_STORED = counter(
+    "tracker_page_store_puts_total", "Pages written to the store", ["result"]
+)
+PAGE_STORE_BYTES = gauge("tracker_page_store_bytes", "Compressed bytes held in the page store")
+
+EVICT_TO = 0.9  # after eviction the store is at most this fraction of max_bytes
+
+
+@dataclass
+class Fetch:
+    url: str
+    hash: str
+    fetched_at: float
+    status: int
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL,
+    last_fetched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    status INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fetches_url ON fetches (url, fetched_at);
+CREATE INDEX IF NOT EXISTS fetches_hash ON fetches (hash);
+CREATE INDEX IF NOT EXISTS fetches_time ON fetches (fetched_at);
+CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (last_fetched);
+"""
+
+
+class PageStore:
+    """Content-addressed page bodies plus a fetch index, bounded in size.
+
+    Safe to share between threads; each process (sharded workers, parse
+    pool children) opens its own SQLite connection on first use.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 500 * 1024 * 1024, level: int = 6) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.level = level
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None or self._pid != os.getpid():
+            db = sqlite3.connect(
+                os.path.join(self.root, "index.db"),
+                timeout=30, isolation_level=None, check_same_thread=False,
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db, self._pid = db, os.getpid()
+        return self._db
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    # ---------- Writing ----------
+
+    def put(self, url: str, body: bytes, status: int = 200, ts: Optional[float] = None) -> str:
+        """Record one fetch of `url`; returns the body's sha256."""
+        digest = hashlib.sha256(body).hexdigest()
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                known = db.execute(
+                    "UPDATE blobs SET last_fetched = max(last_fetched, ?) WHERE hash = ?",
+                    (ts, digest),
+                ).rowcount
+                if not known:
+                    size = self._write_blob(digest, body)
+                    db.execute(
+                        "INSERT INTO blobs (hash, size, raw_size, last_fetched) VALUES (?, ?, ?, ?)",
+                        (digest, size, len(body), ts),
+                    )
+                db.execute(
+                    "INSERT INTO fetches (url, hash, fetched_at, status) VALUES (?, ?, ?, ?)",
+                    (url, digest, ts, status),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            PAGES_STORED.inc(result="dedup" if known else "new")
+            if not known:
+                self._evict(db)
+        return digest
+
+    def _write_blob(self, digest: str, body: bytes) -> int:
+        path = self._path(digest)
+        data = zlib.compress(body, self.level)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return len(data)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop least recently fetched blobs until under EVICT_TO x max_bytes.
+
+        Victims are picked, deleted and their files removed all inside one
+        write transaction, so another process's put() can't dedup onto a
+        victim or re-write its file half way through.
+        """
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            total = db.execute("SELECT coalesce(sum(size), 0) FROM blobs").fetchone()[0]
+            if total > self.max_bytes:
+                target = total - int(self.max_bytes * EVICT_TO)
+                freed = 0
+                victims = []
+                cur = db.execute(
+                    "SELECT hash, size, last_fetched FROM blobs ORDER BY last_fetched"
+                )
+                for digest, size, last_fetched in cur:
+                    victims.append((digest, size, last_fetched))
+                    freed += size
+                    if freed >= target:
+                        break
+                cur.close()
+                for digest, size, last_fetched in victims:
+                    # Only if not fetched again since it was picked
+                    if db.execute(
+                        "DELETE FROM blobs WHERE hash = ? AND last_fetched <= ?",
+                        (digest, last_fetched),
+                    ).rowcount:
+                        db.execute("DELETE FROM fetches WHERE hash = ?", (digest,))
+                        total -= size
+                        try:
+                            os.remove(self._path(digest))
+                        except FileNotFoundError:
+                            pass
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        PAGE_STORE_BYTES.set(total)
+
+    # ---------- Reading ----------
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._path(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+    def latest(self, url: str) -> Optional[Fetch]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT url, hash, fetched_at, status FROM fetches "
+                "WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,),
+            ).fetchone()
+        return Fetch(*row) if row else None
+
+    def latest_body(self, url: str) -> Optional[bytes]:
+        fetch = self.latest(url)
+        return self.get(fetch.hash) if fetch else None
+
+    def fetches(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        url_like: Optional[str] = None,
+    ) -> Iterator[Fetch]:
+        """Fetches in time order, optionally within [since, until) and matching
+        a SQL LIKE pattern on the URL."""
+        where, args = [], []
+        if since is not None:
+            where.append("fetched_at >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("fetched_at < ?")
+            args.append(until)
+        if url_like:
+            where.append("url LIKE ?")
+            args.append(url_like)
+        sql = "SELECT url, hash, fetched_at, status FROM fetches"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            rows = self._conn().execute(sql + " ORDER BY fetched_at", args).fetchall()
+        for row in rows:
+            yield Fetch(*row)
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._conn()
+            blobs, size, raw = db.execute(
+                "SELECT count(*), coalesce(sum(size), 0), coalesce(sum(raw_size), 0) FROM blobs"
+            ).fetchone()
+            fetches, fetched_raw = db.execute(
+                "SELECT count(*), coalesce(sum(b.raw_size), 0) "
+                "FROM fetches f JOIN blobs b ON b.hash = f.hash"
+            ).fetchone()
+        return {
+            "fetches": fetches,
+            "blobs": blobs,
+            "bytes": size,
+            "raw_bytes": raw,
+            "fetched_raw_bytes": fetched_raw,
+        }
+
+
+def open_store(root: str, max_mb: float) -> Optional[PageStore]:
+    """PageStore for config values; an empty root disables the store."""
+    if not root:
+        return None
+    return PageStore(root, max_bytes=int(max_mb * 1024 * 1024))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Inspect the page store")
+    ap.add_argument("root")
+    ap.add_argument("url", nargs="?", help="print the latest body stored for this URL")
+    args = ap.parse_args()
+    store = PageStore(args.root, max_bytes=1 << 62)
+    if args.url:
+        body = store.latest_body(args.url)
+        if body is None:
+            sys.exit(f"nothing stored for {args.url}")
+        sys.stdout.buffer.write(body)
+    else:
+        s = store.stats()
+        ratio = s["fetched_raw_bytes"] / s["bytes"] if s["bytes"] else 0
+        print(
+            f"{s['fetches']} fetches, {s['blobs']} distinct bodies, "
+            f"{s['bytes'] / 1e6:.1f} MB on disk for {s['fetched_raw_bytes'] / 1e6:.1f} MB "
+            f"fetched ({ratio:.1f}x)"
+        )
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import asyncio
+import logging
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from metrics import histogram
+
+T = TypeVar("T")
+
+PARSE_SECONDS = histogram(
+    "tracker_parse_seconds", "Page parse time incl. pool handoff", ["parser"]
+)
+
+
+# ---------- Worker setup ----------
+
+def _init_parse_worker(log_level: int) -> None:
+    # Workers share amazon_tracker.log with the parent; keep them to
+    # warnings so only one process writes the per-item INFO lines.
+    logging.getLogger("AmazonTracker").setLevel(log_level)
+    # Profiling signals are for the parent; don't die on a `systemctl kill`
+    for sig in ("SIGUSR1", "SIGUSR2"):
+        if hasattr(signal, sig):
+            signal.signal(getattr(signal, sig), signal.SIG_IGN)
+
+
+# ---------- Parse stage ----------
+
+class ParseStage:
+    """Run CPU-bound page parsers off the event loop.
+
+    mode is "process" (default; BeautifulSoup holds the GIL, so only
+    separate processes scale across cores), "thread" (for parsers that
+    release the GIL) or "inline" (no executor, handy for debugging).
+    Parsers must be module-level functions so they can be pickled by
+    reference; the page body goes over as a single bytes/str argument
+    and only the small (name, price) tuple comes back.
+    """
+
+    def __init__(self, mode: str = "process", workers: Optional[int] = None) -> None:
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+        if mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_parse_worker,
+                initargs=(logging.WARNING,),
+            )
+        elif mode == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="parse"
+            )
+        elif mode != "inline":
+            raise ValueError(f"Unknown parse mode: {mode}")
+
+    async def run(self, fn: Callable[..., T], body, *args) -> T:
+        with PARSE_SECONDS.time(parser=fn.__name__):
+            if self._executor is None:
+                return fn(body, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, body, *args)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Re-run the parsers over pages kept by the page store (PAGE_STORE_DIR).
+
+Each stored fetch is routed to a parser by its URL (/gp/offer-listing/
+-> offers, aodAjaxMain -> all-offers, /dp/ -> product page, /s?,
+/hz/wishlist/ -> search/list page, top_drops -> camel,
+newsearch.php/rss -> Slickdeals) unless --parser forces one. Pages are
+parsed in a process pool; workers read and decompress the bodies
+themselves, so only URLs go out and small result dicts come back.
+Results stream into a JSONL history file, and with --state the newest
+price per watchlist URL is written into the tracker state file where it
+is newer than the last live check. Stop the tracker first: it keeps the
+state in memory and would write its own copy back over the result.
+
+    python3 reextract.py --since 24h
+    python3 reextract.py --store pages --url-like '%/dp/%' --state amazon_state.json
+    python3 reextract.py --parser amazon_offers --workers 8 --out /tmp/offers.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# metrics.py, profiler.py and script_loader.py live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PAGE_STORE_DIR, STATE_FILE, VALID_SELLERS_FILE
+from page_store import PageStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------- Parsers ----------
+# name -> (URL pattern that routes to it, loader returning body -> list of records)
+
+def _load_amazon(fn_name: str, sellers: set) -> Callable[[bytes], List[dict]]:
+    import amazon_price_tracker as apt
+
+    fn = getattr(apt, fn_name)
+
+    def parse(body: bytes) -> List[dict]:
+        name, price = fn(body, sellers)
+        return [{"name": name, "price": price}]
+    return parse
+
+
+def _load_listing(sellers: set) -> Callable[[bytes], List[dict]]:
+    from amazon_price_tracker import get_prices_listing
+
+    def parse(body: bytes) -> List[dict]:
+        return [
+            {"asin": asin, "name": name, "price": price}
+            for asin, (price, name) in get_prices_listing(body).items()
+        ]
+    return parse
+
+
+def _load_script(relpath: str, name: str, fn_name: str, **kwargs) -> Callable:
+    # camel3/ and slickdeals/ have their own constants modules
+    from script_loader import load_module
+
+    fn = getattr(load_module(os.path.join(ROOT, relpath), name), fn_name)
+
+    def parse(body: bytes) -> List[dict]:
+        return [asdict(rec) for rec in fn(body.decode(errors="replace"), **kwargs)]
+    return parse
+
+
+PARSERS: Dict[str, Tuple[str, Callable[[set], Callable[[bytes], List[dict]]]]] = {
+    "amazon_offers": (r"/gp/offer-listing/", lambda s: _load_amazon("get_price_name_offers", s)),
+    "amazon_aod": (r"/aodAjaxMain/", lambda s: _load_amazon("get_price_name_aod", s)),
+    "amazon_dp": (r"/dp/", lambda s: _load_amazon("get_price_name_amazon", s)),
+    "amazon_listing": (r"amazon\.[a-z.]+/(?:s\?|hz/wishlist/)", _load_listing),
+    "camel": (
+        r"camelcamelcamel|/top_drops",
+        lambda s: _load_script(
+            "camel3/camel_curl_poller.py", "reextract_camel", "parse_deals", enrich=False
+        ),
+    ),
+    "slickdeals": (
+        r"slickdeals|newsearch\.php",
+        lambda s: _load_script(
+            "slickdeals/sd_curl_poller.py", "reextract_sd", "parse_items", source="reextract"
+        ),
+    ),
+}
+
+
+def route(url: str, forced: Optional[str] = None) -> Optional[str]:
+    if forced:
+        return forced
+    for name, (pattern, _) in PARSERS.items():
+        if re.search(pattern, url):
+            return name
+    return None
+
+
+# ---------- Worker side ----------
+
+_store: Optional[PageStore] = None
+_sellers: set = set()
+_loaded: Dict[str, Callable[[bytes], List[dict]]] = {}
+
+
+def _init_worker(store_root: str, sellers: set) -> None:
+    global _store, _sellers
+    _store = PageStore(store_root, max_bytes=1 << 62)
+    _sellers = sellers
+    # The camel/Slickdeals parsers print per page
+    sys.stdout = open(os.devnull, "w")
+
+
+def _parse_batch(batch: List[tuple]) -> List[dict]:
+    out = []
+    for parser, url, digest, fetched_at in batch:
+        base = {"parser": parser, "url": url, "fetched_at": fetched_at, "hash": digest}
+        body = _store.get(digest)
+        if body is None:
+            out.append({**base, "error": "evicted"})
+            continue
+        if parser not in _loaded:
+            _loaded[parser] = PARSERS[parser][1](_sellers)
+        try:
+            records = _loaded[parser](body)
+        except Exception as e:
+            out.append({**base, "error": f"{type(e).__name__}: {e}"[:200], "bytes": len(body)})
+            continue
+        out.append({**base, "bytes": len(body), "records": records})
+    return out
+
+
+# ---------- Results ----------
+
+# An offers page and a product page fetched this close together belong
+# to the same check (a check fetches one right after the other)
+SAME_CHECK_SECONDS = 300
+
+
+# Offers pages are keyed by ASIN, product pages by their URL. Listing
+# prices are unconfirmed (no seller check), so they don't feed --state.
+_OFFERS_ASIN = {
+    "amazon_offers": re.compile(r"/gp/offer-listing/([A-Z0-9]{10})"),
+    "amazon_aod": re.compile(r"[?&]asin=([A-Z0-9]{10})"),
+}
+
+
+def state_key(parser: str, url: str) -> Optional[str]:
+    """The `latest` key a result feeds, or None (also for URLs a forced
+    --parser can't place)."""
+    if parser == "amazon_dp":
+        return url
+    m = _OFFERS_ASIN[parser].search(url) if parser in _OFFERS_ASIN else None
+    return m.group(1) if m else None
+
+
+def apply_to_state(path: str, latest: Dict[str, tuple]) -> int:
+    """Write re-extracted prices into the tracker state; returns URLs updated.
+
+    `latest` maps a dp URL or offers ASIN to (fetched_at, price). Only
+    results newer than the URL's last check are applied. Like a live
+    check, the lower of the offers and buybox prices wins, but only when
+    both were fetched within SAME_CHECK_SECONDS of each other; otherwise
+    the newer one stands alone.
+
+    The tracker keeps its state in memory and writes it back whole, so it
+    must be stopped while this runs; a state file that changes under us
+    is left alone.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    with open(path) as f:
+        state = json.load(f)
+    updated = 0
+    for key in list(state):
+        if re.search(r":[a-z_]+$", key):
+            continue  # url:fails, url:checked_at, ...
+        m = re.search(r"/dp/([A-Z0-9]{10})", key)
+        if not m:
+            continue
+        found = [r for r in (latest.get(key), latest.get(m.group(1))) if r and r[1]]
+        if not found:
+            continue
+        fetched_at = max(r[0] for r in found)
+        if fetched_at <= state.get(f"{key}:checked_at", 0):
+            continue
+        state[key] = min(r[1] for r in found if fetched_at - r[0] <= SAME_CHECK_SECONDS)
+        state[f"{key}:checked_at"] = fetched_at
+        updated += 1
+    if os.stat(path).st_mtime_ns != mtime:
+        raise RuntimeError(f"{path} changed while re-extracting; is the tracker running?")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+    return updated
+
+
+def parse_since(value: str) -> float:
+    """"24h", "90m", "7d" ago, or a Unix timestamp."""
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value)
+    if m:
+        scale = {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+        return time.time() - float(m.group(1)) * scale
+    return float(value)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Re-parse stored pages")
+    ap.add_argument("--store", default=PAGE_STORE_DIR or "pages")
+    ap.add_argument("--since", type=parse_since, help='e.g. "24h", "7d" or a Unix time')
+    ap.add_argument("--until", type=parse_since)
+    ap.add_argument("--url-like", help="SQL LIKE pattern on the URL")
+    ap.add_argument("--parser", choices=sorted(PARSERS), help="ignore URL routing")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--batch", type=int, default=32, help="pages per worker task")
+    ap.add_argument("--out", default="reextract_history.jsonl", help="append results here")
+    ap.add_argument("--state", nargs="?", const=STATE_FILE,
+                    help="also update this state file (stop the tracker first)")
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.store):
+        print(f"No page store at {args.store}", file=sys.stderr)
+        return 1
+    store = PageStore(args.store, max_bytes=1 << 62)
+    sellers = set()
+    if not args.parser or args.parser.startswith("amazon_"):
+        from amazon_price_tracker import load_valid_sellers
+
+        sellers = load_valid_sellers(VALID_SELLERS_FILE)
+
+    jobs, skipped = [], 0
+    for fetch in store.fetches(args.since, args.until, args.url_like):
+        parser = route(fetch.url, args.parser)
+        if parser is None:
+            skipped += 1
+            continue
+        jobs.append((parser, fetch.url, fetch.hash, fetch.fetched_at))
+    batches = [jobs[i:i + args.batch] for i in range(0, len(jobs), args.batch)]
+    print(f"{len(jobs)} pages to parse ({skipped} with no parser) on {args.workers} workers")
+
+    pages, nbytes, records = Counter(), 0, Counter()
+    errors = Counter()
+    latest: Dict[str, tuple] = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.store, sellers)
+    ) as pool, open(args.out, "a") as out:
+        for results in pool.map(_parse_batch, batches):
+            for res in results:
+                out.write(json.dumps(res, ensure_ascii=False) + "\n")
+                parser = res["parser"]
+                pages[parser] += 1
+                nbytes += res.get("bytes", 0)
+                if "error" in res:
+                    errors[parser] += 1
+                    continue
+                records[parser] += len(res["records"])
+                key = state_key(parser, res["url"])
+                if key and res["records"]:
+                    price = res["records"][0]["price"]
+                    if price and res["fetched_at"] >= latest.get(key, (0,))[0]:
+                        latest[key] = (res["fetched_at"], price)
+            done = sum(pages.values())
+            with contextlib.suppress(ZeroDivisionError):
+                rate = done / (time.perf_counter() - start)
+                print(f"\r  {done}/{len(jobs)} pages, {rate:.0f}/s", end="", flush=True)
+    elapsed = time.perf_counter() - start
+
+    total = sum(pages.values())
+    print(
+        f"\n{total} pages, {nbytes / 1e6:.1f} MB in {elapsed:.1f}s: "
+        f"{total / elapsed if elapsed else 0:.0f} pages/s, "
+        f"{nbytes / 1e6 / elapsed if elapsed else 0:.1f} MB/s -> {args.out}"
+    )
+    for parser in sorted(pages):
+        print(
+            f"  {parser:<15}{pages[parser]:>7} pages{records[parser]:>8} records"
+            f"{errors[parser]:>6} errors"
+        )
+    if args.state:
+        if os.path.exists(args.state):
+            try:
+                print(f"Updated {apply_to_state(args.state, latest)} URLs in {args.state}")
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                return 1
+        else:
+            print(f"No state file at {args.state}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+import os
+from typing import Optional, Tuple
+
+
+# ---------- mtime-polled file watcher ----------
+
+class FileWatcher:
+    """Report when a file has been modified since the last check.
+
+    Polls (mtime_ns, size) instead of using inotify so it works the same
+    on the Pi, on macOS and on network filesystems. A missing file counts
+    as its own signature, so deleting and recreating a file also fires.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._sig = self._signature()
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def changed(self) -> bool:
+        sig = self._signature()
+        if sig == self._sig:
+            return False
+        self._sig = sig
+        return True
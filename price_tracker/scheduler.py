@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+import heapq
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple
+
+
+# ---------- Per-item schedule ----------
+
+@dataclass
+class ScheduleEntry:
+    item: object
+    interval: float
+    next_due: float
+    fails: int = 0
+    checks: int = 0
+    changes: int = 0
+    last_checked: Optional[float] = None
+    last_changed: Optional[float] = None
+
+
+class ItemScheduler:
+    """Priority queue of watch items keyed on next-due time.
+
+    Each item keeps its own check interval. A price change halves it
+    (down to min_interval), a stable check stretches it by `backoff`
+    (up to max_interval), and fetch failures push the next check out
+    exponentially without forgetting the learned interval.
+    """
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        backoff: float = 1.5,
+        jitter: float = 0.1,
+    ) -> None:
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self._entries: Dict[str, ScheduleEntry] = {}
+        # Removed while being checked: kept until record() so a re-add
+        # picks the running check back up instead of starting another
+        self._removed_in_flight: Dict[str, ScheduleEntry] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def _push(self, url: str, due: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, url))
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def add(
+        self,
+        item,
+        interval: Optional[float] = None,
+        due: Optional[float] = None,
+    ) -> None:
+        url = item.url
+        if url in self._entries:
+            return
+        entry = self._removed_in_flight.pop(url, None)
+        if entry is not None:
+            entry.item = item
+            self._entries[url] = entry
+            return
+        interval = self._clamp(interval or self.base_interval)
+        due = time.time() if due is None else due
+        self._entries[url] = ScheduleEntry(
+            item=item, interval=interval, next_due=due
+        )
+        self._push(url, due)
+
+    def remove(self, url: str) -> None:
+        # Heap slots are dropped lazily in _peek()
+        entry = self._entries.pop(url, None)
+        if entry is not None and entry.next_due == float("inf"):
+            self._removed_in_flight[url] = entry
+
+    def reschedule(self, url: str, due: float) -> None:
+        """Move an idle item's next check; items being checked are left alone."""
+        entry = self._entries.get(url)
+        if entry is None or entry.next_due == float("inf"):
+            return
+        entry.next_due = due
+        self._push(url, due)
+
+    def overdue(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return sum(1 for e in self._entries.values() if e.next_due <= now)
+
+    def get(self, url: str) -> Optional[ScheduleEntry]:
+        return self._entries.get(url)
+
+    def entries(self) -> List[ScheduleEntry]:
+        return list(self._entries.values())
+
+    def _peek(self) -> Optional[Tuple[float, str]]:
+        while self._heap:
+            due, _, url = self._heap[0]
+            entry = self._entries.get(url)
+            if entry is None or entry.next_due != due:
+                heapq.heappop(self._heap)
+                continue
+            return due, url
+        return None
+
+    def seconds_until_due(self, now: Optional[float] = None) -> Optional[float]:
+        head = self._peek()
+        if head is None:
+            return None
+        now = time.time() if now is None else now
+        return max(0.0, head[0] - now)
+
+    def pop_due(self, now: Optional[float] = None):
+        """Return the most overdue item, or None if nothing is due yet.
+
+        The item stays registered; call record() once it has been checked
+        to schedule its next run.
+        """
+        head = self._peek()
+        now = time.time() if now is None else now
+        if head is None or head[0] > now:
+            return None
+        heapq.heappop(self._heap)
+        entry = self._entries[head[1]]
+        entry.next_due = float("inf")
+        return entry.item
+
+    def record(
+        self, url: str, outcome: str, now: Optional[float] = None
+    ) -> Optional[float]:
+        """Adapt the interval after a check and reschedule the item.
+
+        outcome is one of "changed", "stable", "initial", "failed" or
+        "cooldown". Returns the delay until the next check.
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            self._removed_in_flight.pop(url, None)
+            return None
+        now = time.time() if now is None else now
+
+        if outcome == "failed":
+            entry.fails += 1
+            delay = self._clamp(entry.interval * 2 ** min(entry.fails, 6))
+        else:
+            entry.fails = 0
+            entry.checks += 1
+            entry.last_checked = now
+            if outcome == "changed":
+                entry.changes += 1
+                entry.last_changed = now
+                entry.interval = self._clamp(entry.interval / 2)
+            elif outcome == "stable":
+                entry.interval = self._clamp(entry.interval * self.backoff)
+            delay = entry.interval
+
+        delay = self._jittered(delay)
+        entry.next_due = now + delay
+        self._push(url, entry.next_due)
+        return delay
+
+
+# ---------- Rolling summaries ----------
+
+@dataclass
+class CheckEvent:
+    at: float
+    url: str
+    outcome: str
+    latency: Optional[float] = None
+
+
+class RollingWindow:
+    """Check outcomes over the trailing `window` seconds.
+
+    Replaces per-cycle summaries: at any moment the window holds what the
+    tracker did in the last hour, regardless of where items are in their
+    own schedules.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._events: deque = deque()
+
+    def add(
+        self,
+        url: str,
+        outcome: str,
+        latency: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        now = time.time() if now is None else now
+        self._events.append(CheckEvent(now, url, outcome, latency))
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._events and self._events[0].at < cutoff:
+            self._events.popleft()
+
+    def checks(self, now: Optional[float] = None) -> int:
+        self._prune(time.time() if now is None else now)
+        return len(self._events)
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, object]:
+        now = time.time() if now is None else now
+        self._prune(now)
+        outcomes: Dict[str, int] = {}
+        latencies: Dict[str, float] = {}
+        for ev in self._events:
+            outcomes[ev.outcome] = outcomes.get(ev.outcome, 0) + 1
+            if ev.latency is not None:
+                latencies[ev.url] = ev.latency
+        ordered = sorted(latencies.values())
+        return {
+            "checks": len(self._events),
+            "items": len({ev.url for ev in self._events}),
+            "outcomes": outcomes,
+            "latencies": latencies,
+            "latency_p50": ordered[len(ordered) // 2] if ordered else None,
+            "latency_max": ordered[-1] if ordered else None,
+        }
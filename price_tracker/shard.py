@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import bisect
+import hashlib
+from typing import Dict, List, Tuple
+
+
+# ---------- Consistent hashing ----------
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping ASINs to worker names.
+
+    Each worker owns `replicas` virtual points, so adding or removing a
+    worker only moves ~1/N of the ASINs and keeps per-worker caches,
+    cookies and rate limits meaningful across restarts.
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 64) -> None:
+        self.replicas = replicas
+        self._ring: List[Tuple[int, str]] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        for i in range(self.replicas):
+            bisect.insort(self._ring, (_hash(f"{node}#{i}"), node))
+
+    def remove(self, node: str) -> None:
+        self._ring = [(h, n) for h, n in self._ring if n != node]
+
+    def lookup(self, key: str) -> str:
+        if not self._ring:
+            raise ValueError("HashRing has no nodes")
+        idx = bisect.bisect(self._ring, (_hash(key), ""))
+        return self._ring[idx % len(self._ring)][1]
+
+    def distribution(self, keys: List[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for key in keys:
+            node = self.lookup(key)
+            counts[node] = counts.get(node, 0) + 1
+        return counts
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Coordinator/worker mode for large Amazon watchlists.
+
+The coordinator owns the scheduler and the state file. Due items are
+consistently hashed by ASIN onto N worker processes and handed out
+through a SQLite work queue; each worker checks its items with its own
+proxy and rate limit and posts the item's updated state slice back,
+which the coordinator merges into amazon_state.json.
+
+    python3 sharded_tracker.py --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import re
+import signal
+import time
+from typing import List, Optional, Tuple
+
+import amazon_price_tracker as apt
+from config import (
+    WATCHLIST_FILE,
+    STATE_FILE,
+    STATE_FLUSH_INTERVAL,
+    VALID_SELLERS_FILE,
+    SUMMARY_INTERVAL,
+    RELOAD_CHECK_INTERVAL,
+    PROXIES,
+    WORKER_MIN_GAP,
+    QUEUE_FILE,
+    METRICS_PORT,
+    PROFILE_DIR,
+    PROFILE_SECONDS,
+)
+from reloader import FileWatcher
+from scheduler import RollingWindow
+from shard import HashRing
+from work_queue import WorkQueue
+from metrics import counter, gauge, start_metrics_server
+from profiler import install_profiling_hooks
+
+logger = apt.logger
+
+# Claims not renewed for this long are assumed lost with a hung worker;
+# a worker renews its claim every CLAIM_RENEW_SECONDS while checking, as
+# one check can take many minutes of fetch timeouts and retries
+STALE_CLAIM_SECONDS = 600
+CLAIM_RENEW_SECONDS = 60
+RESULT_POLL = 0.2  # seconds between looks for finished jobs
+DISPATCH_CATCH_UP = 1.0  # seconds of missed dispatch slots made up at once
+
+WORKER_RESTARTS = counter(
+    "tracker_worker_restarts_total", "Sharded workers restarted after exiting", ["worker"]
+)
+
+
+def shard_key(url: str) -> str:
+    m = re.search(r"/dp/([A-Z0-9]{10})", url)
+    return m.group(1) if m else url
+
+
+# ---------- Worker ----------
+
+async def run_worker(
+    name: str,
+    queue_path: str,
+    proxy: Optional[str],
+    min_gap: float,
+    check_delay: Optional[Tuple[float, float]] = None,
+    metrics_port: int = 0,
+) -> None:
+    # One identity per worker, named after it so workers sharing a proxy
+    # (or all going direct) keep separate cookie jars; it paces its own
+    # checks (min_gap)
+    apt.set_fetch_proxy(proxy, rate=0, suffix=name)
+    start_metrics_server(metrics_port)
+    if check_delay is not None:
+        apt.CHECK_DELAY = check_delay
+    queue = WorkQueue(queue_path)
+    valid_sellers = apt.load_valid_sellers(VALID_SELLERS_FILE)
+    sellers_watcher = FileWatcher(VALID_SELLERS_FILE)
+    logger.info(
+        "Worker %s started (egress %s)", name, apt.EGRESS.identities[0].name,
+        extra={"event": "worker_started", "worker": name},
+    )
+
+    next_slot = 0.0
+    while True:
+        if sellers_watcher.changed():
+            valid_sellers = apt.load_valid_sellers(VALID_SELLERS_FILE) or valid_sellers
+
+        job = queue.claim(name)
+        if job is None:
+            await asyncio.sleep(0.2)
+            continue
+
+        # Per-identity rate limit
+        await asyncio.sleep(max(0.0, next_slot - time.time()))
+        next_slot = time.time() + min_gap
+
+        state = job.payload["state"]
+        renewer = asyncio.create_task(renew_claim(queue, job.id))
+        try:
+            outcome = await apt.check_item(
+                apt.WatchItem(site="amazon", url=job.url), state, valid_sellers
+            )
+        except Exception as e:
+            logger.error(
+                "Worker %s check failed for %s: %s", name, job.url, e,
+                extra={"event": "worker_check_failed", "worker": name, "url": job.url},
+            )
+            outcome = "failed"
+        finally:
+            renewer.cancel()
+        queue.complete(job.id, outcome, {"state": state})
+
+
+async def renew_claim(queue: WorkQueue, job_id: int) -> None:
+    while True:
+        await asyncio.sleep(CLAIM_RENEW_SECONDS)
+        queue.renew(job_id)
+
+
+def worker_main(
+    name: str,
+    queue_path: str,
+    proxy: Optional[str],
+    min_gap: float,
+    check_delay: Optional[Tuple[float, float]] = None,
+    metrics_port: int = 0,
+) -> None:
+    # A restarted worker is forked after the coordinator took over SIGTERM;
+    # put the default back so terminate() still stops it
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        asyncio.run(
+            run_worker(name, queue_path, proxy, min_gap, check_delay, metrics_port)
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def start_worker(
+    i: int,
+    queue_path: str,
+    min_gap: float = WORKER_MIN_GAP,
+    check_delay: Optional[Tuple[float, float]] = None,
+    metrics_port: int = METRICS_PORT,
+) -> multiprocessing.Process:
+    """Start worker w<i> on its proxy (and metrics port, if any)."""
+    name = f"w{i}"
+    proxy = PROXIES[i % len(PROXIES)] if PROXIES else None
+    port = metrics_port + 1 + i if metrics_port else 0
+    proc = multiprocessing.Process(
+        target=worker_main,
+        args=(name, queue_path, proxy, min_gap, check_delay, port),
+        name=f"tracker-{name}",
+        daemon=True,
+    )
+    proc.start()
+    return proc
+
+
+def start_workers(
+    n: int,
+    queue_path: str,
+    min_gap: float = WORKER_MIN_GAP,
+    check_delay: Optional[Tuple[float, float]] = None,
+    metrics_port: int = METRICS_PORT,
+) -> Tuple[HashRing, List[multiprocessing.Process]]:
+    procs = [start_worker(i, queue_path, min_gap, check_delay, metrics_port) for i in range(n)]
+    return HashRing([f"w{i}" for i in range(n)]), procs
+
+
+# ---------- Coordinator ----------
+
+async def coordinate(workers: int) -> None:
+    items = apt.load_watchlist(WATCHLIST_FILE)
+    if not items:
+        logger.info("No Amazon items in watchlist.", extra={"event": "watchlist_empty"})
+        return
+
+    state = apt.load_state(STATE_FILE)
+    apt.SELECTOR_STATS.seed(state)  # before the fork, so every worker starts ranked
+    scheduler = apt.build_scheduler(items, state)
+    window = RollingWindow(SUMMARY_INTERVAL)
+    writer = apt.StateWriter(STATE_FILE, state, STATE_FLUSH_INTERVAL)
+    watchlist_watcher = FileWatcher(WATCHLIST_FILE)
+
+    # Installed before the fork so each worker answers its own signals too
+    install_profiling_hooks(PROFILE_DIR, PROFILE_SECONDS)
+    if workers > max(1, len(PROXIES)):
+        # Each still gets its own cookie jar, but not its own IP
+        logger.warning(
+            "%d workers over %s: some share an IP, so the fleet's rate is "
+            "not spread over more addresses",
+            workers, f"{len(PROXIES)} proxies" if PROXIES else "a direct connection",
+            extra={"event": "workers_share_ip", "workers": workers, "proxies": len(PROXIES)},
+        )
+    queue = WorkQueue(QUEUE_FILE)
+    queue.clear()
+    ring, procs = start_workers(workers, QUEUE_FILE)
+    apt.publish_loop_gauges(scheduler, window)
+    depth_gauge = gauge("tracker_work_queue_depth", "Unfinished jobs", ["shard"])
+    start_metrics_server(METRICS_PORT)
+    logger.info(
+        "🚀 Sharded Amazon Tracker - %d workers, %d items, queue %s STARTED!",
+        workers, len(items), QUEUE_FILE,
+        extra={"event": "started", "items": len(items), "workers": workers},
+    )
+
+    next_slot = time.time()
+    next_summary = time.time() + SUMMARY_INTERVAL
+    next_reload = time.time() + RELOAD_CHECK_INTERVAL
+    # SIGTERM unwinds like Ctrl-C: workers stopped, state written
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        while True:
+            now = time.time()
+            # Fleet-wide pacing: N identities carry N times the single-process
+            # rate. Slots advance from the previous one, so every slot passed
+            # while sleeping is used; after an idle spell at most
+            # DISPATCH_CATCH_UP seconds' worth go out at once.
+            next_slot = max(next_slot, now - DISPATCH_CATCH_UP)
+            while next_slot <= now:
+                item = scheduler.pop_due(now)
+                if item is None:
+                    break
+                queue.put(
+                    ring.lookup(shard_key(item.url)),
+                    item.url,
+                    {"state": apt.item_state(state, item.url)},
+                )
+                next_slot += apt.check_gap(len(scheduler)) / workers
+
+            results = queue.results()
+            for res in results:
+                prev_checked = state.get(f"{res.url}:checked_at")
+                apt.merge_item_state(state, res.url, res.payload["state"])
+                apt.record_outcome(
+                    scheduler, window, state, res.url, res.outcome, prev_checked
+                )
+                writer.mark(res.url)
+            writer.maybe_flush(now)
+
+            if now >= next_reload:
+                next_reload = now + RELOAD_CHECK_INTERVAL
+                apt.publish_loop_gauges(scheduler, window)
+                if watchlist_watcher.changed():
+                    apt.reload_watchlist(scheduler, state)
+                depths = queue.depth()
+                for name in (f"w{i}" for i in range(workers)):
+                    depth_gauge.set(depths.get(name, 0), shard=name)
+                requeued = queue.requeue_stale(STALE_CLAIM_SECONDS)
+                if requeued:
+                    logger.warning(
+                        "Requeued %d stale jobs", requeued, extra={"event": "requeued"}
+                    )
+                for i, proc in enumerate(procs):
+                    if not proc.is_alive():
+                        # Its shard keeps getting jobs: free its claims and
+                        # start a replacement to take them
+                        released = queue.release(f"w{i}")
+                        logger.error(
+                            "%s exited (%s); restarting, %d claimed jobs released",
+                            proc.name, proc.exitcode, released,
+                            extra={"event": "worker_exited", "worker": proc.name},
+                        )
+                        WORKER_RESTARTS.inc(worker=f"w{i}")
+                        procs[i] = start_worker(i, QUEUE_FILE)
+
+            if now >= next_summary:
+                await apt.send_telegram(
+                    apt.format_summary(window.summary(), len(scheduler))
+                )
+                next_summary = now + SUMMARY_INTERVAL
+
+            # Until the next slot (when something is due) or the next
+            # look for results, whichever is sooner
+            wait = RESULT_POLL
+            due_in = scheduler.seconds_until_due()
+            if due_in is not None:
+                wait = min(wait, max(due_in, next_slot - time.time()))
+            await asyncio.sleep(max(0.0, wait))
+    finally:
+        for proc in procs:
+            proc.terminate()
+        queue.close()
+        writer.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sharded Amazon price tracker")
+    ap.add_argument("--workers", type=int, default=max(1, len(PROXIES)))
+    args = ap.parse_args()
+    asyncio.run(coordinate(args.workers))
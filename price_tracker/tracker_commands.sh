@@ -27,6 +27,15 @@ asyncio.run(t())
 }
 alias tg=test-tg
 
+# Watchlist / valid_sellers edits are picked up live (no restart needed)
+add-asin() {
+  echo "$1" >> ~/robust-price-tracker/amazon_watchlist.txt && echo "➕ $1 queued"
+}
+
+add-seller() {
+  echo "$1" >> ~/robust-price-tracker/valid_sellers.txt && echo "➕ $1 added"
+}
+
 # ════════════════════════════════════════════════════════════════
 # 2. DEPLOY/REDEPLOY (Full Reset)
 # ════════════════════════════════════════════════════════════════
@@ -59,10 +68,27 @@ logs-tail() {
   journalctl -u amazon-price-tracker -n 50 | tail -20
 }
 
+# JSON log lines for one event, e.g. `events changed`, `events captcha`
+events() {
+  tail -n 200 -f ~/robust-price-tracker/amazon_tracker.log | grep --line-buffered "\"event\": \"${1:-changed}\""
+}
+
 cpu() {
   sudo systemctl status amazon-price-tracker | grep CPU
 }
 
+# Profile the running tracker for PROFILE_SECONDS: `prof` samples all
+# threads (collapsed stacks), `prof-full` runs cProfile (pstats)
+prof() {
+  sudo systemctl kill --kill-whom=main -s USR2 amazon-price-tracker
+  echo "⏱ Sampling... output in ~/robust-price-tracker/profiles/"
+}
+
+prof-full() {
+  sudo systemctl kill --kill-whom=main -s USR1 amazon-price-tracker
+  echo "⏱ cProfile on... output in ~/robust-price-tracker/profiles/"
+}
+
 # ════════════════════════════════════════════════════════════════
 # 4. MANUAL TESTING (No Service)
 # ════════════════════════════════════════════════════════════════
@@ -103,13 +129,20 @@ dashboard() {
 }
 alias dash=dashboard
 
+metrics() {
+  curl -s localhost:9108/metrics | grep -v '^#' | grep -E "${1:-.}"
+}
+alias mx=metrics
+
 # ════════════════════════════════════════════════════════════════
 # USAGE EXAMPLES:
 # st          # Status
 # lg          # Live logs
 # tg          # Test Telegram
 # stt         # Show prices
+# add-asin B0XXXXXXXX   # Track a new ASIN live
 # redeploy    # Git pull + restart
 # dash        # All-in-one status
+# mx captcha  # Live metrics (optional grep filter)
 # full-reset  # Nuke + restart
 # ════════════════════════════════════════════════════════════════
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, List
+
+
+# ---------- SQLite-backed local work queue ----------
+
+@dataclass
+class Job:
+    id: int
+    shard: str
+    url: str
+    payload: Dict
+
+
+@dataclass
+class JobResult:
+    id: int
+    shard: str
+    url: str
+    outcome: str
+    payload: Dict
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    claimed_at REAL,
+    done_at REAL,
+    outcome TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (shard, claimed_at);
+CREATE INDEX IF NOT EXISTS jobs_done ON jobs (done_at);
+"""
+
+
+class WorkQueue:
+    """Jobs and results for coordinator/worker mode in one SQLite file.
+
+    The coordinator put()s jobs tagged with a shard, each worker claim()s
+    only its own shard and complete()s with a JSON result, and the
+    coordinator drains finished jobs with results(). WAL mode lets the
+    readers and the single writer at a time run without blocking each
+    other for long.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM jobs")
+
+    def put(self, shard: str, url: str, payload: Dict) -> int:
+        cur = self._db.execute(
+            "INSERT INTO jobs (shard, url, payload, enqueued_at) VALUES (?, ?, ?, ?)",
+            (shard, url, json.dumps(payload), time.time()),
+        )
+        return cur.lastrowid
+
+    def claim(self, shard: str) -> Optional[Job]:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT id, url, payload FROM jobs "
+                "WHERE shard = ? AND claimed_at IS NULL ORDER BY id LIMIT 1",
+                (shard,),
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return None
+            self._db.execute(
+                "UPDATE jobs SET claimed_at = ? WHERE id = ?", (time.time(), row[0])
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return Job(id=row[0], shard=shard, url=row[1], payload=json.loads(row[2]))
+
+    def complete(self, job_id: int, outcome: str, result: Dict) -> None:
+        self._db.execute(
+            "UPDATE jobs SET done_at = ?, outcome = ?, result = ? WHERE id = ?",
+            (time.time(), outcome, json.dumps(result), job_id),
+        )
+
+    def results(self, limit: int = 500) -> List[JobResult]:
+        """Pop finished jobs for the coordinator to merge."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute(
+                "SELECT id, shard, url, outcome, result FROM jobs "
+                "WHERE done_at IS NOT NULL ORDER BY done_at LIMIT ?",
+                (limit,),
+            ).fetchall()
+            if rows:
+                self._db.execute(
+                    f"DELETE FROM jobs WHERE id IN ({','.join('?' * len(rows))})",
+                    [r[0] for r in rows],
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return [
+            JobResult(id=r[0], shard=r[1], url=r[2], outcome=r[3], payload=json.loads(r[4]))
+            for r in rows
+        ]
+
+    def renew(self, job_id: int) -> None:
+        """Refresh a claim still being worked on, so it isn't requeued as stale."""
+        self._db.execute(
+            "UPDATE jobs SET claimed_at = ? WHERE id = ? AND done_at IS NULL",
+            (time.time(), job_id),
+        )
+
+    def requeue_stale(self, timeout: float) -> int:
+        """Release claims held longer than `timeout` (e.g. a worker died)."""
+        cur = self._db.execute(
+            "UPDATE jobs SET claimed_at = NULL "
+            "WHERE claimed_at < ? AND done_at IS NULL",
+            (time.time() - timeout,),
+        )
+        return cur.rowcount
+
+    def release(self, shard: str) -> int:
+        """Release every claim held by `shard` (its worker has exited)."""
+        cur = self._db.execute(
+            "UPDATE jobs SET claimed_at = NULL "
+            "WHERE shard = ? AND claimed_at IS NOT NULL AND done_at IS NULL",
+            (shard,),
+        )
+        return cur.rowcount
+
+    def depth(self) -> Dict[str, int]:
+        rows = self._db.execute(
+            "SELECT shard, COUNT(*) FROM jobs WHERE done_at IS NULL GROUP BY shard"
+        ).fetchall()
+        return {shard: n for shard, n in rows}
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""On-demand profiling for the long-running pollers.
+
+    kill -USR1 <pid>   deterministic cProfile of the main thread for N s,
+                       written as <dir>/profile-<ts>.pstats
+    kill -USR2 <pid>   sampling profiler over all threads for N s,
+                       written as <dir>/profile-<ts>.collapsed
+                       (flamegraph.pl / speedscope "collapsed stacks")
+
+Nothing runs until a signal arrives; idle cost is two signal handlers.
+"""
+
+import cProfile
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+_active = threading.Lock()
+_profile: Optional[cProfile.Profile] = None
+_out_dir = "profiles"
+_seconds = 30.0
+
+
+def _out_path(ext: str) -> str:
+    os.makedirs(_out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(_out_dir, f"profile-{stamp}-{os.getpid()}.{ext}")
+
+
+# ---------- Deterministic (cProfile) ----------
+
+def _stop_cprofile(signum=None, frame=None) -> None:
+    global _profile
+    if _profile is None:
+        return
+    _profile.disable()
+    path = _out_path("pstats")
+    _profile.dump_stats(path)
+    _profile = None
+    _active.release()
+    print(f"[profile] cProfile written to {path}", file=sys.stderr)
+
+
+def _start_cprofile(signum, frame) -> None:
+    global _profile
+    if not _active.acquire(blocking=False):
+        print("[profile] already running, ignoring signal", file=sys.stderr)
+        return
+    _profile = cProfile.Profile()
+    _profile.enable()
+    # SIGALRM is delivered to the main thread, the one cProfile is attached to
+    signal.signal(signal.SIGALRM, _stop_cprofile)
+    signal.setitimer(signal.ITIMER_REAL, _seconds)
+    print(f"[profile] cProfile on for {_seconds:g}s", file=sys.stderr)
+
+
+# ---------- Sampling ----------
+
+def _stack_key(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def _sample(seconds: float, interval: float) -> None:
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    stacks[f"{names.get(ident, ident)};{_stack_key(frame)}"] += 1
+            time.sleep(interval)
+        path = _out_path("collapsed")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"[profile] {sum(stacks.values())} samples written to {path}", file=sys.stderr)
+    finally:
+        _active.release()
+
+
+def _start_sampling(signum, frame) -> None:
+    if not _active.acquire(blocking=False):
+        print("[profile] already running, ignoring signal", file=sys.stderr)
+        return
+    threading.Thread(
+        target=_sample, args=(_seconds, 0.01), name="profiler", daemon=True
+    ).start()
+    print(f"[profile] sampling on for {_seconds:g}s", file=sys.stderr)
+
+
+def install_profiling_hooks(out_dir: str = "profiles", seconds: float = 30) -> None:
+    """Install SIGUSR1/SIGUSR2 handlers; call from the main thread."""
+    global _out_dir, _seconds
+    if not hasattr(signal, "SIGUSR1"):
+        return
+    _out_dir, _seconds = out_dir, seconds
+    signal.signal(signal.SIGUSR1, _start_cprofile)
+    signal.signal(signal.SIGUSR2, _start_sampling)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Import a poller script by path, for tools that use several pollers.
+
+Each poller directory has its own constants/config modules with
+clashing names, so they cannot simply all go on sys.path. Used by the
+parser benchmark, the load test and reextract.
+
+    from script_loader import load_module
+    camel = load_module("camel3/camel_curl_poller.py", "camel")
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_module(path: str, name: str):
+    """Import a script by path under a unique name.
+
+    The script's directory is only on sys.path while it imports, and its
+    siblings are dropped from sys.modules after. So are the shared root
+    modules (metrics, profiler) it pulled in, so every load gets a fresh
+    metrics registry.
+    """
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    before = set(sys.modules)
+    sys.path.insert(0, directory)
+    sys.path.insert(0, ROOT)
+    cwd = os.getcwd()
+    # amazon_price_tracker opens its log file relative to the cwd on import
+    os.chdir(tempfile.mkdtemp(prefix="bench_"))
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(directory)
+        sys.path.remove(ROOT)
+        for mod in set(sys.modules) - before:
+            f = getattr(sys.modules[mod], "__file__", None) or ""
+            if f.startswith(directory + os.sep) or os.path.dirname(f) == ROOT:
+                del sys.modules[mod]
+    return module
@@ -20,4 +20,14 @@ MIN_LIKES = 0
 # Polling interval in seconds
 POLLINTERVAL = 180
 
-TIMEFORMAT = "%Y-%m-%d %H:%M:%S"
\ No newline at end of file
+TIMEFORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Local Prometheus-style /metrics port (0 disables)
+METRICS_PORT = 9130
+
+# kill -USR1 (cProfile) / -USR2 (sampling) <pid> dumps a profile here
+PROFILE_DIR = "profiles"
+PROFILE_SECONDS = 30
+
+# Bot API host (fake_origin.py in price_tracker/ serves a stub for load tests)
+TELEGRAM_API_BASE = "https://api.telegram.org"
@@ -3,11 +3,26 @@
 import re
 import time
 import os
+import sys
 import requests
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+# metrics.py and profiler.py are shared by the pollers and live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import constants as const
+from metrics import counter, histogram, start_metrics_server
+from profiler import install_profiling_hooks
+
+FETCH_SECONDS = histogram("sd_fetch_seconds", "RSS fetch latency", ["host"])
+HTTP_RESPONSES = counter(
+    "sd_http_responses_total", "HTTP responses by status code", ["host", "code"]
+)
+FETCH_ERRORS = counter("sd_fetch_errors_total", "Failed RSS fetches", ["host"])
+PARSE_SECONDS = histogram("sd_parse_seconds", "RSS parse duration", ["source"])
+ITEMS = counter("sd_items_total", "RSS items fetched / new", ["kind"])
+ALERTS = counter("sd_alerts_total", "Telegram messages", ["result"])
 
 
 def referral_link(original_link: str, user_id: str) -> str:
@@ -22,6 +37,21 @@ def referral_link(original_link: str, user_id: str) -> str:
         return f"https://slickdeals.net/sh/thread-{thread_id}/e/3/c/deal-details/u/{user_id}/"
     return original_link
 
+
+@dataclass(slots=True)
+class Item:
+    """One RSS deal; the referral link is built only when an alert needs it."""
+
+    title: str
+    link: str
+    likes: int
+    source: str
+
+    @property
+    def ref_link(self) -> str:
+        return referral_link(self.link, const.SD_USERID)
+
+
 def load_sd_seen(max_age_hours: int = 24):
     """
     Load seen URLs from SD_SEENFILE, auto-purging records older than max_age_hours.
@@ -79,8 +109,8 @@ def append_sd_seen(new_items):
     with open(const.SD_SEENFILE, "a") as f:
         for it in new_items:
             ts = datetime.now().strftime(const.TIMEFORMAT)
-            meta = f"{it['title']} || likes={it['likes']} || {ts}"
-            f.write(it["link"] + "\n")  # store the original SD link as key
+            meta = f"{it.title} || likes={it.likes} || {ts}"
+            f.write(it.link + "\n")  # store the original SD link as key
             f.write(meta + "\n")
             f.write("---\n")
     print(f"[seen] Appended {len(new_items)} records to {const.SD_SEENFILE}")
@@ -93,22 +123,26 @@ def fetch_all_rss():
     for i, rss_url in enumerate(const.SD_RSS_URLS, 1):
         print(f"[DEBUG] Fetching RSS #{i}: {rss_url.split('?')[0]}...")
         try:
-            resp = requests.get(
-                rss_url,
-                timeout=20,
-                headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X)"},
-            )
+            with FETCH_SECONDS.time(host="slickdeals.net"):
+                resp = requests.get(
+                    rss_url,
+                    timeout=20,
+                    headers={"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X)"},
+                )
+            HTTP_RESPONSES.inc(host="slickdeals.net", code=str(resp.status_code))
             resp.raise_for_status()
-            items = parse_items(resp.text, source=f"RSS#{i}")
+            with PARSE_SECONDS.time(source=f"RSS#{i}"):
+                items = parse_items(resp.text, source=f"RSS#{i}")
             all_items.extend(items)
         except Exception as e:
+            FETCH_ERRORS.inc(host="slickdeals.net")
             print(f"[DEBUG] RSS#{i} failed: {e}")
     
     # FIXED: Efficient set-based deduplication (no dead code)
     seen_links = set()
     unique_items = []
     for item in all_items:
-        link = item['link']
+        link = item.link
         if link not in seen_links:
             seen_links.add(link)
             unique_items.append(item)
@@ -148,20 +182,14 @@ def parse_items(xml_text, source):
         if likes < const.MIN_LIKES:
             continue
             
-        if any(kw in title.upper() for kw in junk_keywords):
+        if any(kw.upper() in title.upper() for kw in junk_keywords):
             continue
             
         # Optional: Price filter (uncomment if wanted)
         # if '$' not in title:
         #     continue
             
-        items.append({
-            'title': title,
-            'link': link, 
-            'likes': likes,
-            'ref_link': referral_link(link, const.SD_USERID),
-            'source': source
-        })
+        items.append(Item(title, link, likes, source))
         
     print(f"[DEBUG] {source}: {len(items)} qualifying {const.MIN_LIKES}+ likes")
     return items
@@ -169,18 +197,18 @@ def parse_items(xml_text, source):
 
 def filter_new(items, seen):
     """Return only items whose original link is not in seen."""
-    return [it for it in items if it["link"] not in seen]
+    return [it for it in items if it.link not in seen]
 
 def send_sd_alerts(items):
     """Send EACH URL as SEPARATE message to ALL chats WITH LINK PREVIEWS."""
     if not items:
         return
         
-    api_url = f"https://api.telegram.org/bot{const.SD_BOTTOKEN}/sendMessage"
+    api_url = f"{const.TELEGRAM_API_BASE}/bot{const.SD_BOTTOKEN}/sendMessage"
     
     for item in items:
-        ref_link = item["ref_link"]
-        title_short = item["title"][:100]
+        ref_link = item.ref_link
+        title_short = item.title[:100]
         
         # Send to EVERY chat ID (group + private)
         for chat_id in const.SD_CHATIDS:
@@ -193,11 +221,13 @@ def send_sd_alerts(items):
                     "parse_mode": "Markdown",
                     "disable_web_page_preview": False,
                 }, timeout=10)
+                ALERTS.inc(result="sent")
                 print(f"[telegram] → {chat_id}: {title_short[:50]}... (w/ preview)")
                 
                 time.sleep(0.5)  # Rate limit protection
                 
             except Exception as e:
+                ALERTS.inc(result="failed")
                 print(f"[telegram] {chat_id} ERROR: {e}")
 
 def main():
@@ -206,21 +236,25 @@ def main():
     )
 
     seen = load_sd_seen(max_age_hours=24)
+    start_metrics_server(const.METRICS_PORT)
+    install_profiling_hooks(const.PROFILE_DIR, const.PROFILE_SECONDS)
 
     while True:
         try:
             items = fetch_all_rss()
             new_hot = filter_new(items, seen)
+            ITEMS.inc(len(items), kind="fetched")
+            ITEMS.inc(len(new_hot), kind="new")
 
             if new_hot:
                 print(f"[poll] {len(new_hot)} new hot items")
                 append_sd_seen(new_hot)  # mark as seen first
                 for it in new_hot:
-                    print(f"  {it['likes']} 👍  {it['title']}")
-                    print(f"    {it['ref_link']}")
+                    print(f"  {it.likes} 👍  {it.title}")
+                    print(f"    {it.ref_link}")
                 send_sd_alerts(new_hot)
                 for it in new_hot:
-                    seen.add(it["link"])
+                    seen.add(it.link)
 
             else:
                 print("[poll] No new hot items")